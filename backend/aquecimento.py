@@ -0,0 +1,46 @@
+"""
+Aquecimento do pipeline de conciliação.
+Importa as dependências pesadas e executa uma conciliação mínima para que o primeiro
+usuário não pague o custo de importação e de inicialização do parse. Chama o parser e o
+pipeline direto: nada é gravado nas execuções nem no histórico.
+"""
+import os
+import tempfile
+import time
+
+# Planilhas mínimas (cabeçalho + 2 linhas) nos dois modelos
+_LINHAS_MODELO1 = [
+    ["FORNECEDOR/COLABORADOR", "DATA", "VALOR", "CENTRO DE CUSTO", "Departamento"],
+    ["Fornecedor Exemplo LTDA", "05/01", "R$ 1.178,93", "SEGBRASIL RECIFE", "ADM"],
+    ["Outro Fornecedor ME", "06/01", "R$ 460,00", "", "ADM"],
+]
+_LINHAS_MODELO2 = [
+    ["Fornecedor - nome", "Data pagamento", "Valor pagamento", "Centro custo", "Descrição"],
+    ["Fornecedor Exemplo", "05/01/2026", 1178.93, "RECIFE", "Pagamento"],
+    ["Outro Fornecedor", "06/01/2026", 460.0, "RECIFE", "Pagamento"],
+]
+
+
+def _gravar_planilha(linhas: list, diretorio: str, nome: str) -> str:
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    for linha in linhas:
+        ws.append(linha)
+    caminho = os.path.join(diretorio, nome)
+    wb.save(caminho)
+    return caminho
+
+
+def aquecer_pipeline() -> float:
+    """Executa uma conciliação completa com planilhas mínimas. Retorna a duração em segundos."""
+    from conciliacao.pipeline import conciliar_arquivos
+    from schemas import RespostaConciliacaoSchema
+
+    inicio = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="aquecimento_") as diretorio:
+        ref = _gravar_planilha(_LINHAS_MODELO1, diretorio, "referencia.xlsx")
+        comp = _gravar_planilha(_LINHAS_MODELO2, diretorio, "comparacao.xlsx")
+        RespostaConciliacaoSchema(id_execucao="aquecimento", **conciliar_arquivos(ref, comp))
+    return time.perf_counter() - inicio
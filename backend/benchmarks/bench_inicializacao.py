@@ -0,0 +1,99 @@
+"""
+Benchmark de inicialização: tempo até o primeiro /health saudável e até a
+primeira conciliação concluída, comparando o perfil de desenvolvimento
+(uvicorn, 1 processo, sem aquecimento) com o de produção (gunicorn.conf.py).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_inicializacao --linhas 2000 --repeticoes 3
+"""
+import argparse
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.planilhas import aguardar_saudavel, enviar_conciliacao, gerar_par
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PERFIS = {
+    "dev": lambda porta: [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(porta)],
+    "producao": lambda porta: [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py"],
+}
+
+
+def ambiente_servidor(porta: int, workers: int, dados: str) -> dict:
+    """
+    Ambiente do servidor do benchmark: histórico, execuções e referências ficam em `dados`
+    (diretório temporário do benchmark), nunca nos dados persistentes do app.
+    """
+    return {
+        **os.environ,
+        "PORT": str(porta),
+        "WEB_CONCURRENCY": str(workers),
+        "HISTORICO_DB": os.path.join(dados, "historico.sqlite3"),
+        "EXECUCOES_DIR": os.path.join(dados, "execucoes"),
+        "REFERENCIAS_DIR": os.path.join(dados, "referencias"),
+    }
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def medir(perfil: str, ref: str, comp: str, workers: int) -> tuple[float, float]:
+    """Sobe o servidor e retorna (s até /health saudável, s até a 1ª conciliação)."""
+    porta = _porta_livre()
+    dados = tempfile.mkdtemp(prefix="bench_dados_")
+    inicio = time.perf_counter()
+    proc = subprocess.Popen(
+        PERFIS[perfil](porta),
+        cwd=BACKEND_DIR,
+        env=ambiente_servidor(porta, workers, dados),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        url = f"http://127.0.0.1:{porta}"
+        saudavel = aguardar_saudavel(url) - inicio
+        status, _ = enviar_conciliacao(url, ref, comp)
+        if status != 200:
+            raise RuntimeError(f"/conciliar retornou HTTP {status}")
+        primeira = time.perf_counter() - inicio
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+        shutil.rmtree(dados, ignore_errors=True)
+    return saudavel, primeira
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=2000, help="lançamentos por planilha")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2, help="workers do perfil de produção")
+    parser.add_argument("--perfis", nargs="+", default=list(PERFIS), choices=list(PERFIS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_inicializacao_") as diretorio:
+        ref, comp = gerar_par(diretorio, args.linhas)
+        print(f"{'perfil':<10} {'/health (s)':>12} {'1ª conciliação (s)':>20}")
+        for perfil in args.perfis:
+            saudaveis, primeiras = [], []
+            for _ in range(args.repeticoes):
+                saudavel, primeira = medir(perfil, ref, comp, args.workers)
+                saudaveis.append(saudavel)
+                primeiras.append(primeira)
+            print(f"{perfil:<10} {statistics.median(saudaveis):>12.3f} {statistics.median(primeiras):>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Teste de carga local do /conciliar: sobe a API (perfil dev ou produção), envia uma
+mistura de planilhas de tamanhos diferentes com N requisições simultâneas e mede
+vazão, latência (p50/p95/p99), erros por tipo e a memória (RSS) do servidor ao longo
+do tempo. Cada nível de concorrência roda por --duracao segundos no mesmo servidor,
+para ver em que ponto a latência degrada.
+
+Uso (a partir de backend/):
+    python -m benchmarks.carga --concorrencia 1 2 4 8 --duracao 30
+    python -m benchmarks.carga --perfil producao --workers 4 --mix 500:6 5000:3 20000:1
+    python -m benchmarks.carga --url http://127.0.0.1:8000 --pid 12345 --concorrencia 4
+
+RSS é lido de /proc (Linux): soma do processo do servidor e de todos os descendentes
+(workers do gunicorn, pool de parsers).
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.bench_inicializacao import BACKEND_DIR, PERFIS, _porta_livre, ambiente_servidor
+from benchmarks.planilhas import aguardar_saudavel, enviar_conciliacao, gerar_par
+
+_PAGINA_KB = os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+@dataclass
+class Requisicao:
+    """Uma requisição do teste (instantes em segundos desde o início do nível)."""
+    concorrencia: int
+    linhas: int
+    inicio: float
+    latencia: float
+    status: int
+    erro: str = ""
+
+
+@dataclass
+class AmostraMemoria:
+    concorrencia: int
+    instante: float
+    rss_mb: float
+    processos: int
+
+
+def _filhos_por_pai() -> Dict[int, List[int]]:
+    filhos: Dict[int, List[int]] = {}
+    for nome in os.listdir("/proc"):
+        if not nome.isdigit():
+            continue
+        try:
+            with open(f"/proc/{nome}/stat") as f:
+                # O nome do processo vem entre parênteses e pode ter espaços
+                campos = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        filhos.setdefault(int(campos[1]), []).append(int(nome))
+    return filhos
+
+
+def rss_arvore(pid: int) -> Tuple[float, int]:
+    """(RSS total em MB, nº de processos) de pid e descendentes."""
+    filhos = _filhos_por_pai()
+    pendentes, total_kb, processos = [pid], 0, 0
+    while pendentes:
+        atual = pendentes.pop()
+        try:
+            with open(f"/proc/{atual}/statm") as f:
+                total_kb += int(f.read().split()[1]) * _PAGINA_KB
+            processos += 1
+        except OSError:
+            continue
+        pendentes.extend(filhos.get(atual, []))
+    return total_kb / 1024, processos
+
+
+def _percentil(valores: Sequence[float], p: float) -> float:
+    """Percentil por posição mais próxima (valores já ordenados)."""
+    if not valores:
+        return float("nan")
+    k = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[k]
+
+
+def _sortear_tamanho(rnd: random.Random, mix: List[Tuple[int, float]]) -> int:
+    return rnd.choices([linhas for linhas, _ in mix], weights=[peso for _, peso in mix])[0]
+
+
+def executar_nivel(
+    url: str,
+    pares: Dict[int, Tuple[str, str]],
+    mix: List[Tuple[int, float]],
+    concorrencia: int,
+    duracao: float,
+    pid: Optional[int],
+    intervalo_memoria: float,
+    semente: int,
+) -> Tuple[List[Requisicao], List[AmostraMemoria], float]:
+    """
+    Mantém `concorrencia` requisições em andamento por `duracao` segundos (as que já
+    começaram terminam). Retorna (requisições, amostras de memória, segundos decorridos).
+    """
+    requisicoes: List[Requisicao] = []
+    amostras: List[AmostraMemoria] = []
+    trava = threading.Lock()
+    parar = threading.Event()
+    inicio = time.perf_counter()
+
+    def cliente(n: int) -> None:
+        rnd = random.Random(semente * 1000 + n)
+        while time.perf_counter() - inicio < duracao:
+            linhas = _sortear_tamanho(rnd, mix)
+            t0 = time.perf_counter()
+            try:
+                status, _ = enviar_conciliacao(url, *pares[linhas])
+                erro = "" if status == 200 else f"HTTP {status}"
+            except Exception as e:  # conexão recusada, timeout etc.
+                status, erro = 0, type(e).__name__
+            req = Requisicao(concorrencia, linhas, t0 - inicio, time.perf_counter() - t0, status, erro)
+            with trava:
+                requisicoes.append(req)
+
+    def amostrar() -> None:
+        while not parar.is_set():
+            rss, processos = rss_arvore(pid)
+            amostras.append(AmostraMemoria(concorrencia, time.perf_counter() - inicio, round(rss, 1), processos))
+            parar.wait(intervalo_memoria)
+
+    amostrador = threading.Thread(target=amostrar, daemon=True) if pid else None
+    if amostrador:
+        amostrador.start()
+    clientes = [threading.Thread(target=cliente, args=(n,), daemon=True) for n in range(concorrencia)]
+    for t in clientes:
+        t.start()
+    for t in clientes:
+        t.join()
+    decorrido = time.perf_counter() - inicio
+    parar.set()
+    if amostrador:
+        amostrador.join()
+    return requisicoes, amostras, decorrido
+
+
+def _linha_latencias(rotulo: str, reqs: List[Requisicao], decorrido: float) -> str:
+    ok = sorted(r.latencia for r in reqs if not r.erro)
+    erros = sum(1 for r in reqs if r.erro)
+    taxa_erro = 100 * erros / len(reqs) if reqs else 0.0
+    return (
+        f"{rotulo:<14} {len(reqs):>6} {len(ok) / decorrido:>8.2f} {taxa_erro:>7.1f}% "
+        f"{_percentil(ok, 50):>8.2f} {_percentil(ok, 95):>8.2f} {_percentil(ok, 99):>8.2f} "
+        f"{(ok[-1] if ok else float('nan')):>8.2f}"
+    )
+
+
+def relatorio(
+    niveis: List[Tuple[int, List[Requisicao], List[AmostraMemoria], float]],
+    intervalo_linha_tempo: float,
+) -> None:
+    cabecalho = f"{'':<14} {'req':>6} {'ok/s':>8} {'erros':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'máx (s)':>8}"
+    for concorrencia, reqs, amostras, decorrido in niveis:
+        print(f"\n== concorrência {concorrencia} ({decorrido:.1f}s) ==")
+        print(cabecalho)
+        print(_linha_latencias("total", reqs, decorrido))
+        for linhas in sorted({r.linhas for r in reqs}):
+            print(_linha_latencias(f"{linhas} linhas", [r for r in reqs if r.linhas == linhas], decorrido))
+
+        erros = Counter(r.erro for r in reqs if r.erro)
+        if erros:
+            print("erros: " + ", ".join(f"{tipo} x{n}" for tipo, n in erros.most_common()))
+
+        if amostras:
+            print(f"{'t (s)':>7} {'RSS (MB)':>9} {'procs':>6} {'concluídas':>11} {'ok/s':>7}")
+            fim_janela = intervalo_linha_tempo
+            while fim_janela - intervalo_linha_tempo < decorrido:
+                janela = [a for a in amostras if fim_janela - intervalo_linha_tempo <= a.instante < fim_janela]
+                concluidas = [
+                    r for r in reqs
+                    if fim_janela - intervalo_linha_tempo <= r.inicio + r.latencia < fim_janela
+                ]
+                if janela:
+                    pico = max(janela, key=lambda a: a.rss_mb)
+                    ok = sum(1 for r in concluidas if not r.erro)
+                    print(f"{min(fim_janela, decorrido):>7.1f} {pico.rss_mb:>9.1f} {pico.processos:>6} "
+                          f"{len(concluidas):>11} {ok / intervalo_linha_tempo:>7.2f}")
+                fim_janela += intervalo_linha_tempo
+            print(f"pico de RSS: {max(a.rss_mb for a in amostras):.1f} MB")
+
+
+def _ler_mix(itens: List[str]) -> List[Tuple[int, float]]:
+    """['500:6', '5000:3'] -> [(500, 6.0), (5000, 3.0)] (peso 1 se omitido)."""
+    mix = []
+    for item in itens:
+        linhas, _, peso = item.partition(":")
+        mix.append((int(linhas), float(peso or 1)))
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--perfil", default="dev", choices=list(PERFIS), help="como subir o servidor")
+    parser.add_argument("--workers", type=int, default=2, help="workers do perfil de produção")
+    parser.add_argument("--url", help="usar um servidor já rodando em vez de subir um")
+    parser.add_argument("--pid", type=int, help="PID do servidor externo (para medir RSS com --url)")
+    parser.add_argument("--concorrencia", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duracao", type=float, default=30, help="segundos por nível de concorrência")
+    parser.add_argument("--mix", nargs="+", default=["500:6", "5000:3", "20000:1"], help="linhas:peso")
+    parser.add_argument("--aquecimento", type=int, default=1, help="requisições de cada tamanho antes de medir")
+    parser.add_argument("--intervalo-memoria", type=float, default=0.5, help="segundos entre amostras de RSS")
+    parser.add_argument("--intervalo-relatorio", type=float, default=5, help="janela da linha do tempo (s)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--json", help="grava requisições e amostras brutas neste arquivo")
+    args = parser.parse_args()
+
+    mix = _ler_mix(args.mix)
+    with tempfile.TemporaryDirectory(prefix="bench_carga_") as diretorio:
+        print("Gerando planilhas: " + ", ".join(f"{linhas} linhas" for linhas, _ in mix))
+        pares = {
+            linhas: gerar_par(diretorio, linhas, semente=args.semente + linhas, prefixo=f"{linhas}_")
+            for linhas, _ in mix
+        }
+
+        proc = None
+        url, pid = args.url, args.pid
+        if not url:
+            porta = _porta_livre()
+            # Histórico, execuções e referências do servidor do benchmark ficam fora dos dados do app
+            dados = tempfile.mkdtemp(prefix="bench_dados_")
+            proc = subprocess.Popen(
+                PERFIS[args.perfil](porta),
+                cwd=BACKEND_DIR,
+                env=ambiente_servidor(porta, args.workers, dados),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            url, pid = f"http://127.0.0.1:{porta}", proc.pid
+        try:
+            aguardar_saudavel(url)
+            for linhas, _ in mix:
+                for _ in range(args.aquecimento):
+                    enviar_conciliacao(url, *pares[linhas])
+            if pid:
+                print(f"RSS após aquecimento: {rss_arvore(pid)[0]:.1f} MB")
+
+            niveis = []
+            for concorrencia in args.concorrencia:
+                print(f"Concorrência {concorrencia} por {args.duracao:.0f}s...")
+                niveis.append((concorrencia, *executar_nivel(
+                    url, pares, mix, concorrencia, args.duracao, pid, args.intervalo_memoria, args.semente,
+                )))
+        finally:
+            if proc:
+                os.killpg(proc.pid, signal.SIGTERM)
+                proc.wait(timeout=30)
+                shutil.rmtree(dados, ignore_errors=True)
+
+    relatorio(niveis, args.intervalo_relatorio)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "perfil": None if args.url else args.perfil,
+                    "workers": args.workers,
+                    "mix": mix,
+                    "niveis": [
+                        {
+                            "concorrencia": c,
+                            "segundos": round(d, 3),
+                            "requisicoes": [asdict(r) for r in reqs],
+                            "memoria": [asdict(a) for a in amostras],
+                        }
+                        for c, reqs, amostras, d in niveis
+                    ],
+                },
+                f,
+                ensure_ascii=False,
+            )
+        print(f"\nDados brutos em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
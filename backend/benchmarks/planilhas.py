@@ -0,0 +1,117 @@
+"""
+Utilitários compartilhados pelos benchmarks: geração de planilhas sintéticas nos
+dois modelos, envio de conciliações por HTTP e espera pelo /health.
+Usa só a biblioteca padrão (e openpyxl para gravar as planilhas).
+"""
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+import uuid
+from typing import Optional, Tuple
+
+_FORNECEDORES = [
+    "Barbosa Comércio", "João da Silva", "Auto Peças Recife", "Segbrasil Serviços",
+    "Papelaria Central", "Transportes Natal", "Clínica Boa Saúde", "Posto Avenida",
+]
+_SUFIXOS = ["LTDA", "ME", "EIRELI", "S.A.", ""]
+_CENTROS = ["SEGBRASIL RECIFE", "SEGBRASIL NATAL", "JOÃO PESSOA", "MATRIZ"]
+
+
+def _formatar_br(valor: float) -> str:
+    s = f"{valor:,.2f}"
+    return "R$ " + s.replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def gerar_par(
+    diretorio: str,
+    linhas: int,
+    semente: int = 42,
+    taxa_divergente: float = 0.05,
+    taxa_ausente: float = 0.03,
+    prefixo: str = "",
+) -> Tuple[str, str]:
+    """
+    Grava referencia (Modelo 1) e comparacao (Modelo 2) com `linhas` lançamentos em janeiro/2026.
+    Uma fração dos lançamentos da comparação tem valor alterado e outra fração é omitida.
+    Retorna (caminho_referencia, caminho_comparacao).
+    """
+    from openpyxl import Workbook
+
+    rnd = random.Random(semente)
+    wb_ref = Workbook(write_only=True)
+    ws_ref = wb_ref.create_sheet("Referencia")
+    ws_ref.append(["FORNECEDOR/COLABORADOR", "DATA", "VALOR", "CENTRO DE CUSTO", "Departamento"])
+    wb_comp = Workbook(write_only=True)
+    ws_comp = wb_comp.create_sheet("Comparacao")
+    ws_comp.append(["Fornecedor - nome", "Data pagamento", "Valor pagamento", "Centro custo", "Descrição"])
+
+    for _ in range(linhas):
+        nome = rnd.choice(_FORNECEDORES)
+        dia = rnd.randint(1, 28)
+        valor = round(rnd.uniform(10, 20000), 2)
+        centro = rnd.choice(_CENTROS) if rnd.random() > 0.02 else ""
+        ws_ref.append([f"{nome} {rnd.choice(_SUFIXOS)}".strip(), f"{dia:02d}/01", _formatar_br(valor), centro, "ADM"])
+
+        sorteio = rnd.random()
+        if sorteio < taxa_ausente:
+            continue
+        if sorteio < taxa_ausente + taxa_divergente:
+            valor = round(valor + rnd.uniform(1, 100), 2)
+        centro_comp = centro.split(" ")[-1] if centro else ""
+        ws_comp.append([nome, f"{dia:02d}/01/2026", valor, centro_comp, "Pagamento"])
+
+    caminho_ref = os.path.join(diretorio, f"{prefixo}referencia_{linhas}.xlsx")
+    caminho_comp = os.path.join(diretorio, f"{prefixo}comparacao_{linhas}.xlsx")
+    wb_ref.save(caminho_ref)
+    wb_comp.save(caminho_comp)
+    return caminho_ref, caminho_comp
+
+
+def _corpo_multipart(campos: dict) -> Tuple[bytes, str]:
+    """Monta corpo multipart/form-data a partir de {campo: caminho_do_arquivo}."""
+    fronteira = uuid.uuid4().hex
+    partes = []
+    for campo, caminho in campos.items():
+        with open(caminho, "rb") as f:
+            conteudo = f.read()
+        partes.append(
+            (
+                f"--{fronteira}\r\n"
+                f'Content-Disposition: form-data; name="{campo}"; filename="{os.path.basename(caminho)}"\r\n'
+                "Content-Type: application/octet-stream\r\n\r\n"
+            ).encode()
+            + conteudo
+            + b"\r\n"
+        )
+    corpo = b"".join(partes) + f"--{fronteira}--\r\n".encode()
+    return corpo, f"multipart/form-data; boundary={fronteira}"
+
+
+def enviar_conciliacao(url_base: str, ref: str, comp: str, timeout: float = 600) -> Tuple[int, Optional[dict]]:
+    """POST /conciliar com os dois arquivos. Retorna (status HTTP, JSON da resposta ou None)."""
+    corpo, tipo = _corpo_multipart({"arquivo_referencia": ref, "arquivo_comparacao": comp})
+    req = urllib.request.Request(
+        f"{url_base}/conciliar", data=corpo, method="POST", headers={"Content-Type": tipo}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def aguardar_saudavel(url_base: str, timeout: float = 120, intervalo: float = 0.01) -> float:
+    """Faz polling do /health até responder 200. Retorna o instante (perf_counter) da resposta."""
+    limite = time.perf_counter() + timeout
+    while time.perf_counter() < limite:
+        try:
+            with urllib.request.urlopen(f"{url_base}/health", timeout=1) as resp:
+                if resp.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(intervalo)
+    raise TimeoutError(f"{url_base}/health não respondeu em {timeout}s")
@@ -6,10 +6,12 @@ Cheques de divergência:
 - Informações faltantes (ex: centro de custo vazio)
 """
 from dataclasses import dataclass, field
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import pandas as pd
 
+from conciliacao.matching import LinhasReferencia, Registro, _df_to_registros, linhas_referencia
+
 
 
 @dataclass
@@ -26,59 +28,64 @@ class AlertaInfoFaltante:
     alerta: str
 
 
-def checar_info_faltante(df: pd.DataFrame, modelo: str) -> List[dict]:
+def checar_info_faltante(
+    df: pd.DataFrame,
+    modelo: str,
+    registros: Optional[Union[Sequence[Registro], LinhasReferencia]] = None,
+) -> List[dict]:
     """
     Verifica registros com centro de custo vazio ou outros campos críticos faltantes.
     Retorna lista de dicts para inclusão em resultados.
+    registros: os mesmos registros do matching, se já convertidos (ou a LinhasReferencia
+    de uma referência publicada).
     """
-    alertas = []
-    for i, row in df.iterrows():
-        centro = str(row.get("centro_custo", "")).strip()
-        fornecedor = str(row.get("fornecedor", ""))
-        data_exib = str(row.get("data_exib", ""))
-        valor = float(row.get("valor", 0))
-
-        if not centro:
-            alertas.append({
-                "status": "info_faltante",
-                "referencia": {
-                    "fornecedor": fornecedor,
-                    "valor": round(valor, 2),
-                    "data": data_exib,
-                    "centro_custo": "",
-                    "departamento": str(row.get("departamento", "")),
-                },
-                "comparacao": None,
-                "score_nome": None,
-                "diferenca_valor": None,
-                "alerta": "Centro de custo não preenchido",
-            })
-    return alertas
+    linhas = linhas_referencia(registros if registros is not None else _df_to_registros(df))
+    return [
+        {
+            "status": "info_faltante",
+            "referencia": {**linhas.para_dict(idx), "centro_custo": ""},
+            "comparacao": None,
+            "score_nome": None,
+            "diferenca_valor": None,
+            "alerta": "Centro de custo não preenchido",
+        }
+        for idx in linhas.sem_centro_custo()
+    ]
+
+
+def agregar_por_data(registros: List[Registro]) -> Dict[str, Tuple[int, float]]:
+    """{data: (quantidade, total)} dos registros com data, somando na ordem original."""
+    out: Dict[str, Tuple[int, float]] = {}
+    for r in registros:
+        d = r.data.strip()
+        if not d:
+            continue
+        cnt, total = out.get(d, (0, 0.0))
+        out[d] = (cnt + 1, total + r.valor)
+    return out
+
+
+def _agregados(
+    df_ref: pd.DataFrame,
+    df_comp: pd.DataFrame,
+    agregados: Optional[Tuple[dict, dict]],
+) -> Tuple[dict, dict]:
+    if agregados is not None:
+        return agregados
+    return agregar_por_data(_df_to_registros(df_ref)), agregar_por_data(_df_to_registros(df_comp))
 
 
 def checar_alertas_diarios(
     df_ref: pd.DataFrame,
     df_comp: pd.DataFrame,
+    agregados: Optional[Tuple[dict, dict]] = None,
 ) -> List[dict]:
     """
     Compara quantidade e total por data entre referência e comparação.
     Retorna lista de alertas diários.
+    agregados: (ref, comp) de agregar_por_data, se já calculados.
     """
-    def agrupar(df: pd.DataFrame) -> dict:
-        out = {}
-        for _, row in df.iterrows():
-            d = str(row.get("data_exib", "")).strip()
-            if not d:
-                continue
-            val = float(row.get("valor", 0))
-            if d not in out:
-                out[d] = (0, 0.0)
-            cnt, total = out[d]
-            out[d] = (cnt + 1, total + val)
-        return out
-
-    ref_por_data = agrupar(df_ref)
-    comp_por_data = agrupar(df_comp)
+    ref_por_data, comp_por_data = _agregados(df_ref, df_comp, agregados)
 
     alertas = []
     todas_datas = set(ref_por_data.keys()) | set(comp_por_data.keys())
@@ -114,26 +121,13 @@ def formatar_br(val: float) -> str:
 def agrupar_por_data(
     df_ref: pd.DataFrame,
     df_comp: pd.DataFrame,
+    agregados: Optional[Tuple[dict, dict]] = None,
 ) -> List[dict]:
     """
     Agrupa totais por data para comparação Ref vs Comp.
     Retorna lista de dicts com data, qtd_ref, qtd_comp, total_ref, total_comp, divergente.
     """
-    def agrupar(df: pd.DataFrame) -> dict:
-        out = {}
-        for _, row in df.iterrows():
-            d = str(row.get("data_exib", "")).strip()
-            if not d:
-                continue
-            val = float(row.get("valor", 0))
-            if d not in out:
-                out[d] = (0, 0.0)
-            cnt, total = out[d]
-            out[d] = (cnt + 1, total + val)
-        return out
-
-    ref_por_data = agrupar(df_ref)
-    comp_por_data = agrupar(df_comp)
+    ref_por_data, comp_por_data = _agregados(df_ref, df_comp, agregados)
     todas_datas = sorted(set(ref_por_data.keys()) | set(comp_por_data.keys()))
 
     resultado = []
@@ -0,0 +1,140 @@
+"""
+Cubo de agregados de uma conciliação: quantidade e soma em centavos de cada planilha por
+(data, centro de custo, departamento, status), nas dimensões da referência. É montado uma
+vez por execução, numa passada vetorizada sobre as colunas das planilhas, e gravado com
+ela; totais e detalhamentos do dashboard (roll-up / drill-down) saem do cubo, sem percorrer
+os resultados.
+"""
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DIMENSOES_CUBO = ("data", "centro_custo", "departamento", "status")
+MEDIDAS_CUBO = ("qtd_ref", "centavos_ref", "qtd_comp", "centavos_comp")
+
+# Registros da comparação que nenhum da referência usou: não há dimensões da referência
+# para herdar, então entram num balde próprio (status e centro de custo/departamento fixos)
+STATUS_SEM_PAR = "sem_par"
+SEM_REFERENCIA = "(sem par na referência)"
+
+# (datas, centros de custo, departamentos, centavos): arrays alinhados por registro
+ColunasCubo = Tuple[Any, Any, Any, Any]
+
+
+def colunas_cubo(df: "pd.DataFrame") -> ColunasCubo:
+    """
+    Colunas do cubo de um DataFrame normalizado (aplicar_normalizacao), com os mesmos
+    textos de _df_to_registros sem espaços nas pontas. Uma referência publicada tem o
+    equivalente em ReferenciaColunar.colunas_cubo.
+    """
+    import numpy as np
+
+    n = len(df)
+
+    def texto(nome: str):
+        if nome not in df.columns:
+            return np.full(n, "", dtype=object)
+        return df[nome].astype(str).str.strip().to_numpy(dtype=object)
+
+    valores = df["valor"].to_numpy(dtype=np.float64) if "valor" in df.columns else np.zeros(n)
+    return texto("data_exib"), texto("centro_custo"), texto("departamento"), np.rint(valores * 100).astype(np.int64)
+
+
+def _quadro(datas, centros, departamentos, status, centavos, lado: str):
+    """DataFrame de um lado (uma linha por registro) com as dimensões e as medidas do lado."""
+    import numpy as np
+    import pandas as pd
+
+    um, zero = np.ones(len(centavos), dtype=np.int64), np.zeros(len(centavos), dtype=np.int64)
+    return pd.DataFrame({
+        "data": datas,
+        "centro_custo": centros,
+        "departamento": departamentos,
+        "status": status,
+        "qtd_ref": um if lado == "ref" else zero,
+        "centavos_ref": centavos if lado == "ref" else zero,
+        "qtd_comp": zero if lado == "ref" else um,
+        "centavos_comp": zero if lado == "ref" else centavos,
+    })
+
+
+def montar_cubo(colunas_ref: ColunasCubo, colunas_comp: ColunasCubo, resultados_match: list) -> Dict[str, list]:
+    """
+    Cubo colunar {dimensão ou medida: lista}, uma célula por combinação presente, ordenadas
+    pelas dimensões. As planilhas usam vocabulários diferentes de centro de custo e
+    departamento, então as dimensões são sempre as da referência: cada registro da
+    referência entra com as suas e o status do seu resultado, e o registro da comparação
+    casado com ele entra na mesma célula. Os da comparação sem par entram com a própria data
+    no balde STATUS_SEM_PAR / SEM_REFERENCIA. resultados_match: um por registro da
+    referência (executar_matching ou executar_matching_centro_custo).
+    """
+    import numpy as np
+    import pandas as pd
+
+    datas_ref, centros_ref, departamentos_ref, centavos_ref = colunas_ref
+    datas_comp, _, _, centavos_comp = colunas_comp
+
+    # Dos resultados só saem o status e o par (idx_ref, idx_comp); o resto é indexação de arrays
+    status_ref = np.full(len(centavos_ref), "", dtype=object)
+    status_ref[[r.idx_ref for r in resultados_match]] = [r.status for r in resultados_match]
+    par = np.full(len(centavos_comp), -1, dtype=np.int64)  # registro da referência casado com cada um da comparação
+    casados = [(r.idx_comp, r.idx_ref) for r in resultados_match if r.idx_comp is not None]
+    if casados:
+        idx_comp, idx_ref = zip(*casados)
+        par[list(idx_comp)] = idx_ref
+
+    com_par = par >= 0
+    origem = par[com_par]
+    sem_par = ~com_par
+    quadro = pd.concat(
+        [
+            _quadro(datas_ref, centros_ref, departamentos_ref, status_ref, centavos_ref, "ref"),
+            _quadro(
+                datas_ref[origem], centros_ref[origem], departamentos_ref[origem], status_ref[origem],
+                centavos_comp[com_par], "comp",
+            ),
+            _quadro(datas_comp[sem_par], SEM_REFERENCIA, SEM_REFERENCIA, STATUS_SEM_PAR, centavos_comp[sem_par], "comp"),
+        ],
+        ignore_index=True,
+    )
+    cubo = quadro.groupby(list(DIMENSOES_CUBO), sort=True)[list(MEDIDAS_CUBO)].sum().reset_index()
+    return {coluna: cubo[coluna].tolist() for coluna in DIMENSOES_CUBO + MEDIDAS_CUBO}
+
+
+def consultar_cubo(
+    cubo: Mapping[str, list],
+    agrupar: Sequence[str] = (),
+    filtros: Optional[Mapping[str, Sequence[str]]] = None,
+) -> Dict[str, Any]:
+    """
+    Soma as células do cubo que passam em filtros ({dimensão: valores aceitos}) agrupando
+    pelas dimensões de agrupar (vazio: só o total). Roda em Python puro; o custo é o
+    número de células do cubo, não o de resultados.
+    """
+    filtros = {d: set(v) for d, v in (filtros or {}).items() if v}
+    for d in (*agrupar, *filtros):
+        if d not in DIMENSOES_CUBO:
+            raise ValueError(f"dimensão deve ser uma de: {', '.join(DIMENSOES_CUBO)}")
+    if len(set(agrupar)) != len(agrupar):
+        raise ValueError("dimensão repetida em agrupar")
+
+    grupos: Dict[tuple, List[int]] = {}
+    for i in range(len(cubo["status"])):
+        if any(cubo[d][i] not in aceitos for d, aceitos in filtros.items()):
+            continue
+        soma = grupos.setdefault(tuple(cubo[d][i] for d in agrupar), [0] * len(MEDIDAS_CUBO))
+        for k, medida in enumerate(MEDIDAS_CUBO):
+            soma[k] += cubo[medida][i]
+
+    linhas = [
+        {**dict(zip(agrupar, chave)), **dict(zip(MEDIDAS_CUBO, soma))}
+        for chave, soma in sorted(grupos.items())
+    ]
+    total = {medida: sum(linha[medida] for linha in linhas) for medida in MEDIDAS_CUBO}
+    return {
+        "agrupar": list(agrupar),
+        "filtros": {d: sorted(v) for d, v in filtros.items()},
+        "linhas": linhas,
+        "total": total,
+    }
@@ -0,0 +1,83 @@
+"""
+Executor de etapas do pipeline em grafo de dependências.
+Cada etapa declara os artefatos de que precisa e produz um artefato com o próprio nome;
+etapas independentes rodam ao mesmo tempo num pool de threads e cada artefato é
+calculado uma única vez.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Etapa:
+    """Etapa que chama funcao(*artefatos de entradas) e publica o retorno como `nome`."""
+    nome: str
+    funcao: Callable[..., Any]
+    entradas: Tuple[str, ...] = ()
+
+
+def _validar(etapas: Sequence[Etapa], iniciais: Dict[str, Any]) -> None:
+    """Nomes únicos, entradas existentes e ausência de ciclos."""
+    nomes = [e.nome for e in etapas]
+    repetidos = {n for n in nomes if nomes.count(n) > 1} | (set(nomes) & set(iniciais))
+    if repetidos:
+        raise ValueError(f"Artefatos produzidos mais de uma vez: {', '.join(sorted(repetidos))}")
+
+    disponiveis = set(iniciais)
+    restantes = list(etapas)
+    while restantes:
+        prontas = [e for e in restantes if set(e.entradas) <= disponiveis]
+        if not prontas:
+            faltantes = {n for e in restantes for n in e.entradas} - disponiveis - {e.nome for e in restantes}
+            if faltantes:
+                raise ValueError(f"Entradas sem etapa produtora: {', '.join(sorted(faltantes))}")
+            raise ValueError(f"Ciclo entre as etapas: {', '.join(e.nome for e in restantes)}")
+        disponiveis.update(e.nome for e in prontas)
+        restantes = [e for e in restantes if e not in prontas]
+
+
+def executar_etapas(
+    etapas: Sequence[Etapa],
+    iniciais: Dict[str, Any],
+    max_workers: int = 4,
+) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Executa as etapas assim que suas entradas ficam prontas.
+    Retorna (artefatos, tempos em ms por etapa). Um erro numa etapa cancela as que
+    ainda não começaram e é relançado.
+    """
+    _validar(etapas, iniciais)
+    artefatos: Dict[str, Any] = dict(iniciais)
+    tempos: Dict[str, float] = {}
+    pendentes: List[Etapa] = list(etapas)
+
+    def rodar(etapa: Etapa) -> Tuple[Any, float]:
+        inicio = time.perf_counter()
+        resultado = etapa.funcao(*(artefatos[n] for n in etapa.entradas))
+        return resultado, (time.perf_counter() - inicio) * 1000
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="etapa") as pool:
+        em_execucao: Dict[Future, Etapa] = {}
+        try:
+            while pendentes or em_execucao:
+                prontas = [e for e in pendentes if all(n in artefatos for n in e.entradas)]
+                for etapa in prontas:
+                    pendentes.remove(etapa)
+                    em_execucao[pool.submit(rodar, etapa)] = etapa
+
+                concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    etapa = em_execucao.pop(futuro)
+                    artefatos[etapa.nome], tempos[etapa.nome] = futuro.result()
+        except BaseException:
+            for futuro in em_execucao:
+                futuro.cancel()
+            raise
+
+    logger.info("Etapas (ms): %s", ", ".join(f"{n}={t:.1f}" for n, t in tempos.items()))
+    return artefatos, {n: round(t, 1) for n, t in tempos.items()}
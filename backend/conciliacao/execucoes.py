@@ -0,0 +1,122 @@
+"""
+Armazenamento em disco dos resultados de cada conciliação.
+Permite exportar relatórios no servidor depois da resposta, lendo os resultados
+linha a linha (JSON Lines) sem carregar a execução inteira em memória.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Any, Iterator, List, Optional
+
+ANALISES = ("valor_data", "centro_custo")
+
+_ID_VALIDO = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ExecucaoNaoEncontrada(LookupError):
+    """Execução inexistente, expirada ou id inválido."""
+
+
+class RepositorioExecucoes:
+    """
+    Execuções gravadas em diretorio/<id>/, removidas após ttl_s segundos.
+    Layout: alertas.json e, por análise, <analise>/resumo.json, por_data.json, resultados.jsonl
+    e cubo.json (conciliacao.cubo), se a análise tiver cubo.
+    """
+
+    def __init__(self, diretorio: Optional[str] = None, ttl_s: float = 24 * 3600):
+        self.diretorio = diretorio or os.path.join(tempfile.gettempdir(), "conciliacao_execucoes")
+        self.ttl_s = ttl_s
+
+    def _caminho(self, id_execucao: str, *partes: str) -> str:
+        if not _ID_VALIDO.match(id_execucao or ""):
+            raise ExecucaoNaoEncontrada(id_execucao)
+        return os.path.join(self.diretorio, id_execucao, *partes)
+
+    def salvar(self, analises: dict[str, dict[str, Any]], alertas_diarios: List[dict]) -> str:
+        """
+        Grava uma execução e retorna seu id.
+        analises: {"valor_data": {"resumo": dict, "resultados": [dict], "por_data": [dict], "cubo": dict}, ...}
+        """
+        self.limpar_expiradas()
+        id_execucao = uuid.uuid4().hex
+        base = self._caminho(id_execucao)
+        tmp = base + ".tmp"
+        os.makedirs(tmp)
+        try:
+            with open(os.path.join(tmp, "alertas.json"), "w", encoding="utf-8") as f:
+                json.dump(alertas_diarios, f, ensure_ascii=False)
+            for analise, dados in analises.items():
+                pasta = os.path.join(tmp, analise)
+                os.makedirs(pasta)
+                with open(os.path.join(pasta, "resumo.json"), "w", encoding="utf-8") as f:
+                    json.dump(dados["resumo"], f, ensure_ascii=False)
+                with open(os.path.join(pasta, "por_data.json"), "w", encoding="utf-8") as f:
+                    json.dump(
+                        [{k: v for k, v in g.items() if k != "resultados"} for g in dados.get("por_data", [])],
+                        f,
+                        ensure_ascii=False,
+                    )
+                if dados.get("cubo") is not None:
+                    with open(os.path.join(pasta, "cubo.json"), "w", encoding="utf-8") as f:
+                        json.dump(dados["cubo"], f, ensure_ascii=False)
+                with open(os.path.join(pasta, "resultados.jsonl"), "w", encoding="utf-8") as f:
+                    for r in dados["resultados"]:
+                        f.write(json.dumps(r, ensure_ascii=False))
+                        f.write("\n")
+            # Rename atômico: leitores nunca veem uma execução pela metade
+            os.rename(tmp, base)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return id_execucao
+
+    def _ler_json(self, id_execucao: str, *partes: str) -> Any:
+        try:
+            with open(self._caminho(id_execucao, *partes), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ExecucaoNaoEncontrada(id_execucao)
+
+    def ler_resumo(self, id_execucao: str, analise: str) -> dict:
+        return self._ler_json(id_execucao, analise, "resumo.json")
+
+    def ler_por_data(self, id_execucao: str, analise: str) -> List[dict]:
+        return self._ler_json(id_execucao, analise, "por_data.json")
+
+    def ler_cubo(self, id_execucao: str, analise: str) -> dict:
+        return self._ler_json(id_execucao, analise, "cubo.json")
+
+    def ler_alertas(self, id_execucao: str) -> List[dict]:
+        return self._ler_json(id_execucao, "alertas.json")
+
+    def iterar_resultados(self, id_execucao: str, analise: str) -> Iterator[dict]:
+        """Itera os resultados de uma análise, um por linha do arquivo."""
+        caminho = self._caminho(id_execucao, analise, "resultados.jsonl")
+        if not os.path.exists(caminho):
+            raise ExecucaoNaoEncontrada(id_execucao)
+
+        def _iterar() -> Iterator[dict]:
+            with open(caminho, encoding="utf-8") as f:
+                for linha in f:
+                    if linha.strip():
+                        yield json.loads(linha)
+
+        return _iterar()
+
+    def limpar_expiradas(self) -> None:
+        """Remove execuções mais antigas que o TTL."""
+        if not os.path.isdir(self.diretorio):
+            return
+        limite = time.time() - self.ttl_s
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    shutil.rmtree(caminho, ignore_errors=True)
+            except OSError:
+                pass
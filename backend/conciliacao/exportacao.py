@@ -0,0 +1,403 @@
+"""
+Exportação de relatórios (XLSX, CSV e PDF) gerados no servidor.
+Mesmas abas e colunas de exportarExcel/exportarPDF do frontend. XLSX e CSV são
+produzidos em streaming: as linhas são escritas e enviadas em blocos, com memória
+constante independente do número de resultados.
+"""
+import csv
+import io
+import re
+import tempfile
+import zipfile
+from typing import Any, Iterable, Iterator, List, Literal, Optional
+from xml.sax.saxutils import escape
+
+TipoRelatorio = Literal["divergentes", "total"]
+
+STATUS_LABEL = {
+    "ok": "OK",
+    "divergente": "Divergente",
+    "nao_encontrado": "Não encontrado",
+    "info_faltante": "Info faltante",
+}
+
+STATUS_DIVERGENTES = {"divergente", "nao_encontrado", "info_faltante"}
+
+COLUNAS_RESULTADOS = [
+    "Status", "Data", "Fornecedor DE", "Valor DE", "Centro Custo DE",
+    "Fornecedor PARA", "Valor PARA", "Centro Custo PARA", "Score", "Diferença", "Alerta",
+]
+
+# Linhas escritas entre cada envio de bloco ao cliente
+LINHAS_POR_BLOCO = 2000
+
+# O reportlab mantém todas as páginas em memória até salvar: o PDF para neste número de
+# linhas de resultado (~140 páginas) e indica quantas ficaram de fora
+PDF_MAX_LINHAS = 5000
+
+_CARACTERES_INVALIDOS_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def filtrar_resultados(resultados: Iterable[dict], tipo: TipoRelatorio) -> Iterator[dict]:
+    """Apenas divergentes/não encontrados/info faltante, ou todos."""
+    for r in resultados:
+        if tipo == "total" or r.get("status") in STATUS_DIVERGENTES:
+            yield r
+
+
+def resultado_para_linha(r: dict) -> List[Any]:
+    """Converte um resultado nas colunas de COLUNAS_RESULTADOS."""
+    ref = r.get("referencia") or {}
+    comp = r.get("comparacao") or {}
+    score = r.get("score_nome")
+    diferenca = r.get("diferenca_valor")
+    return [
+        STATUS_LABEL.get(r.get("status", ""), r.get("status", "")),
+        ref.get("data", ""),
+        ref.get("fornecedor", ""),
+        ref.get("valor", ""),
+        ref.get("centro_custo", "") or "",
+        comp.get("fornecedor", ""),
+        comp.get("valor", ""),
+        comp.get("centro_custo", ""),
+        f"{round(score * 100)}%" if score is not None else "",
+        diferenca if diferenca is not None else "",
+        r.get("alerta", "") or "",
+    ]
+
+
+def _linhas_resumo(resumo: dict) -> List[List[Any]]:
+    return [
+        ["Relatório de Conciliação DE - PARA"],
+        [],
+        ["Resumo", ""],
+        ["Total DE", resumo.get("total_referencia", 0)],
+        ["Total PARA", resumo.get("total_comparacao", 0)],
+        ["Matches OK", resumo.get("matches_confirmados", 0)],
+        ["Divergentes", resumo.get("divergentes", 0)],
+        ["Não encontrados", resumo.get("nao_encontrados", 0)],
+        ["Info faltante", resumo.get("info_faltante", 0)],
+    ]
+
+
+def _linhas_por_data(por_data: List[dict]) -> List[List[Any]]:
+    return [["Data", "Qtd DE", "Qtd PARA", "Total DE", "Total PARA", "Divergente"]] + [
+        [g["data"], g["qtd_ref"], g["qtd_comp"], g["total_ref"], g["total_comp"], "Sim" if g["divergente"] else "Não"]
+        for g in por_data
+    ]
+
+
+# ---------------------------------------------------------------------------
+# CSV
+# ---------------------------------------------------------------------------
+
+def _valor_csv(v: Any) -> Any:
+    # Separador ";" e vírgula decimal (padrão do Excel em pt-BR)
+    if isinstance(v, float):
+        return f"{v:.2f}".replace(".", ",")
+    return v
+
+
+def gerar_csv(resultados: Iterable[dict], tipo: TipoRelatorio) -> Iterator[bytes]:
+    """CSV dos resultados (aba Resultados), enviado em blocos de LINHAS_POR_BLOCO linhas."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=";", lineterminator="\r\n")
+    buffer.write("\ufeff")  # BOM para o Excel reconhecer UTF-8
+    escritor.writerow(COLUNAS_RESULTADOS)
+    for i, r in enumerate(filtrar_resultados(resultados, tipo), start=1):
+        escritor.writerow([_valor_csv(v) for v in resultado_para_linha(r)])
+        if i % LINHAS_POR_BLOCO == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# XLSX em streaming
+# ---------------------------------------------------------------------------
+
+class _SaidaStream(io.RawIOBase):
+    """Destino não-posicionável do ZipFile: acumula bytes até serem drenados."""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._partes.append(bytes(b))
+        return len(b)
+
+    def drenar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+def _celula_xml(v: Any) -> str:
+    if v is None or v == "":
+        return "<c/>"
+    if isinstance(v, bool):
+        v = "Sim" if v else "Não"
+    if isinstance(v, (int, float)):
+        return f"<c><v>{v}</v></c>"
+    texto = escape(_CARACTERES_INVALIDOS_XML.sub("", str(v)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _linha_xml(numero: int, valores: List[Any]) -> str:
+    return f'<row r="{numero}">' + "".join(_celula_xml(v) for v in valores) + "</row>"
+
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def _partes_fixas(nomes_abas: List[str]) -> List[tuple]:
+    tipos = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(nomes_abas) + 1)
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        f"{tipos}</Types>"
+    )
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/></Relationships>'
+    )
+    abas = "".join(
+        f'<sheet name="{escape(nome)}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, nome in enumerate(nomes_abas, start=1)
+    )
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><sheets>{abas}</sheets></workbook>'
+    )
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + "".join(
+            f'<Relationship Id="rId{i}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{i}.xml"/>'
+            for i in range(1, len(nomes_abas) + 1)
+        )
+        + "</Relationships>"
+    )
+    return [
+        ("[Content_Types].xml", content_types),
+        ("_rels/.rels", rels),
+        ("xl/workbook.xml", workbook),
+        ("xl/_rels/workbook.xml.rels", workbook_rels),
+    ]
+
+
+def gerar_xlsx(
+    resultados: Iterable[dict],
+    resumo: dict,
+    alertas_diarios: List[dict],
+    tipo: TipoRelatorio,
+    por_data: List[dict],
+) -> Iterator[bytes]:
+    """
+    XLSX com as abas Resumo, Divergentes/Todos, Alertas e Por data (como exportarExcel).
+    O zip é escrito sequencialmente num destino não-posicionável, então os bytes podem
+    ser enviados ao cliente à medida que as linhas são geradas.
+    """
+    abas: List[tuple] = [
+        ("Resumo", _linhas_resumo(resumo)),
+        ("Divergentes" if tipo == "divergentes" else "Todos", None),
+    ]
+    if alertas_diarios:
+        abas.append(("Alertas", [["Data", "Mensagem"]] + [[a["data"], a["mensagem"]] for a in alertas_diarios]))
+    if por_data:
+        abas.append(("Por data", _linhas_por_data(por_data)))
+
+    saida = _SaidaStream()
+    with zipfile.ZipFile(saida, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome, conteudo in _partes_fixas([nome for nome, _ in abas]):
+            zf.writestr(nome, conteudo)
+        yield saida.drenar()
+
+        for i, (_, linhas) in enumerate(abas, start=1):
+            with zf.open(f"xl/worksheets/sheet{i}.xml", "w") as f:
+                f.write(
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><worksheet xmlns="{_NS_MAIN}"><sheetData>'.encode()
+                )
+                if linhas is None:
+                    # Aba de resultados: streaming a partir do iterador
+                    f.write(_linha_xml(1, COLUNAS_RESULTADOS).encode())
+                    for n, r in enumerate(filtrar_resultados(resultados, tipo), start=2):
+                        f.write(_linha_xml(n, resultado_para_linha(r)).encode())
+                        if n % LINHAS_POR_BLOCO == 0:
+                            yield saida.drenar()
+                else:
+                    for n, valores in enumerate(linhas, start=1):
+                        f.write(_linha_xml(n, valores).encode())
+                f.write(b"</sheetData></worksheet>")
+            yield saida.drenar()
+    yield saida.drenar()
+
+
+# ---------------------------------------------------------------------------
+# PDF
+# ---------------------------------------------------------------------------
+
+def _formatar_valor(v: Any) -> str:
+    if not isinstance(v, (int, float)) or v == "":
+        return "—"
+    s = f"{v:,.2f}"
+    return "R$ " + s.replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def gerar_pdf(
+    resultados: Iterable[dict],
+    resumo: dict,
+    alertas_diarios: List[dict],
+    tipo: TipoRelatorio,
+    tamanho_bloco: int = 64 * 1024,
+    max_linhas: int = PDF_MAX_LINHAS,
+) -> Iterator[bytes]:
+    """
+    PDF paisagem com a tabela de resultados e os alertas por data (como exportarPDF).
+    As páginas são desenhadas à medida que os resultados são lidos; o arquivo é montado
+    num temporário e enviado em blocos. Só as primeiras max_linhas linhas entram na
+    tabela; as demais são contadas numa nota (o relatório completo é o XLSX ou o CSV).
+    """
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import mm
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen import canvas
+
+    largura, altura = landscape(A4)
+    margem = 14 * mm
+    largura_tabela = largura - 2 * margem
+    proporcoes = [0.11, 0.09, 0.20, 0.11, 0.20, 0.11, 0.18]
+    larguras = [largura_tabela * p for p in proporcoes]
+    cabecalho = ["Status", "Data", "Fornecedor DE", "Valor DE", "Fornecedor PARA", "Valor PARA", "Alerta"]
+    altura_linha = 5 * mm
+    fonte, tamanho_fonte = "Helvetica", 8
+
+    def _cortar(texto: str, limite: float) -> str:
+        if stringWidth(texto, fonte, tamanho_fonte) <= limite:
+            return texto
+        while texto and stringWidth(texto + "…", fonte, tamanho_fonte) > limite:
+            texto = texto[:-1]
+        return texto + "…"
+
+    def _linha(c, y: float, valores: List[str], larguras_cols: List[float], cor_fundo=None) -> None:
+        x = margem
+        for valor, w in zip(valores, larguras_cols):
+            if cor_fundo:
+                c.setFillColorRGB(*cor_fundo)
+                c.rect(x, y - altura_linha, w, altura_linha, stroke=1, fill=1)
+                c.setFillColorRGB(1, 1, 1)
+            else:
+                c.rect(x, y - altura_linha, w, altura_linha, stroke=1, fill=0)
+            c.drawString(x + 2, y - altura_linha + 1.6 * mm, _cortar(valor, w - 4))
+            c.setFillColorRGB(0, 0, 0)
+            x += w
+
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as destino:
+        c = canvas.Canvas(destino, pagesize=(largura, altura))
+        c.setLineWidth(0.2)
+        y = altura - 15 * mm
+        c.setFont(fonte, 14)
+        c.drawString(margem, y, "Relatório de Conciliação DE - PARA")
+        y -= 8 * mm
+        c.setFont(fonte, 10)
+        c.drawString(
+            margem,
+            y,
+            f"Resumo: {resumo.get('total_referencia', 0)} DE | {resumo.get('total_comparacao', 0)} PARA | "
+            f"OK: {resumo.get('matches_confirmados', 0)} | Divergentes: {resumo.get('divergentes', 0)} | "
+            f"Não encontrados: {resumo.get('nao_encontrados', 0)}",
+        )
+        y -= 8 * mm
+        c.drawString(margem, y, "Relatório: Apenas divergentes" if tipo == "divergentes" else "Relatório: Total")
+        y -= 8 * mm
+
+        c.setFont(fonte, tamanho_fonte)
+        _linha(c, y, cabecalho, larguras, cor_fundo=(20 / 255, 128 / 255, 120 / 255))
+        y -= altura_linha
+        omitidas = 0
+        for i, r in enumerate(filtrar_resultados(resultados, tipo)):
+            if i >= max_linhas:
+                omitidas += 1
+                continue
+            if y - altura_linha < margem:
+                c.showPage()
+                c.setLineWidth(0.2)
+                c.setFont(fonte, tamanho_fonte)
+                y = altura - margem
+                _linha(c, y, cabecalho, larguras, cor_fundo=(20 / 255, 128 / 255, 120 / 255))
+                y -= altura_linha
+            ref = r.get("referencia") or {}
+            comp = r.get("comparacao") or {}
+            _linha(c, y, [
+                STATUS_LABEL.get(r.get("status", ""), r.get("status", "")),
+                str(ref.get("data", "")),
+                str(ref.get("fornecedor", "")),
+                _formatar_valor(ref.get("valor")),
+                str(comp.get("fornecedor", "")),
+                _formatar_valor(comp.get("valor")) if comp.get("valor") else "—",
+                (r.get("alerta") or "").strip() or "—",
+            ], larguras)
+            y -= altura_linha
+
+        if omitidas:
+            y -= 6 * mm
+            if y < margem:
+                c.showPage()
+                c.setLineWidth(0.2)
+                y = altura - margem
+            c.setFont(fonte, 10)
+            c.drawString(
+                margem,
+                y,
+                f"Relatório PDF limitado a {max_linhas} linhas: {omitidas} linhas omitidas. "
+                "Exporte em XLSX ou CSV para o relatório completo.",
+            )
+            c.setFont(fonte, tamanho_fonte)
+
+        if alertas_diarios:
+            y -= 10 * mm
+            if y - 2 * altura_linha < margem:
+                c.showPage()
+                c.setLineWidth(0.2)
+                y = altura - margem
+            c.setFont(fonte, 11)
+            c.drawString(margem, y, "Alertas por data")
+            y -= 6 * mm
+            c.setFont(fonte, tamanho_fonte)
+            larguras_alertas = [largura_tabela * 0.15, largura_tabela * 0.85]
+            _linha(c, y, ["Data", "Mensagem"], larguras_alertas, cor_fundo=(251 / 255, 191 / 255, 36 / 255))
+            y -= altura_linha
+            for a in alertas_diarios:
+                if y - altura_linha < margem:
+                    c.showPage()
+                    c.setLineWidth(0.2)
+                    c.setFont(fonte, tamanho_fonte)
+                    y = altura - margem
+                _linha(c, y, [a["data"], a["mensagem"]], larguras_alertas)
+                y -= altura_linha
+
+        c.save()
+        destino.seek(0)
+        while True:
+            bloco: Optional[bytes] = destino.read(tamanho_bloco)
+            if not bloco:
+                break
+            yield bloco
@@ -0,0 +1,502 @@
+"""
+Histórico persistente das conciliações em SQLite.
+Cada execução grava o resumo por análise, os totais por data e as linhas de resultado,
+indexadas para consultas de tendência entre execuções (ex: fornecedores não encontrados
+em vários meses seguidos) sem reprocessar planilhas.
+Também guarda o dicionário de aliases de fornecedor (nome normalizado no Modelo 1 -> no
+Modelo 2), aprendido dos matches com nome muito parecido e das confirmações na tela.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DIMENSOES = ("fornecedor", "centro_custo")
+
+_VERSAO_SCHEMA = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    id TEXT PRIMARY KEY,
+    criado_em REAL NOT NULL,
+    ano_ref INTEGER NOT NULL,
+    origem TEXT NOT NULL,
+    arquivo_referencia TEXT NOT NULL DEFAULT '',
+    arquivo_comparacao TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS resumos (
+    execucao_id TEXT NOT NULL REFERENCES execucoes(id) ON DELETE CASCADE,
+    analise TEXT NOT NULL,
+    total_referencia INTEGER NOT NULL,
+    total_comparacao INTEGER NOT NULL,
+    matches_confirmados INTEGER NOT NULL,
+    divergentes INTEGER NOT NULL,
+    nao_encontrados INTEGER NOT NULL,
+    info_faltante INTEGER NOT NULL,
+    total_alertas_diarios INTEGER NOT NULL,
+    PRIMARY KEY (execucao_id, analise)
+);
+
+CREATE TABLE IF NOT EXISTS agregados_data (
+    execucao_id TEXT NOT NULL REFERENCES execucoes(id) ON DELETE CASCADE,
+    data TEXT NOT NULL,
+    competencia TEXT NOT NULL,
+    qtd_ref INTEGER NOT NULL,
+    qtd_comp INTEGER NOT NULL,
+    total_ref REAL NOT NULL,
+    total_comp REAL NOT NULL,
+    divergente INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS resultados (
+    execucao_id TEXT NOT NULL REFERENCES execucoes(id) ON DELETE CASCADE,
+    analise TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT,
+    competencia TEXT,
+    fornecedor TEXT NOT NULL DEFAULT '',
+    fornecedor_chave TEXT NOT NULL DEFAULT '',
+    centro_custo TEXT NOT NULL DEFAULT '',
+    departamento TEXT NOT NULL DEFAULT '',
+    valor REAL,
+    fornecedor_comp TEXT,
+    valor_comp REAL,
+    score_nome REAL,
+    diferenca_valor REAL,
+    alerta TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS aliases_fornecedor (
+    chave_ref TEXT PRIMARY KEY,
+    chave_comp TEXT NOT NULL,
+    origem TEXT NOT NULL,
+    score REAL,
+    ocorrencias INTEGER NOT NULL DEFAULT 1,
+    atualizado_em REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS ix_resultados_execucao_status ON resultados (execucao_id, status);
+CREATE INDEX IF NOT EXISTS ix_resultados_data ON resultados (data);
+CREATE INDEX IF NOT EXISTS ix_resultados_fornecedor ON resultados (fornecedor_chave, competencia, status);
+CREATE INDEX IF NOT EXISTS ix_resultados_centro_custo ON resultados (centro_custo, competencia, status);
+CREATE INDEX IF NOT EXISTS ix_agregados_data ON agregados_data (data);
+CREATE INDEX IF NOT EXISTS ix_execucoes_criado_em ON execucoes (criado_em);
+"""
+
+_COLUNAS_RESUMO = (
+    "total_referencia",
+    "total_comparacao",
+    "matches_confirmados",
+    "divergentes",
+    "nao_encontrados",
+    "info_faltante",
+    "total_alertas_diarios",
+)
+
+# Origem de um alias: aprendido de um match ou confirmado pelo usuário (este prevalece)
+ORIGENS_ALIAS = ("automatico", "usuario")
+
+# Confirmação do usuário sobrescreve qualquer alias; o automático só sobrescreve outro automático
+_UPSERT_ALIAS = """
+INSERT INTO aliases_fornecedor VALUES (?, ?, ?, ?, 1, ?)
+ON CONFLICT (chave_ref) DO UPDATE SET
+    ocorrencias = CASE WHEN chave_comp = excluded.chave_comp THEN ocorrencias + 1 ELSE 1 END,
+    chave_comp = excluded.chave_comp,
+    origem = excluded.origem,
+    score = excluded.score,
+    atualizado_em = excluded.atualizado_em
+WHERE aliases_fornecedor.origem = 'automatico' OR excluded.origem = 'usuario'
+"""
+
+# Coluna de agrupamento por dimensão (fornecedor agrupa pelo nome normalizado)
+_COLUNA_DIMENSAO = {"fornecedor": "fornecedor_chave", "centro_custo": "centro_custo"}
+
+
+def _data_iso(data_exib: str, ano: int, proxima_de: Optional[date] = None) -> Optional[str]:
+    """
+    'DD/MM' -> 'AAAA-MM-DD'. Sem proxima_de, usa `ano`; com ela, o ano (entre o anterior, o
+    próprio e o seguinte ao de proxima_de) que deixa a data mais perto dela, para DD/MM de
+    uma execução que atravessa a virada do ano cair no ano certo.
+    """
+    partes = (data_exib or "").strip().split("/")
+    if len(partes) < 2 or not partes[0].isdigit() or not partes[1].isdigit():
+        return None
+    dia, mes = int(partes[0]), int(partes[1])
+    anos = [ano] if proxima_de is None else [proxima_de.year + d for d in (0, -1, 1)]
+    candidatas = []
+    for a in anos:
+        try:
+            candidatas.append(date(a, mes, dia))
+        except ValueError:
+            continue
+    if not candidatas:
+        return None
+    if proxima_de is not None:
+        candidatas.sort(key=lambda d: abs((d - proxima_de).days))
+    return candidatas[0].isoformat()
+
+
+def _datas_execucao(resultados: List[dict]) -> Tuple[Dict[str, str], Optional[date]]:
+    """
+    ({DD/MM: AAAA-MM-DD}, mediana) das datas com ano de uma execução. Vale a data da
+    planilha, comparação primeiro (no match a data DD/MM é a mesma dos dois lados).
+    DD/MM sem ano em nenhum resultado usa o ano mais próximo da mediana (_data_iso).
+    """
+    datas: Dict[str, str] = {}
+    for lado in ("comparacao", "referencia"):
+        for r in resultados:
+            registro = r.get(lado) or {}
+            exib, iso = (registro.get("data") or "").strip(), registro.get("data_iso")
+            if exib and iso and exib not in datas:
+                datas[exib] = iso
+    conhecidas = sorted(datas.values())
+    return datas, date.fromisoformat(conhecidas[len(conhecidas) // 2]) if conhecidas else None
+
+
+def _chave_fornecedor(nome: str) -> str:
+    from conciliacao.normalizacao import normalizar_nome
+
+    return normalizar_nome(nome)
+
+
+def _score_par(chave_ref: str, chave_comp: str) -> float:
+    """Similaridade real (a mesma de score_nome no matching) entre dois nomes normalizados."""
+    from rapidfuzz import fuzz
+
+    return fuzz.ratio(chave_ref, chave_comp) / 100.0
+
+
+class HistoricoConciliacoes:
+    """
+    Banco SQLite em `caminho` (modo WAL, seguro para vários processos).
+    Cada operação abre sua própria conexão, então a instância pode ser compartilhada entre threads.
+    O arquivo e o schema só são criados na primeira operação: construir a instância (ex: ao
+    importar main) não toca no disco.
+    limiar_alias: score_nome mínimo de um match para aprender o par de fornecedores como alias.
+    """
+
+    def __init__(self, caminho: str, limiar_alias: float = 0.9):
+        self.caminho = caminho
+        self.limiar_alias = limiar_alias
+        self._preparado = False
+        self._trava = threading.Lock()
+
+    def _preparar(self) -> None:
+        with self._trava:
+            if self._preparado:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+            with self._abrir() as con:
+                if con.execute("PRAGMA user_version").fetchone()[0] < _VERSAO_SCHEMA:
+                    con.executescript(_SCHEMA)
+                    con.execute(f"PRAGMA user_version = {_VERSAO_SCHEMA}")
+            self._preparado = True
+
+    @contextmanager
+    def _abrir(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.caminho, timeout=30)) as con:
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute("PRAGMA synchronous = NORMAL")
+            con.execute("PRAGMA foreign_keys = ON")
+            yield con
+
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        if not self._preparado:
+            self._preparar()
+        with self._abrir() as con:
+            yield con
+
+    def registrar(
+        self,
+        id_execucao: str,
+        resposta: Dict[str, Any],
+        ano_ref: int,
+        origem: str = "api",
+        arquivo_referencia: str = "",
+        arquivo_comparacao: str = "",
+        substituir: bool = False,
+    ) -> None:
+        """
+        Grava uma execução (resposta de pipeline.conciliar_dataframes) numa única transação.
+        Com substituir, uma execução já gravada com o mesmo id é trocada por esta (sem
+        reaprender os aliases dela), então registrar de novo não duplica nada.
+        Datas e competências usam o ano das planilhas (ver _datas_execucao); ano_ref só vale
+        para execuções sem nenhuma data com ano. Matches com score_nome a partir de
+        limiar_alias alimentam o dicionário de aliases.
+        """
+        analises = {
+            "valor_data": resposta,
+            "centro_custo": resposta["analise_centro_custo"],
+        }
+        chaves: Dict[str, str] = {}
+        datas, mediana = _datas_execucao([r for dados in analises.values() for r in dados["resultados"]])
+
+        def data_iso(exib: str) -> Optional[str]:
+            exib = (exib or "").strip()
+            return datas.get(exib) or _data_iso(exib, ano_ref, mediana)
+
+        def linha_resultado(analise: str, r: dict) -> tuple:
+            ref = r.get("referencia") or {}
+            comp = r.get("comparacao") or {}
+            fornecedor = ref.get("fornecedor", "") or ""
+            if fornecedor not in chaves:
+                chaves[fornecedor] = _chave_fornecedor(fornecedor)
+            data = data_iso(ref.get("data", ""))
+            return (
+                id_execucao,
+                analise,
+                r["status"],
+                data,
+                data[:7] if data else None,
+                fornecedor,
+                chaves[fornecedor],
+                (ref.get("centro_custo", "") or "").strip(),
+                ref.get("departamento", "") or "",
+                ref.get("valor"),
+                comp.get("fornecedor"),
+                comp.get("valor"),
+                r.get("score_nome"),
+                r.get("diferenca_valor"),
+                r.get("alerta", "") or "",
+            )
+
+        with self._conexao() as con, con:
+            ja_gravada = substituir and con.execute(
+                "DELETE FROM execucoes WHERE id = ?", (id_execucao,)
+            ).rowcount > 0
+            con.execute(
+                "INSERT INTO execucoes VALUES (?, ?, ?, ?, ?, ?)",
+                (id_execucao, time.time(), ano_ref, origem, arquivo_referencia, arquivo_comparacao),
+            )
+            con.executemany(
+                f"INSERT INTO resumos VALUES (?, ?, {', '.join('?' * len(_COLUNAS_RESUMO))})",
+                [
+                    (id_execucao, analise, *(dados["resumo"][c] for c in _COLUNAS_RESUMO))
+                    for analise, dados in analises.items()
+                ],
+            )
+            agregados = []
+            for g in resposta["por_data"]:
+                data = data_iso(g["data"])
+                if data:
+                    agregados.append((
+                        id_execucao, data, data[:7], g["qtd_ref"], g["qtd_comp"],
+                        g["total_ref"], g["total_comp"], int(g["divergente"]),
+                    ))
+            con.executemany("INSERT INTO agregados_data VALUES (?, ?, ?, ?, ?, ?, ?, ?)", agregados)
+            for analise, dados in analises.items():
+                con.executemany(
+                    "INSERT INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (linha_resultado(analise, r) for r in dados["resultados"]),
+                )
+            if not ja_gravada:
+                self._gravar_aliases(con, self._aliases_aprendidos(resposta["resultados"], chaves), "automatico")
+
+    def _aliases_aprendidos(self, resultados: List[dict], chaves: Dict[str, str]) -> Dict[str, Tuple[str, float]]:
+        """
+        {chave_ref: (chave_comp, score)} dos matches com nome parecido mas não idêntico.
+        Matches que já vieram de um alias não reaprendem o par.
+        """
+        pares: Dict[str, Tuple[str, float]] = {}
+        for r in resultados:
+            if r.get("alias_fornecedor"):
+                continue
+            comp = r.get("comparacao")
+            score = r.get("score_nome")
+            if not comp or score is None or score < self.limiar_alias:
+                continue
+            fornecedor = (r.get("referencia") or {}).get("fornecedor", "") or ""
+            chave_ref = chaves[fornecedor] if fornecedor in chaves else _chave_fornecedor(fornecedor)
+            chave_comp = _chave_fornecedor(comp.get("fornecedor", "") or "")
+            if chave_ref and chave_comp and chave_ref != chave_comp:
+                pares[chave_ref] = (chave_comp, score)
+        return pares
+
+    @staticmethod
+    def _gravar_aliases(con: sqlite3.Connection, pares: Dict[str, Tuple[str, float]], origem: str) -> None:
+        """Grava os pares com o score arredondado como o score_nome dos resultados (2 casas)."""
+        agora = time.time()
+        con.executemany(
+            _UPSERT_ALIAS,
+            [(ref, comp, origem, round(score, 2), agora) for ref, (comp, score) in pares.items()],
+        )
+
+    def confirmar_alias(self, fornecedor_ref: str, fornecedor_comp: str) -> dict:
+        """
+        Registra, por confirmação do usuário, que os dois nomes são o mesmo fornecedor.
+        O par passa a vir marcado como alias com a similaridade real dos nomes; o status do
+        match não muda (só depende de valor e data).
+        """
+        chave_ref, chave_comp = _chave_fornecedor(fornecedor_ref), _chave_fornecedor(fornecedor_comp)
+        if not chave_ref or not chave_comp:
+            raise ValueError("Informe o fornecedor da referência e o da comparação")
+        with self._conexao() as con, con:
+            self._gravar_aliases(con, {chave_ref: (chave_comp, _score_par(chave_ref, chave_comp))}, "usuario")
+        return {"chave_ref": chave_ref, "chave_comp": chave_comp, "origem": "usuario"}
+
+    def carregar_aliases(self) -> Dict[str, Tuple[str, float]]:
+        """
+        Dicionário completo {chave_ref: (chave_comp, score)}, para consulta O(1) nos matchings.
+        score é a similaridade real do par, exibida no lugar de um novo fuzz.ratio.
+        """
+        with self._conexao() as con:
+            return {
+                ref: (comp, score)
+                for ref, comp, score in con.execute("SELECT chave_ref, chave_comp, score FROM aliases_fornecedor")
+            }
+
+    def versao_aliases(self) -> Tuple[int, float]:
+        """(quantidade, última alteração): muda sempre que o dicionário muda."""
+        with self._conexao() as con:
+            quantidade, ultima = con.execute(
+                "SELECT COUNT(*), COALESCE(MAX(atualizado_em), 0) FROM aliases_fornecedor"
+            ).fetchone()
+        return quantidade, ultima
+
+    def listar_aliases(self, origem: Optional[str] = None, limite: int = 500) -> List[dict]:
+        with self._conexao() as con:
+            return [dict(r) for r in con.execute(
+                """
+                SELECT * FROM aliases_fornecedor
+                WHERE origem = COALESCE(?, origem)
+                ORDER BY atualizado_em DESC LIMIT ?
+                """,
+                (origem, limite),
+            )]
+
+    def remover_alias(self, fornecedor_ref: str) -> bool:
+        with self._conexao() as con, con:
+            return con.execute(
+                "DELETE FROM aliases_fornecedor WHERE chave_ref = ?", (_chave_fornecedor(fornecedor_ref),)
+            ).rowcount > 0
+
+    def listar_execucoes(self, limite: int = 50) -> List[dict]:
+        """Execuções mais recentes com o resumo de cada análise."""
+        with self._conexao() as con:
+            execucoes = [dict(r) for r in con.execute(
+                "SELECT * FROM execucoes ORDER BY criado_em DESC LIMIT ?", (limite,)
+            )]
+            if not execucoes:
+                return []
+            ids = [e["id"] for e in execucoes]
+            resumos: Dict[str, dict] = {}
+            for r in con.execute(
+                f"SELECT * FROM resumos WHERE execucao_id IN ({', '.join('?' * len(ids))})", ids
+            ):
+                resumos.setdefault(r["execucao_id"], {})[r["analise"]] = {c: r[c] for c in _COLUNAS_RESUMO}
+        for e in execucoes:
+            e["resumos"] = resumos.get(e["id"], {})
+        return execucoes
+
+    def remover_execucao(self, id_execucao: str) -> bool:
+        with self._conexao() as con, con:
+            return con.execute("DELETE FROM execucoes WHERE id = ?", (id_execucao,)).rowcount > 0
+
+    def tendencias(
+        self,
+        dimensao: str = "fornecedor",
+        status: str = "nao_encontrado",
+        meses: int = 3,
+        min_meses: Optional[int] = None,
+        analise: str = "valor_data",
+        limite: int = 100,
+    ) -> dict:
+        """
+        Fornecedores (ou centros de custo) com resultados `status` em pelo menos `min_meses`
+        das últimas `meses` competências presentes no histórico (padrão: todas elas).
+        """
+        if dimensao not in _COLUNA_DIMENSAO:
+            raise ValueError(f"dimensao deve ser uma de: {', '.join(DIMENSOES)}")
+        coluna = _COLUNA_DIMENSAO[dimensao]
+        min_meses = meses if min_meses is None else min_meses
+
+        with self._conexao() as con:
+            competencias = [r[0] for r in con.execute(
+                "SELECT DISTINCT competencia FROM agregados_data ORDER BY competencia DESC LIMIT ?", (meses,)
+            )]
+            if not competencias:
+                return {"competencias": [], "itens": []}
+            marcadores = ", ".join("?" * len(competencias))
+            linhas = con.execute(
+                f"""
+                WITH filtrados AS (
+                    SELECT {coluna} AS chave, fornecedor, centro_custo, competencia, valor
+                    FROM resultados
+                    WHERE analise = ? AND status = ? AND {coluna} != ''
+                      AND competencia IN ({marcadores})
+                ),
+                chaves AS (
+                    SELECT chave FROM filtrados
+                    GROUP BY chave
+                    HAVING COUNT(DISTINCT competencia) >= ?
+                )
+                SELECT f.chave, MIN(f.{dimensao}) AS nome, f.competencia,
+                       COUNT(*) AS quantidade, ROUND(COALESCE(SUM(f.valor), 0), 2) AS valor
+                FROM filtrados f JOIN chaves c ON c.chave = f.chave
+                GROUP BY f.chave, f.competencia
+                """,
+                (analise, status, *competencias, min_meses),
+            ).fetchall()
+
+        itens: Dict[str, dict] = {}
+        for r in linhas:
+            item = itens.setdefault(r["chave"], {
+                "chave": r["chave"], "nome": r["nome"], "quantidade": 0, "valor": 0.0, "por_competencia": [],
+            })
+            item["por_competencia"].append({
+                "competencia": r["competencia"], "quantidade": r["quantidade"], "valor": r["valor"],
+            })
+            item["quantidade"] += r["quantidade"]
+            item["valor"] = round(item["valor"] + r["valor"], 2)
+        ordenados = sorted(itens.values(), key=lambda i: (-len(i["por_competencia"]), -i["quantidade"]))
+        for item in ordenados:
+            item["por_competencia"].sort(key=lambda c: c["competencia"])
+        return {"competencias": sorted(competencias), "itens": ordenados[:limite]}
+
+    def serie(self, dimensao: str, chave: str, analise: str = "valor_data") -> List[dict]:
+        """Quantidade e valor por competência e status de um fornecedor ou centro de custo."""
+        if dimensao not in _COLUNA_DIMENSAO:
+            raise ValueError(f"dimensao deve ser uma de: {', '.join(DIMENSOES)}")
+        if dimensao == "fornecedor":
+            chave = _chave_fornecedor(chave)
+        coluna = _COLUNA_DIMENSAO[dimensao]
+        with self._conexao() as con:
+            linhas = con.execute(
+                f"""
+                SELECT competencia, status, COUNT(*) AS quantidade, ROUND(COALESCE(SUM(valor), 0), 2) AS valor
+                FROM resultados
+                WHERE analise = ? AND {coluna} = ? AND competencia IS NOT NULL
+                GROUP BY competencia, status
+                ORDER BY competencia
+                """,
+                (analise, chave.strip()),
+            ).fetchall()
+        serie: Dict[str, dict] = {}
+        for r in linhas:
+            ponto = serie.setdefault(r["competencia"], {"competencia": r["competencia"], "por_status": {}})
+            ponto["por_status"][r["status"]] = {"quantidade": r["quantidade"], "valor": r["valor"]}
+        return list(serie.values())
+
+    def totais_por_data(self, inicio: Optional[str] = None, fim: Optional[str] = None) -> List[dict]:
+        """Totais diários somados entre execuções, no intervalo [inicio, fim] (AAAA-MM-DD)."""
+        with self._conexao() as con:
+            linhas = con.execute(
+                """
+                SELECT data, COUNT(DISTINCT execucao_id) AS execucoes,
+                       SUM(qtd_ref) AS qtd_ref, SUM(qtd_comp) AS qtd_comp,
+                       ROUND(SUM(total_ref), 2) AS total_ref, ROUND(SUM(total_comp), 2) AS total_comp,
+                       SUM(divergente) AS dias_divergentes
+                FROM agregados_data
+                WHERE data >= COALESCE(?, data) AND data <= COALESCE(?, data)
+                GROUP BY data
+                ORDER BY data
+                """,
+                (inicio, fim),
+            ).fetchall()
+        return [dict(r) for r in linhas]
@@ -0,0 +1,265 @@
+"""
+Leitores de arquivo por formato (XLSX, CSV e Parquet).
+Cada leitor expõe os cabeçalhos das abas sem ler os dados e lê só as colunas
+pedidas (projeção), inteiras ou em blocos. O parser escolhe o leitor pela extensão.
+"""
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+Arquivo = Union[str, os.PathLike, BinaryIO]
+
+# Linhas por bloco na leitura em blocos
+TAMANHO_BLOCO = 50_000
+
+
+class Leitor(ABC):
+    """Interface dos leitores. Formatos sem abas usam uma única aba de nome ""."""
+
+    # Número da linha do arquivo correspondente ao índice 0 dos dados
+    primeira_linha = 2
+
+    # Se abas diferentes podem ser lidas em processos separados
+    abas_em_paralelo = False
+
+    # Memória estimada por byte do arquivo quando dimensoes() não está disponível
+    fator_memoria = 40
+
+    @abstractmethod
+    def cabecalhos(self, arquivo: Arquivo) -> List[Tuple[str, list]]:
+        """[(aba, nomes das colunas)] sem ler os dados."""
+
+    def dimensoes(self, arquivo: Arquivo) -> Optional[List[Tuple[int, int]]]:
+        """[(linhas, colunas)] por aba, se obtível sem ler os dados; None caso contrário."""
+        return None
+
+    def ler(self, arquivo: Arquivo, aba: str, colunas: List[str]) -> pd.DataFrame:
+        """Lê a aba inteira, apenas com as colunas pedidas."""
+        blocos = list(self.ler_blocos(arquivo, aba, colunas))
+        if not blocos:
+            return pd.DataFrame(columns=colunas)
+        return pd.concat(blocos, ignore_index=True)
+
+    @abstractmethod
+    def ler_blocos(
+        self, arquivo: Arquivo, aba: str, colunas: List[str], tamanho_bloco: int = TAMANHO_BLOCO
+    ) -> Iterator[pd.DataFrame]:
+        """Lê a aba em blocos de até tamanho_bloco linhas, apenas com as colunas pedidas."""
+
+
+def _rebobinar(arquivo: Arquivo) -> None:
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+
+
+# Números de uma amostra de CSV: com vírgula decimal (1.178,93 / 460,00) ou com ponto
+# decimal (1,178.93 / 460.00). "1.234" sozinho é ambíguo e não conta.
+_NUMERO_VIRGULA = re.compile(r"-?(R\$\s*)?(\d{1,3}(\.\d{3})+,\d+|\d{1,3}(\.\d{3}){2,}|\d+,\d+)")
+_NUMERO_PONTO = re.compile(r"-?(R\$\s*)?(\d{1,3}(,\d{3})+\.\d+|\d{1,3}(,\d{3}){2,}|\d+\.(\d{1,2}|\d{4,}))")
+
+
+def _decimal_da_amostra(linhas: List[str], sep: str) -> str:
+    """Separador decimal mais frequente nos números da amostra (vírgula se não houver indício)."""
+    virgula = ponto = 0
+    for linha in linhas:
+        for campo in linha.split(sep):
+            campo = campo.strip().strip('"').strip()
+            if _NUMERO_VIRGULA.fullmatch(campo):
+                virgula += 1
+            elif _NUMERO_PONTO.fullmatch(campo):
+                ponto += 1
+    return "." if ponto > virgula else ","
+
+
+class LeitorXlsx(Leitor):
+    """Planilhas .xlsx via openpyxl (várias abas)."""
+
+    abas_em_paralelo = True
+
+    def cabecalhos(self, arquivo: Arquivo) -> List[Tuple[str, list]]:
+        from openpyxl import load_workbook
+
+        _rebobinar(arquivo)
+        wb = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            abas = []
+            for ws in wb.worksheets:
+                primeira = next(ws.iter_rows(max_row=1, values_only=True), ())
+                abas.append((ws.title, [c for c in primeira if c is not None]))
+            return abas
+        finally:
+            wb.close()
+
+    def dimensoes(self, arquivo: Arquivo) -> Optional[List[Tuple[int, int]]]:
+        from openpyxl import load_workbook
+
+        _rebobinar(arquivo)
+        wb = load_workbook(arquivo, read_only=True)
+        try:
+            dims = [(ws.max_row, ws.max_column) for ws in wb.worksheets]
+        finally:
+            wb.close()
+        if not dims or any(not linhas or not colunas for linhas, colunas in dims):
+            return None
+        return dims
+
+    def ler(self, arquivo: Arquivo, aba: str, colunas: List[str]) -> pd.DataFrame:
+        _rebobinar(arquivo)
+        return pd.read_excel(arquivo, sheet_name=aba, usecols=colunas, engine="openpyxl")
+
+    def ler_blocos(
+        self, arquivo: Arquivo, aba: str, colunas: List[str], tamanho_bloco: int = TAMANHO_BLOCO
+    ) -> Iterator[pd.DataFrame]:
+        from openpyxl import load_workbook
+
+        _rebobinar(arquivo)
+        wb = load_workbook(arquivo, read_only=True, data_only=True)
+        try:
+            linhas = wb[aba].iter_rows(values_only=True)
+            cabecalho = list(next(linhas, ()))
+            indices = [cabecalho.index(c) for c in colunas]
+            bloco: List[list] = []
+            for linha in linhas:
+                bloco.append([linha[i] if i < len(linha) else None for i in indices])
+                if len(bloco) >= tamanho_bloco:
+                    yield pd.DataFrame(bloco, columns=colunas)
+                    bloco = []
+            if bloco:
+                yield pd.DataFrame(bloco, columns=colunas)
+        finally:
+            wb.close()
+
+
+class LeitorCsv(Leitor):
+    """
+    CSV exportado por bancos/ERP: separador ";" ou ",". Com ";" o separador decimal vem dos
+    números da amostra: vírgula com ponto de milhar (padrão BR) ou ponto com vírgula de
+    milhar. Com "," é sempre ponto. Encoding UTF-8 (com ou sem BOM) ou Latin-1.
+    """
+
+    # Texto sem compressão: ~8x o tamanho do arquivo em objetos Python
+    fator_memoria = 8
+
+    def _dialeto(self, arquivo: Arquivo) -> dict:
+        _rebobinar(arquivo)
+        if isinstance(arquivo, (str, os.PathLike)):
+            with open(arquivo, "rb") as f:
+                amostra = f.read(64 * 1024)
+        else:
+            amostra = arquivo.read(64 * 1024)
+            _rebobinar(arquivo)
+        try:
+            texto = amostra.decode("utf-8")
+            encoding = "utf-8-sig"
+        except UnicodeDecodeError as e:
+            # Amostra pode ter cortado um caractere multibyte no fim
+            if e.start >= len(amostra) - 3:
+                texto = amostra[: e.start].decode("utf-8")
+                encoding = "utf-8-sig"
+            else:
+                texto = amostra.decode("latin-1")
+                encoding = "latin-1"
+        linhas = texto.splitlines()
+        primeira = linhas[0] if linhas else ""
+        if primeira.count(";") >= primeira.count(","):
+            # Última linha da amostra pode estar cortada
+            if _decimal_da_amostra(linhas[1:-1] or linhas[1:], ";") == ".":
+                return {"sep": ";", "decimal": ".", "thousands": ",", "encoding": encoding}
+            return {"sep": ";", "decimal": ",", "thousands": ".", "encoding": encoding}
+        return {"sep": ",", "decimal": ".", "encoding": encoding}
+
+    def cabecalhos(self, arquivo: Arquivo) -> List[Tuple[str, list]]:
+        dialeto = self._dialeto(arquivo)
+        colunas = pd.read_csv(arquivo, nrows=0, **dialeto).columns
+        return [("", [c.strip() for c in colunas])]
+
+    def ler_blocos(
+        self, arquivo: Arquivo, aba: str, colunas: List[str], tamanho_bloco: int = TAMANHO_BLOCO
+    ) -> Iterator[pd.DataFrame]:
+        dialeto = self._dialeto(arquivo)
+        # Cabeçalhos podem vir com espaços; projeta pelos nomes já sem espaço
+        desejadas = set(colunas)
+        leitor = pd.read_csv(
+            arquivo,
+            usecols=lambda c: c.strip() in desejadas,
+            chunksize=tamanho_bloco,
+            **dialeto,
+        )
+        with leitor:
+            for bloco in leitor:
+                bloco.columns = [c.strip() for c in bloco.columns]
+                yield bloco.reset_index(drop=True)
+
+
+class LeitorParquet(Leitor):
+    """
+    Parquet via pyarrow. As colunas projetadas chegam tipadas (datas como datetime64,
+    valores numéricos), sem passar por texto.
+    """
+
+    primeira_linha = 1
+
+    def _pq(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Leitura de arquivos .parquet requer o pacote pyarrow")
+        return pq
+
+    def cabecalhos(self, arquivo: Arquivo) -> List[Tuple[str, list]]:
+        _rebobinar(arquivo)
+        return [("", list(self._pq().read_schema(arquivo).names))]
+
+    def dimensoes(self, arquivo: Arquivo) -> Optional[List[Tuple[int, int]]]:
+        _rebobinar(arquivo)
+        meta = self._pq().read_metadata(arquivo)
+        return [(meta.num_rows, meta.num_columns)]
+
+    def ler(self, arquivo: Arquivo, aba: str, colunas: List[str]) -> pd.DataFrame:
+        _rebobinar(arquivo)
+        return self._pq().read_table(arquivo, columns=colunas).to_pandas()
+
+    def ler_blocos(
+        self, arquivo: Arquivo, aba: str, colunas: List[str], tamanho_bloco: int = TAMANHO_BLOCO
+    ) -> Iterator[pd.DataFrame]:
+        _rebobinar(arquivo)
+        parquet = self._pq().ParquetFile(arquivo)
+        for lote in parquet.iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            yield lote.to_pandas()
+
+
+LEITORES: Dict[str, Leitor] = {
+    ".xlsx": LeitorXlsx(),
+    ".csv": LeitorCsv(),
+    ".parquet": LeitorParquet(),
+}
+
+
+def registrar_leitor(extensao: str, leitor: Leitor) -> None:
+    """Registra (ou substitui) o leitor de uma extensão, ex: registrar_leitor(".xls", ...)."""
+    LEITORES[extensao.lower()] = leitor
+
+
+def extensoes_suportadas() -> List[str]:
+    return sorted(LEITORES)
+
+
+def leitor_para(arquivo: Arquivo, formato: Optional[str] = None) -> Leitor:
+    """
+    Escolhe o leitor pelo formato informado (ex: ".csv") ou pela extensão do caminho.
+    Arquivos em memória sem formato são tratados como .xlsx.
+    """
+    if formato is None:
+        if isinstance(arquivo, (str, os.PathLike)):
+            formato = os.path.splitext(os.fspath(arquivo))[1]
+        else:
+            formato = ".xlsx"
+    formato = formato.lower() if formato.startswith(".") else f".{formato.lower()}"
+    if formato not in LEITORES:
+        raise ValueError(
+            f"Formato {formato} não suportado. Use: {', '.join(extensoes_suportadas())}"
+        )
+    return LEITORES[formato]
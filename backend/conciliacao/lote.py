@@ -0,0 +1,390 @@
+"""
+Conciliação em lote, sem servidor HTTP.
+Recebe um manifesto (CSV/JSON) ou um diretório com pares referência/comparação,
+concilia os pares num pool de processos e grava, por par, o resumo (JSON) e as
+tabelas de resultado em Parquet. O progresso fica em <saida>/estado.jsonl: ao
+rodar de novo com a mesma saída, pares já concluídos são pulados.
+
+Uso (a partir de backend/):
+    python -m conciliacao.lote --diretorio entradas/ --saida saida/ --workers 4
+    python -m conciliacao.lote --manifesto pares.csv --saida saida/
+    python -m conciliacao.lote --diretorio anuais/ --saida saida/ --particionado
+
+Manifesto CSV: colunas nome,referencia,comparacao (caminhos relativos ao manifesto).
+Manifesto JSON: lista de objetos com as mesmas chaves.
+Diretório: arquivos <nome>_ref.<ext> / <nome>_comp.<ext> (ou _referencia / _comparacao).
+Com --particionado, cada par é conciliado data a data a partir de partições em disco
+(conciliacao.particionado), para arquivos que não cabem na memória.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+_PADRAO_ARQUIVO = re.compile(
+    r"^(?P<nome>.+)_(?P<lado>ref|referencia|comp|comparacao)\.(?P<ext>xlsx|csv|parquet)$",
+    re.IGNORECASE,
+)
+
+ESTADO = "estado.jsonl"
+RESUMO_LOTE = "resumo_lote.csv"
+
+
+@dataclass
+class ParConciliacao:
+    """Um par de arquivos a conciliar."""
+    nome: str
+    referencia: str
+    comparacao: str
+
+
+def descobrir_pares(diretorio: str) -> List[ParConciliacao]:
+    """
+    Agrupa <nome>_ref.<ext> com <nome>_comp.<ext> dentro do diretório. Dois arquivos para
+    o mesmo lado de um par (ex: extensões diferentes) são erro: um não pode ser ignorado.
+    """
+    lados: Dict[str, Dict[str, str]] = {}
+    repetidos: List[str] = []
+    for arquivo in sorted(os.listdir(diretorio)):
+        m = _PADRAO_ARQUIVO.match(arquivo)
+        if not m:
+            continue
+        lado = "referencia" if m.group("lado").lower().startswith("ref") else "comparacao"
+        arquivos = lados.setdefault(m.group("nome"), {})
+        if lado in arquivos:
+            repetidos.append(f"{os.path.basename(arquivos[lado])} e {arquivo}")
+        arquivos[lado] = os.path.join(diretorio, arquivo)
+    if repetidos:
+        raise ValueError(f"Mais de um arquivo para o mesmo lado do par: {'; '.join(repetidos)}")
+
+    pares = []
+    for nome, arquivos in sorted(lados.items()):
+        if "referencia" not in arquivos or "comparacao" not in arquivos:
+            print(f"aviso: par {nome} incompleto, ignorado", file=sys.stderr)
+            continue
+        pares.append(ParConciliacao(nome, arquivos["referencia"], arquivos["comparacao"]))
+    return pares
+
+
+def ler_manifesto(caminho: str) -> List[ParConciliacao]:
+    """Lê pares de um manifesto .csv ou .json."""
+    base = os.path.dirname(os.path.abspath(caminho))
+    if caminho.lower().endswith(".json"):
+        with open(caminho, encoding="utf-8") as f:
+            linhas = json.load(f)
+    else:
+        with open(caminho, encoding="utf-8-sig", newline="") as f:
+            linhas = list(csv.DictReader(f))
+
+    pares = []
+    for i, linha in enumerate(linhas, start=1):
+        nome = (linha.get("nome") or "").strip() or f"par_{i:05d}"
+        pares.append(ParConciliacao(
+            nome=nome,
+            referencia=os.path.join(base, linha["referencia"].strip()),
+            comparacao=os.path.join(base, linha["comparacao"].strip()),
+        ))
+    nomes = [p.nome for p in pares]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError("Manifesto com nomes de par repetidos")
+    return pares
+
+
+def _nome_seguro(nome: str) -> str:
+    return re.sub(r"[^\w.\-]", "_", nome)
+
+
+def _checar_nomes(pares: List[ParConciliacao]) -> None:
+    """Pares cujos nomes viram o mesmo diretório de saída sobrescreveriam um ao outro."""
+    vistos: Dict[str, str] = {}
+    for par in pares:
+        seguro = _nome_seguro(par.nome)
+        if seguro in vistos:
+            raise ValueError(f"Pares {vistos[seguro]!r} e {par.nome!r} gravariam na mesma saída (pares/{seguro})")
+        vistos[seguro] = par.nome
+
+
+def _tabela_resultados(resultados: List[dict]):
+    """Achata os resultados (referência/comparação aninhadas) numa tabela colunar."""
+    import pandas as pd
+
+    linhas = []
+    for r in resultados:
+        ref = r.get("referencia") or {}
+        comp = r.get("comparacao") or {}
+        linhas.append({
+            "status": r["status"],
+            "data": ref.get("data", ""),
+            "fornecedor_ref": ref.get("fornecedor", ""),
+            "valor_ref": ref.get("valor"),
+            "centro_custo_ref": ref.get("centro_custo", ""),
+            "departamento_ref": ref.get("departamento", ""),
+            "aba_ref": ref.get("aba", ""),
+            "linha_ref": ref.get("linha"),
+            "fornecedor_comp": comp.get("fornecedor"),
+            "valor_comp": comp.get("valor"),
+            "centro_custo_comp": comp.get("centro_custo"),
+            "departamento_comp": comp.get("departamento"),
+            "aba_comp": comp.get("aba"),
+            "linha_comp": comp.get("linha"),
+            "score_nome": r.get("score_nome"),
+            "diferenca_valor": r.get("diferenca_valor"),
+            "alerta": r.get("alerta", ""),
+        })
+    return pd.DataFrame(linhas, columns=[
+        "status", "data", "fornecedor_ref", "valor_ref", "centro_custo_ref", "departamento_ref",
+        "aba_ref", "linha_ref", "fornecedor_comp", "valor_comp", "centro_custo_comp",
+        "departamento_comp", "aba_comp", "linha_comp", "score_nome", "diferenca_valor", "alerta",
+    ])
+
+
+def gravar_resultado(resposta: Dict[str, Any], destino: str) -> None:
+    """Grava resumo.json, alertas/por_data, os cubos e as tabelas de resultado (Parquet) em destino."""
+    import pandas as pd
+
+    os.makedirs(destino, exist_ok=True)
+    analise_cc = resposta["analise_centro_custo"]
+    with open(os.path.join(destino, "resumo.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "valor_data": resposta["resumo"],
+                "centro_custo": analise_cc["resumo"],
+                "tempos_etapas": resposta.get("tempos_etapas", {}),
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    _tabela_resultados(resposta["resultados"]).to_parquet(os.path.join(destino, "resultados.parquet"), index=False)
+    _tabela_resultados(analise_cc["resultados"]).to_parquet(
+        os.path.join(destino, "resultados_centro_custo.parquet"), index=False
+    )
+    por_data = [{k: v for k, v in g.items() if k != "resultados"} for g in resposta["por_data"]]
+    pd.DataFrame(por_data, columns=["data", "qtd_ref", "qtd_comp", "total_ref", "total_comp", "divergente"]).to_parquet(
+        os.path.join(destino, "por_data.parquet"), index=False
+    )
+    pd.DataFrame(resposta["alertas_diarios"], columns=["data", "mensagem"]).to_parquet(
+        os.path.join(destino, "alertas.parquet"), index=False
+    )
+    pd.DataFrame(resposta["cubo"]).to_parquet(os.path.join(destino, "cubo.parquet"), index=False)
+    pd.DataFrame(analise_cc["cubo"]).to_parquet(os.path.join(destino, "cubo_centro_custo.parquet"), index=False)
+
+
+def _id_execucao(destino: str) -> str:
+    """Id da execução no histórico: o mesmo sempre que o par é gravado no mesmo destino."""
+    return uuid.uuid5(uuid.NAMESPACE_URL, os.path.abspath(destino)).hex
+
+
+def _inicializar_worker() -> None:
+    # O paralelismo fica entre pares; cada worker lê as abas sequencialmente
+    from conciliacao import parsers
+
+    parsers.PARSER_WORKERS = 1
+
+
+def processar_par(
+    par: ParConciliacao,
+    saida: str,
+    ano_ref: int,
+    tolerancia_valor: float,
+    historico: Optional[str] = None,
+    particionado: bool = False,
+) -> Dict[str, Any]:
+    """
+    Concilia um par e grava em <saida>/pares/<nome>/. A gravação vai para um
+    diretório temporário renomeado no fim, então um par nunca fica pela metade.
+    Com historico (caminho do SQLite), a execução também é registrada lá (antes do rename,
+    com id derivado do destino: refazer o par substitui o registro) e os aliases de
+    fornecedor de lá são usados no score de nome.
+    Com particionado, a conciliação é feita data a data a partir do disco (sem histórico).
+    """
+    inicio = time.perf_counter()
+    destino = os.path.join(saida, "pares", _nome_seguro(par.nome))
+    tmp = destino + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        if particionado:
+            from conciliacao.particionado import conciliar_particionado
+
+            resumo = conciliar_particionado(
+                par.referencia, par.comparacao, tmp, ano_ref=ano_ref,
+                tolerancia_valor=tolerancia_valor, diretorio_temporario=saida,
+            )
+            resumos = (resumo["valor_data"], resumo["centro_custo"])
+        else:
+            from conciliacao.pipeline import conciliar_arquivos
+
+            banco = None
+            if historico:
+                from conciliacao.historico import HistoricoConciliacoes
+
+                banco = HistoricoConciliacoes(historico)
+            resposta = conciliar_arquivos(
+                par.referencia, par.comparacao, ano_ref=ano_ref, tolerancia_valor=tolerancia_valor,
+                aliases=banco.carregar_aliases() if banco else None,
+            )
+            resumos = (resposta["resumo"], resposta["analise_centro_custo"]["resumo"])
+            gravar_resultado(resposta, tmp)
+            if banco:
+                banco.registrar(
+                    _id_execucao(destino), resposta, ano_ref, "lote",
+                    os.path.basename(par.referencia), os.path.basename(par.comparacao),
+                    substituir=True,
+                )
+        shutil.rmtree(destino, ignore_errors=True)
+        os.rename(tmp, destino)
+    except Exception as e:
+        shutil.rmtree(tmp, ignore_errors=True)
+        return {
+            "nome": par.nome,
+            "status": "erro",
+            "erro": f"{type(e).__name__}: {e}",
+            "detalhe": traceback.format_exc(limit=5),
+            "segundos": round(time.perf_counter() - inicio, 3),
+        }
+
+    return {
+        "nome": par.nome,
+        "status": "ok",
+        "segundos": round(time.perf_counter() - inicio, 3),
+        **{f"vd_{k}": v for k, v in resumos[0].items()},
+        **{f"cc_{k}": v for k, v in resumos[1].items()},
+    }
+
+
+def ler_estado(saida: str) -> Dict[str, dict]:
+    """Último registro de cada par no estado.jsonl (linhas corrompidas por queda são ignoradas)."""
+    caminho = os.path.join(saida, ESTADO)
+    estado: Dict[str, dict] = {}
+    if not os.path.exists(caminho):
+        return estado
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+            estado[registro["nome"]] = registro
+    return estado
+
+
+def _registrar(saida: str, registro: dict) -> None:
+    with open(os.path.join(saida, ESTADO), "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _gravar_resumo_lote(saida: str, estado: Dict[str, dict]) -> str:
+    caminho = os.path.join(saida, RESUMO_LOTE)
+    colunas: List[str] = []
+    for registro in estado.values():
+        colunas.extend(c for c in registro if c not in colunas)
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.DictWriter(f, fieldnames=colunas)
+        escritor.writeheader()
+        for nome in sorted(estado):
+            escritor.writerow(estado[nome])
+    return caminho
+
+
+def executar_lote(
+    pares: List[ParConciliacao],
+    saida: str,
+    workers: int = 1,
+    ano_ref: Optional[int] = None,
+    tolerancia_valor: float = 0.01,
+    repetir_erros: bool = True,
+    historico: Optional[str] = None,
+    particionado: bool = False,
+) -> Dict[str, dict]:
+    """
+    Concilia os pares pendentes e retorna o estado final por par. O traceback de um par com
+    erro vai só para o stderr; estado.jsonl e resumo_lote.csv guardam a mensagem (erro).
+    """
+    from conciliacao.pipeline import ANO_REF_PADRAO
+
+    _checar_nomes(pares)
+    os.makedirs(os.path.join(saida, "pares"), exist_ok=True)
+    estado = ler_estado(saida)
+    pendentes = [
+        p for p in pares
+        if p.nome not in estado
+        or (repetir_erros and estado[p.nome]["status"] == "erro")
+    ]
+    print(f"{len(pares)} pares, {len(pares) - len(pendentes)} já concluídos, {len(pendentes)} a processar")
+
+    ano = ano_ref or ANO_REF_PADRAO
+    with ProcessPoolExecutor(max_workers=max(1, workers), initializer=_inicializar_worker) as pool:
+        futuros = {pool.submit(processar_par, p, saida, ano, tolerancia_valor, historico, particionado): p for p in pendentes}
+        for n, futuro in enumerate(as_completed(futuros), start=1):
+            par = futuros[futuro]
+            try:
+                registro = futuro.result()
+            except Exception as e:  # worker morreu (ex: OOM)
+                registro = {"nome": par.nome, "status": "erro", "erro": f"{type(e).__name__}: {e}"}
+            detalhe = registro.pop("detalhe", None)
+            if detalhe:
+                print(f"{par.nome}:\n{detalhe}", file=sys.stderr)
+            _registrar(saida, registro)
+            estado[par.nome] = registro
+            print(f"[{n}/{len(pendentes)}] {par.nome}: {registro['status']}"
+                  + (f" ({registro['erro']})" if registro["status"] == "erro" else f" em {registro['segundos']}s"))
+
+    _gravar_resumo_lote(saida, {p.nome: estado[p.nome] for p in pares if p.nome in estado})
+    return estado
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m conciliacao.lote",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    origem = parser.add_mutually_exclusive_group(required=True)
+    origem.add_argument("--manifesto", help="CSV ou JSON com nome,referencia,comparacao")
+    origem.add_argument("--diretorio", help="diretório com <nome>_ref.<ext> e <nome>_comp.<ext>")
+    parser.add_argument("--saida", required=True, help="diretório de saída (também guarda o progresso)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos em paralelo")
+    parser.add_argument("--ano", type=int, default=None, help="ano para datas DD/MM")
+    parser.add_argument("--tolerancia", type=float, default=0.01, help="tolerância de valor (R$)")
+    parser.add_argument("--historico", help="banco SQLite do histórico (ex: dados/historico.sqlite3)")
+    parser.add_argument("--nao-repetir-erros", action="store_true", help="não reprocessa pares que falharam")
+    parser.add_argument(
+        "--particionado", action="store_true",
+        help="concilia data a data a partir de partições em disco (arquivos maiores que a memória)",
+    )
+    args = parser.parse_args(argv)
+    if args.particionado and args.historico:
+        parser.error("--particionado não grava no histórico; rode sem --historico")
+
+    try:
+        pares = ler_manifesto(args.manifesto) if args.manifesto else descobrir_pares(args.diretorio)
+        _checar_nomes(pares)
+    except ValueError as e:
+        parser.error(str(e))
+    if not pares:
+        print("Nenhum par encontrado", file=sys.stderr)
+        return 1
+
+    estado = executar_lote(
+        pares, args.saida, args.workers, args.ano, args.tolerancia, not args.nao_repetir_erros, args.historico,
+        args.particionado,
+    )
+    erros = [nome for nome in (p.nome for p in pares) if estado.get(nome, {}).get("status") != "ok"]
+    print(f"Concluído: {len(pares) - len(erros)} ok, {len(erros)} com erro. Resumo em {os.path.join(args.saida, RESUMO_LOTE)}")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,9 @@ Matching de registros por valor e data.
 Compara unicamente valor pago e data do pagamento — ignora o nome do fornecedor.
 """
 from dataclasses import dataclass
-from typing import Any, List, Optional, Tuple
+from typing import (
+    Any, Dict, Iterable, Iterator, List, Mapping, Optional, Protocol, Sequence, Set, Tuple, Union, runtime_checkable,
+)
 
 import pandas as pd
 from rapidfuzz import fuzz
@@ -19,6 +21,9 @@ class Registro:
     departamento: str
     idx_orig: int = 0
     fornecedor_norm: str = ""
+    aba_origem: str = ""
+    linha_origem: int = 0
+    data_iso: str = ""  # AAAA-MM-DD quando a planilha traz o ano
 
 
 @dataclass
@@ -32,45 +37,153 @@ class ResultadoMatch:
     alerta: str
     idx_ref: int = 0
     idx_comp: Optional[int] = None
+    alias_fornecedor: bool = False  # score_nome veio do dicionário de aliases
+
+
+# Dicionário de aliases: nome normalizado na referência -> (nome na comparação, score real do par)
+Aliases = Mapping[str, Tuple[str, float]]
 
 
 def _registro_to_dict(r: Registro) -> dict[str, Any]:
-    return {
+    d = {
         "fornecedor": r.fornecedor,
         "valor": round(r.valor, 2),
         "data": r.data,
         "centro_custo": r.centro_custo,
         "departamento": r.departamento,
     }
+    if r.data_iso:
+        d["data_iso"] = r.data_iso
+    if r.aba_origem:
+        d["aba"] = r.aba_origem
+        d["linha"] = r.linha_origem
+    return d
+
+
+@runtime_checkable
+class LinhasReferencia(Protocol):
+    """
+    Registros da referência como os matchings e o cheque de informação faltante os leem:
+    uma passada em ordem pelos campos comparados e o dict de exibição só ao montar o
+    resultado. Uma referência publicada (referencias.ReferenciaColunar) implementa direto
+    sobre os buffers mapeados, sem criar um Registro por linha.
+    """
+
+    def __len__(self) -> int: ...
+
+    def campos_matching(self) -> Iterator[Tuple[float, str, str, str]]:
+        """(valor, data DD/MM, centro de custo, fornecedor normalizado) de cada registro, em ordem."""
+        ...
+
+    def sem_centro_custo(self) -> Iterable[int]:
+        """Índices, em ordem, dos registros com centro de custo vazio."""
+        ...
+
+    def para_dict(self, idx: int) -> dict[str, Any]:
+        """O registro idx no formato de _registro_to_dict."""
+        ...
+
+
+class RegistrosEmLista:
+    """LinhasReferencia sobre Registros já convertidos (_df_to_registros)."""
+
+    def __init__(self, registros: Sequence[Registro]):
+        self.registros = registros
+
+    def __len__(self) -> int:
+        return len(self.registros)
+
+    def campos_matching(self) -> Iterator[Tuple[float, str, str, str]]:
+        return ((r.valor, r.data, r.centro_custo, r.fornecedor_norm) for r in self.registros)
+
+    def sem_centro_custo(self) -> List[int]:
+        return [i for i, r in enumerate(self.registros) if not r.centro_custo.strip()]
+
+    def para_dict(self, idx: int) -> dict[str, Any]:
+        return _registro_to_dict(self.registros[idx])
+
+
+def linhas_referencia(registros: Union[Sequence[Registro], LinhasReferencia]) -> LinhasReferencia:
+    """Os registros da referência como LinhasReferencia (listas de Registro são embrulhadas)."""
+    return registros if isinstance(registros, LinhasReferencia) else RegistrosEmLista(registros)
 
 
 def _df_to_registros(df: pd.DataFrame) -> List[Registro]:
-    """Converte DataFrame normalizado em lista de Registro."""
-    registros = []
-    for i, row in df.iterrows():
-        registros.append(Registro(
-            fornecedor=str(row.get("fornecedor", "")),
-            valor=float(row.get("valor", 0)),
-            data=str(row.get("data_exib", "")),
-            centro_custo=str(row.get("centro_custo", "")),
-            departamento=str(row.get("departamento", "")),
-            idx_orig=int(i),
-            fornecedor_norm=str(row.get("fornecedor_norm", "")),
-        ))
-    return registros
+    """
+    Converte DataFrame normalizado em lista de Registro.
+    Lê coluna a coluna (sem iterrows); sem fornecedor_norm, usa o nome em minúsculas.
+    """
+    n = len(df)
+
+    def coluna(nome: str, padrao: Any) -> list:
+        return df[nome].tolist() if nome in df.columns else [padrao] * n
+
+    fornecedores = coluna("fornecedor", "")
+    if "fornecedor_norm" in df.columns:
+        fornecedores_norm = [str(x) for x in df["fornecedor_norm"].tolist()]
+    else:
+        fornecedores_norm = [str(x).strip().lower() for x in fornecedores]
+
+    return [
+        Registro(
+            fornecedor=str(fornecedor),
+            valor=float(valor),
+            data=str(data),
+            centro_custo=str(centro_custo),
+            departamento=str(departamento),
+            idx_orig=int(idx),
+            fornecedor_norm=fornecedor_norm,
+            aba_origem=str(aba or ""),
+            linha_origem=int(linha or 0),
+            data_iso=str(data_iso or ""),
+        )
+        for idx, fornecedor, valor, data, centro_custo, departamento, fornecedor_norm, aba, linha, data_iso in zip(
+            df.index,
+            fornecedores,
+            coluna("valor", 0),
+            coluna("data_exib", ""),
+            coluna("centro_custo", ""),
+            coluna("departamento", ""),
+            fornecedores_norm,
+            coluna("aba_origem", ""),
+            coluna("linha_origem", 0),
+            coluna("data_iso", ""),
+        )
+    ]
+
+
+def indexar_por_data(registros: List[Registro]) -> Dict[str, List[int]]:
+    """Índices dos registros agrupados por data (DD/MM), na ordem original."""
+    por_data: Dict[str, List[int]] = {}
+    for idx, r in enumerate(registros):
+        por_data.setdefault(r.data or "", []).append(idx)
+    return por_data
+
+
+def _score_nome(ref_norm: str, comp_norm: str, aliases: Optional[Aliases] = None) -> Tuple[float, bool]:
+    """
+    (similaridade de 0 a 1 dos nomes normalizados, se veio de um alias). Um par conhecido no
+    dicionário de aliases devolve o score guardado com ele, sem calcular fuzz.ratio de novo.
+    """
+    conhecido = aliases.get(ref_norm) if aliases else None
+    if conhecido is not None and conhecido[0] == comp_norm:
+        return conhecido[1], True
+    return fuzz.ratio(ref_norm, comp_norm) / 100.0, False
 
 
 def _encontrar_match_valor_data(
-    ref: Registro,
-    candidatos: List[Tuple[int, "Registro"]],
+    valor: float,
+    regs_comp: List[Registro],
+    candidatos: List[int],
+    comp_usados: Set[int],
     tolerancia: float = 0.01,
 ) -> Optional[int]:
     """
     Match apenas por valor e data. Ignora o nome do fornecedor.
-    Retorna o índice do primeiro candidato com mesmo valor (dentro da tolerância) no mesmo dia.
+    Retorna o índice do primeiro candidato livre com mesmo valor (dentro da tolerância) no mesmo dia.
     """
-    for idx_comp, cand in candidatos:
-        if abs(ref.valor - cand.valor) <= tolerancia:
+    for idx_comp in candidatos:
+        if idx_comp not in comp_usados and abs(valor - regs_comp[idx_comp].valor) <= tolerancia:
             return idx_comp
     return None
 
@@ -79,44 +192,35 @@ def executar_matching(
     df_ref: pd.DataFrame,
     df_comp: pd.DataFrame,
     tolerancia_valor: float = 0.01,
+    registros: Optional[Tuple[Union[Sequence[Registro], LinhasReferencia], List[Registro]]] = None,
+    comp_por_data: Optional[Dict[str, List[int]]] = None,
+    aliases: Optional[Aliases] = None,
 ) -> List[ResultadoMatch]:
     """
     Para cada registro da Referência, busca match na Comparação por valor e data apenas.
     Nome do fornecedor é ignorado.
+    registros (ref, comp) e comp_por_data (indexar_por_data dos registros de comp) podem vir
+    prontos do pipeline; são só lidos, então podem ser compartilhados entre análises.
+    Os de referência podem ser uma LinhasReferencia (ex: referência publicada).
+    aliases: fornecedores já conhecidos (ver _score_nome).
     """
-    if "fornecedor_norm" not in df_ref.columns:
-        df_ref = df_ref.copy()
-        df_ref["fornecedor_norm"] = df_ref.get("fornecedor", "").apply(
-            lambda x: str(x).strip().lower()
-        )
-    if "fornecedor_norm" not in df_comp.columns:
-        df_comp = df_comp.copy()
-        df_comp["fornecedor_norm"] = df_comp.get("fornecedor", "").apply(
-            lambda x: str(x).strip().lower()
-        )
-
-    regs_ref = _df_to_registros(df_ref)
-    regs_comp = _df_to_registros(df_comp)
-
-    por_data: dict = {}
-    for idx, r in enumerate(regs_comp):
-        d = r.data or ""
-        if d not in por_data:
-            por_data[d] = []
-        por_data[d].append((idx, r))
+    regs_ref, regs_comp = registros or (_df_to_registros(df_ref), _df_to_registros(df_comp))
+    ref = linhas_referencia(regs_ref)
+    if comp_por_data is None:
+        comp_por_data = indexar_por_data(regs_comp)
 
     resultados: List[ResultadoMatch] = []
-    comp_usados = set()
+    comp_usados: Set[int] = set()
 
-    for idx_ref, ref in enumerate(regs_ref):
-        candidatos = [(i, r) for i, r in por_data.get(ref.data or "", []) if i not in comp_usados]
-
-        idx_comp = _encontrar_match_valor_data(ref, candidatos, tolerancia_valor)
+    for idx_ref, (valor, data, _, fornecedor_norm) in enumerate(ref.campos_matching()):
+        idx_comp = _encontrar_match_valor_data(
+            valor, regs_comp, comp_por_data.get(data or "", []), comp_usados, tolerancia_valor
+        )
 
         if idx_comp is None:
             resultados.append(ResultadoMatch(
                 status="nao_encontrado",
-                referencia=_registro_to_dict(ref),
+                referencia=ref.para_dict(idx_ref),
                 comparacao=None,
                 score_nome=None,
                 diferenca_valor=None,
@@ -129,7 +233,7 @@ def executar_matching(
         comp = regs_comp[idx_comp]
         comp_usados.add(idx_comp)
 
-        diff = abs(ref.valor - comp.valor)
+        diff = abs(valor - comp.valor)
         if diff <= tolerancia_valor:
             status = "ok"
             alerta = ""
@@ -138,17 +242,18 @@ def executar_matching(
             alerta = f"Valor divergente em R$ {diff:.2f}".replace(".", ",")
 
         # Score do nome apenas para exibição (não afeta o match)
-        score_nome = fuzz.ratio(ref.fornecedor_norm, comp.fornecedor_norm) / 100.0
+        score_nome, por_alias = _score_nome(fornecedor_norm, comp.fornecedor_norm, aliases)
 
         resultados.append(ResultadoMatch(
             status=status,
-            referencia=_registro_to_dict(ref),
+            referencia=ref.para_dict(idx_ref),
             comparacao=_registro_to_dict(comp),
             score_nome=round(score_nome, 2),
             diferenca_valor=round(diff, 2) if diff > tolerancia_valor else None,
             alerta=alerta,
             idx_ref=idx_ref,
             idx_comp=idx_comp,
+            alias_fornecedor=por_alias,
         ))
 
     return resultados
@@ -4,10 +4,20 @@ Compara data + valor pago + centro de custo entre planilhas.
 """
 import unicodedata
 from dataclasses import dataclass
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
 
 import pandas as pd
-from rapidfuzz import fuzz
+
+from conciliacao.matching import (
+    Aliases,
+    LinhasReferencia,
+    Registro,
+    _df_to_registros,
+    _registro_to_dict,
+    _score_nome,
+    indexar_por_data,
+    linhas_referencia,
+)
 
 
 def _remover_acentos(s: str) -> str:
@@ -36,19 +46,6 @@ def _centro_custo_match(a_norm: str, b_norm: str, min_len: int = 3) -> bool:
     return len(shorter) >= min_len and shorter in longer
 
 
-@dataclass
-class Registro:
-    """Registro normalizado para exibição e comparação."""
-    fornecedor: str
-    valor: float
-    data: str
-    centro_custo: str
-    departamento: str
-    idx_orig: int = 0
-    fornecedor_norm: str = ""
-    centro_custo_norm: str = ""
-
-
 @dataclass
 class ResultadoMatchCentroCusto:
     """Resultado do matching entre referência e comparação (data + valor + centro de custo)."""
@@ -60,48 +57,27 @@ class ResultadoMatchCentroCusto:
     alerta: str
     idx_ref: int = 0
     idx_comp: Optional[int] = None
-
-
-def _registro_to_dict(r: Registro) -> dict[str, Any]:
-    return {
-        "fornecedor": r.fornecedor,
-        "valor": round(r.valor, 2),
-        "data": r.data,
-        "centro_custo": r.centro_custo,
-        "departamento": r.departamento,
-    }
-
-
-def _df_to_registros(df: pd.DataFrame) -> List[Registro]:
-    """Converte DataFrame normalizado em lista de Registro com centro_custo_norm."""
-    registros = []
-    for i, row in df.iterrows():
-        cc = str(row.get("centro_custo", "") or "")
-        registros.append(Registro(
-            fornecedor=str(row.get("fornecedor", "")),
-            valor=float(row.get("valor", 0)),
-            data=str(row.get("data_exib", "")),
-            centro_custo=cc,
-            departamento=str(row.get("departamento", "")),
-            idx_orig=int(i),
-            fornecedor_norm=str(row.get("fornecedor_norm", "")),
-            centro_custo_norm=_normalizar_centro_custo(cc),
-        ))
-    return registros
+    alias_fornecedor: bool = False
 
 
 def _encontrar_match_valor_data_centro(
-    ref: Registro,
-    candidatos: List[Tuple[int, Registro]],
+    valor: float,
+    ref_cc_norm: str,
+    regs_comp: List[Registro],
+    comp_cc_norm: List[str],
+    candidatos: List[int],
+    comp_usados: Set[int],
     tolerancia: float = 0.01,
 ) -> Optional[int]:
     """
     Match por valor, data e centro de custo (flexível).
     Centro de custo: um contém o outro (ex: "SEGBRASIL RECIFE" ↔ "RECIFE").
     """
-    for idx_comp, cand in candidatos:
-        if abs(ref.valor - cand.valor) <= tolerancia and _centro_custo_match(
-            ref.centro_custo_norm, cand.centro_custo_norm
+    for idx_comp in candidatos:
+        if (
+            idx_comp not in comp_usados
+            and abs(valor - regs_comp[idx_comp].valor) <= tolerancia
+            and _centro_custo_match(ref_cc_norm, comp_cc_norm[idx_comp])
         ):
             return idx_comp
     return None
@@ -111,44 +87,43 @@ def executar_matching_centro_custo(
     df_ref: pd.DataFrame,
     df_comp: pd.DataFrame,
     tolerancia_valor: float = 0.01,
+    registros: Optional[Tuple[Union[Sequence[Registro], LinhasReferencia], List[Registro]]] = None,
+    comp_por_data: Optional[Dict[str, List[int]]] = None,
+    aliases: Optional[Aliases] = None,
 ) -> List[ResultadoMatchCentroCusto]:
     """
     Para cada registro da Referência, busca match na Comparação por valor + data + centro de custo.
     Centro de custo é comparado de forma normalizada (case-insensitive, trim).
+    registros, comp_por_data e aliases seguem executar_matching e não são alterados.
     """
-    if "fornecedor_norm" not in df_ref.columns:
-        df_ref = df_ref.copy()
-        df_ref["fornecedor_norm"] = df_ref.get("fornecedor", "").apply(
-            lambda x: str(x).strip().lower()
-        )
-    if "fornecedor_norm" not in df_comp.columns:
-        df_comp = df_comp.copy()
-        df_comp["fornecedor_norm"] = df_comp.get("fornecedor", "").apply(
-            lambda x: str(x).strip().lower()
-        )
-
-    regs_ref = _df_to_registros(df_ref)
-    regs_comp = _df_to_registros(df_comp)
-
-    por_data: dict = {}
-    for idx, r in enumerate(regs_comp):
-        d = r.data or ""
-        if d not in por_data:
-            por_data[d] = []
-        por_data[d].append((idx, r))
+    regs_ref, regs_comp = registros or (_df_to_registros(df_ref), _df_to_registros(df_comp))
+    ref = linhas_referencia(regs_ref)
+    if comp_por_data is None:
+        comp_por_data = indexar_por_data(regs_comp)
+    comp_cc_norm = [_normalizar_centro_custo(r.centro_custo) for r in regs_comp]
+    # Centros de custo se repetem: cada texto distinto da referência é normalizado uma vez
+    ref_cc_norm: Dict[str, str] = {}
 
     resultados: List[ResultadoMatchCentroCusto] = []
-    comp_usados = set()
-
-    for idx_ref, ref in enumerate(regs_ref):
-        candidatos = [(i, r) for i, r in por_data.get(ref.data or "", []) if i not in comp_usados]
-
-        idx_comp = _encontrar_match_valor_data_centro(ref, candidatos, tolerancia_valor)
+    comp_usados: Set[int] = set()
+
+    for idx_ref, (valor, data, centro_custo, fornecedor_norm) in enumerate(ref.campos_matching()):
+        if centro_custo not in ref_cc_norm:
+            ref_cc_norm[centro_custo] = _normalizar_centro_custo(centro_custo)
+        idx_comp = _encontrar_match_valor_data_centro(
+            valor,
+            ref_cc_norm[centro_custo],
+            regs_comp,
+            comp_cc_norm,
+            comp_por_data.get(data or "", []),
+            comp_usados,
+            tolerancia_valor,
+        )
 
         if idx_comp is None:
             resultados.append(ResultadoMatchCentroCusto(
                 status="nao_encontrado",
-                referencia=_registro_to_dict(ref),
+                referencia=ref.para_dict(idx_ref),
                 comparacao=None,
                 score_nome=None,
                 diferenca_valor=None,
@@ -161,7 +136,7 @@ def executar_matching_centro_custo(
         comp = regs_comp[idx_comp]
         comp_usados.add(idx_comp)
 
-        diff = abs(ref.valor - comp.valor)
+        diff = abs(valor - comp.valor)
         if diff <= tolerancia_valor:
             status = "ok"
             alerta = ""
@@ -169,17 +144,18 @@ def executar_matching_centro_custo(
             status = "divergente"
             alerta = f"Valor divergente em R$ {diff:.2f}".replace(".", ",")
 
-        score_nome = fuzz.ratio(ref.fornecedor_norm, comp.fornecedor_norm) / 100.0
+        score_nome, por_alias = _score_nome(fornecedor_norm, comp.fornecedor_norm, aliases)
 
         resultados.append(ResultadoMatchCentroCusto(
             status=status,
-            referencia=_registro_to_dict(ref),
+            referencia=ref.para_dict(idx_ref),
             comparacao=_registro_to_dict(comp),
             score_nome=round(score_nome, 2),
             diferenca_valor=round(diff, 2) if diff > tolerancia_valor else None,
             alerta=alerta,
             idx_ref=idx_ref,
             idx_comp=idx_comp,
+            alias_fornecedor=por_alias,
         ))
 
     return resultados
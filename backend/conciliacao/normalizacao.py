@@ -111,17 +111,33 @@ def normalizar_nome(nome: str, remover_sufixos: bool = True) -> str:
 def aplicar_normalizacao(df: pd.DataFrame, ano_ref: Optional[int] = None) -> pd.DataFrame:
     """
     Aplica normalização em um DataFrame já parseado (com fornecedor, data_raw, valor_raw, centro_custo, departamento).
-    Adiciona colunas: data (date), data_exib, valor (float), fornecedor_norm.
+    Adiciona colunas: data (date), data_exib, valor (float), fornecedor_norm e data_iso
+    ('AAAA-MM-DD' só quando a origem traz o ano; DD/MM sem ano fica '').
     """
     out = df.copy()
 
-    out["valor"] = out.get("valor_raw", pd.Series([0.0] * len(out))).apply(normalizar_valor)
-
-    dates = out.get("data_raw", pd.Series([""] * len(out))).apply(
-        lambda x: normalizar_data(x, ano_ref)
-    )
-    out["data"] = dates.apply(lambda t: t[0])
-    out["data_exib"] = dates.apply(lambda t: t[1])
+    valor_raw = out.get("valor_raw", pd.Series([0.0] * len(out)))
+    if pd.api.types.is_numeric_dtype(valor_raw) and not pd.api.types.is_bool_dtype(valor_raw):
+        # Colunas já numéricas (ex: Parquet, CSV com vírgula decimal): conversão vetorizada
+        out["valor"] = valor_raw.astype(float).fillna(0.0)
+    else:
+        out["valor"] = valor_raw.apply(normalizar_valor)
+
+    data_raw = out.get("data_raw", pd.Series([""] * len(out)))
+    if pd.api.types.is_datetime64_any_dtype(data_raw):
+        # Datas já tipadas: sem passar por texto
+        out["data"] = data_raw.dt.date.astype(object).where(data_raw.notna(), None)
+        out["data_exib"] = data_raw.dt.strftime("%d/%m").fillna("")
+        out["data_iso"] = data_raw.dt.strftime("%Y-%m-%d").fillna("")
+    else:
+        dates = data_raw.apply(lambda x: normalizar_data(x, ano_ref))
+        out["data"] = dates.apply(lambda t: t[0])
+        out["data_exib"] = dates.apply(lambda t: t[1])
+        # DD/MM recebe ano_ref em `data`, mas esse ano é suposto: não vai para data_iso
+        sem_ano = data_raw.astype(str).str.strip().str.fullmatch(r"\d{1,2}/\d{1,2}")
+        out["data_iso"] = [
+            "" if falta or d is None else d.isoformat() for d, falta in zip(out["data"], sem_ano)
+        ]
 
     out["fornecedor_norm"] = out.get("fornecedor", pd.Series([""] * len(out))).apply(normalizar_nome)
 
@@ -1,11 +1,25 @@
 """
 Parsers para leitura e detecção de modelo de planilha.
 Reconhece Modelo 1 (Referência) e Modelo 2 (Comparação) pelos cabeçalhos.
+Pastas de trabalho com várias abas (ex: uma por semana ou filial) têm todas as
+abas do mesmo modelo lidas em paralelo e concatenadas. A leitura de cada formato
+(XLSX, CSV, Parquet) fica em conciliacao.leitores; aqui só são lidas as colunas
+usadas pelo modelo detectado.
 """
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
 
 import pandas as pd
-from typing import Literal, Optional
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Literal, Optional, Tuple, Union
+
+from conciliacao.leitores import TAMANHO_BLOCO, leitor_para
+
+logger = logging.getLogger(__name__)
 
 # Cabeçalhos esperados para cada modelo
 MODELO1_COLS = {
@@ -40,9 +54,15 @@ MODELO2_ALT = {
 }
 
 
-def _cols_present(df: pd.DataFrame, expected: set, expected_alt: set) -> int:
-    """Conta quantas colunas esperadas existem no DataFrame (case-insensitive)."""
-    cols_lower = {c.strip().lower(): c for c in df.columns if isinstance(c, str)}
+# Processos usados para ler abas em paralelo. Opcional (padrão 1, sem pool): cada processo
+# carrega pandas/openpyxl e fica vivo; main.py desconta PARSER_WORKER_MB por processo do
+# orçamento de memória quando o pool está ligado.
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", "1"))
+
+
+def _cols_present(colunas: Iterable, expected: set, expected_alt: set) -> int:
+    """Conta quantas colunas esperadas existem no cabeçalho (case-insensitive)."""
+    cols_lower = {c.strip().lower(): c for c in colunas if isinstance(c, str)}
     count = 0
     for alt in expected_alt:
         if alt in cols_lower:
@@ -57,9 +77,14 @@ def detectar_modelo(df: pd.DataFrame) -> Optional[Literal["modelo1", "modelo2"]]
     """
     if df is None or df.empty:
         return None
+    return detectar_modelo_cabecalho(df.columns)
 
-    c1 = _cols_present(df, MODELO1_COLS, MODELO1_ALT)
-    c2 = _cols_present(df, MODELO2_COLS, MODELO2_ALT)
+
+def detectar_modelo_cabecalho(colunas: Iterable) -> Optional[Literal["modelo1", "modelo2"]]:
+    """Como detectar_modelo, mas só a partir dos nomes das colunas (sem ler os dados)."""
+    colunas = list(colunas)
+    c1 = _cols_present(colunas, MODELO1_COLS, MODELO1_ALT)
+    c2 = _cols_present(colunas, MODELO2_COLS, MODELO2_ALT)
 
     # Precisa de pelo menos 3 colunas chave para cada modelo
     if c1 >= 3 and c1 >= c2:
@@ -69,71 +94,235 @@ def detectar_modelo(df: pd.DataFrame) -> Optional[Literal["modelo1", "modelo2"]]
     return None
 
 
-def _find_col(df: pd.DataFrame, options: list) -> Optional[str]:
-    """Encontra coluna por nome (case-insensitive)."""
-    cols_lower = {c.strip().lower(): c for c in df.columns if isinstance(c, str)}
+def _find_col_nomes(colunas: Iterable, options: list) -> Optional[str]:
+    """Encontra coluna por nome (case-insensitive) numa lista de nomes."""
+    cols_lower = {c.strip().lower(): c for c in colunas if isinstance(c, str)}
     for opt in options:
         if opt.lower() in cols_lower:
             return cols_lower[opt.lower()]
     return None
 
 
-def ler_modelo1(df: pd.DataFrame) -> pd.DataFrame:
+def _find_col(df: pd.DataFrame, options: list) -> Optional[str]:
+    """Encontra coluna por nome (case-insensitive)."""
+    return _find_col_nomes(df.columns, options)
+
+
+# Coluna do schema interno -> nomes aceitos na planilha de cada modelo
+CAMPOS_MODELO1 = {
+    "fornecedor": ["FORNECEDOR/COLABORADOR"],
+    "data_raw": ["DATA"],
+    "valor_raw": ["VALOR"],
+    "centro_custo": ["CENTRO DE CUSTO"],
+    "departamento": ["Departamento", "DEPARTAMENTO"],
+}
+
+CAMPOS_MODELO2 = {
+    "fornecedor": ["Fornecedor - nome"],
+    "data_raw": ["Data pagamento"],
+    "valor_raw": ["Valor pagamento"],
+    "centro_custo": ["Centro custo", "Centro de custo"],
+    "departamento": ["Descrição", "Suboperação"],
+}
+
+CAMPOS_POR_MODELO = {"modelo1": CAMPOS_MODELO1, "modelo2": CAMPOS_MODELO2}
+
+
+def _texto(serie: pd.Series) -> pd.Series:
     """
-    Extrai e normaliza colunas do Modelo 1 para schema interno:
-    fornecedor, data, valor, centro_custo, departamento
+    Coluna de texto; colunas que já são texto não passam por astype: tipadas como string
+    ou object só com str (ex: Parquet via pyarrow no pandas 2).
     """
+    if isinstance(serie.dtype, pd.StringDtype):
+        return serie.fillna("")
+    if serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=False) in ("string", "empty"):
+        return serie
+    return serie.astype(str).fillna("")
+
+
+def _data_bruta(serie: pd.Series) -> pd.Series:
+    """Datas já tipadas (datetime64) são mantidas; o resto vira texto para normalizar_data."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return _texto(serie)
+
+
+def _ler_modelo(df: pd.DataFrame, campos: Dict[str, list]) -> pd.DataFrame:
     result = pd.DataFrame()
 
-    col_fornecedor = _find_col(df, ["FORNECEDOR/COLABORADOR"])
-    col_data = _find_col(df, ["DATA"])
-    col_valor = _find_col(df, ["VALOR"])
-    col_centro = _find_col(df, ["CENTRO DE CUSTO"])
-    col_dept = _find_col(df, ["Departamento", "DEPARTAMENTO"])
+    col_fornecedor = _find_col(df, campos["fornecedor"])
+    col_data = _find_col(df, campos["data_raw"])
+    col_valor = _find_col(df, campos["valor_raw"])
+    col_centro = _find_col(df, campos["centro_custo"])
+    col_dept = _find_col(df, campos["departamento"])
 
-    result["fornecedor"] = df[col_fornecedor].astype(str).fillna("") if col_fornecedor else ""
-    result["data_raw"] = df[col_data].astype(str).fillna("") if col_data else ""
+    result["fornecedor"] = _texto(df[col_fornecedor]) if col_fornecedor else ""
+    result["data_raw"] = _data_bruta(df[col_data]) if col_data else ""
     result["valor_raw"] = df[col_valor] if col_valor else 0
-    result["centro_custo"] = df[col_centro].astype(str).fillna("") if col_centro else ""
-    result["departamento"] = df[col_dept].astype(str).fillna("") if col_dept else ""
+    result["centro_custo"] = _texto(df[col_centro]) if col_centro else ""
+    result["departamento"] = _texto(df[col_dept]) if col_dept else ""
 
     return result
 
 
+def ler_modelo1(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extrai e normaliza colunas do Modelo 1 para schema interno:
+    fornecedor, data, valor, centro_custo, departamento
+    """
+    return _ler_modelo(df, CAMPOS_MODELO1)
+
+
 def ler_modelo2(df: pd.DataFrame) -> pd.DataFrame:
     """
     Extrai e normaliza colunas do Modelo 2 para schema interno:
     fornecedor, data, valor, centro_custo, departamento
     """
-    result = pd.DataFrame()
+    return _ler_modelo(df, CAMPOS_MODELO2)
 
-    col_fornecedor = _find_col(df, ["Fornecedor - nome"])
-    col_data = _find_col(df, ["Data pagamento"])
-    col_valor = _find_col(df, ["Valor pagamento"])
-    col_centro = _find_col(df, ["Centro custo", "Centro de custo"])
-    col_desc = _find_col(df, ["Descrição", "Suboperação"])
 
-    result["fornecedor"] = df[col_fornecedor].astype(str).fillna("") if col_fornecedor else ""
-    result["data_raw"] = df[col_data].astype(str).fillna("") if col_data else ""
-    result["valor_raw"] = df[col_valor] if col_valor else 0
-    result["centro_custo"] = df[col_centro].astype(str).fillna("") if col_centro else ""
-    result["departamento"] = df[col_desc].astype(str).fillna("") if col_desc else ""
+def colunas_do_modelo(colunas: Iterable, modelo: Literal["modelo1", "modelo2"]) -> List[str]:
+    """Nomes, no cabeçalho do arquivo, das colunas usadas pelo modelo (projeção da leitura)."""
+    colunas = list(colunas)
+    encontradas = (_find_col_nomes(colunas, opcoes) for opcoes in CAMPOS_POR_MODELO[modelo].values())
+    return [c for c in encontradas if c is not None]
+
+
+def _converter_bloco(
+    df: pd.DataFrame,
+    modelo: Literal["modelo1", "modelo2"],
+    aba: str,
+    primeira_linha: int,
+) -> pd.DataFrame:
+    parsed = ler_modelo1(df) if modelo == "modelo1" else ler_modelo2(df)
+    parsed["aba_origem"] = aba
+    parsed["linha_origem"] = df.index + primeira_linha
+    return parsed
+
+
+def _ler_aba(
+    arquivo: Union[str, os.PathLike, BinaryIO],
+    aba: str,
+    modelo: Literal["modelo1", "modelo2"],
+    colunas: List[str],
+    formato: Optional[str] = None,
+) -> pd.DataFrame:
+    """Lê uma aba (só as colunas do modelo) e converte para o schema interno, com aba e linha de origem."""
+    leitor = leitor_para(arquivo, formato)
+    return _converter_bloco(leitor.ler(arquivo, aba, colunas), modelo, aba, leitor.primeira_linha)
 
-    return result
 
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
 
-def carregar_e_detectar(arquivo_bytes: bytes) -> tuple[pd.DataFrame, Optional[Literal["modelo1", "modelo2"]]]:
+
+def _pool() -> ProcessPoolExecutor:
+    """Pool de processos do módulo, criado na primeira planilha com várias abas."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # forkserver: os workers não herdam threads do servidor (fork seguro) e
+            # já nascem com pandas/openpyxl importados
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(["conciliacao.parsers"])
+            _executor = ProcessPoolExecutor(max_workers=PARSER_WORKERS, mp_context=ctx)
+        return _executor
+
+
+def encerrar_pool(pool: Optional[ProcessPoolExecutor] = None, esperar: bool = True) -> None:
     """
-    Carrega arquivo .xlsx e retorna (DataFrame normalizado, modelo detectado).
+    Encerra o pool de processos (o próximo uso cria outro). Com pool, só descarta se ainda
+    for o pool atual: outra thread pode já ter trocado um pool quebrado.
     """
-    df = pd.read_excel(BytesIO(arquivo_bytes), engine="openpyxl")
-    modelo = detectar_modelo(df)
-
-    if modelo == "modelo1":
-        parsed = ler_modelo1(df)
-    elif modelo == "modelo2":
-        parsed = ler_modelo2(df)
-    else:
+    global _executor
+    with _executor_lock:
+        if _executor is None or (pool is not None and pool is not _executor):
+            return
+        executor, _executor = _executor, None
+    executor.shutdown(wait=esperar, cancel_futures=True)
+
+
+def _ler_abas_em_paralelo(
+    arquivo: Union[str, os.PathLike],
+    abas: List[Tuple[str, List[str]]],
+    modelo: Literal["modelo1", "modelo2"],
+    formato: Optional[str],
+) -> Optional[List[pd.DataFrame]]:
+    """Lê as abas no pool; None se um processo morreu (o pool quebrado é descartado)."""
+    pool = _pool()
+    try:
+        futuros = [pool.submit(_ler_aba, arquivo, aba, modelo, colunas, formato) for aba, colunas in abas]
+        return [f.result() for f in futuros]
+    except BrokenProcessPool:
+        logger.warning("Pool de leitura de abas quebrado; recriando e lendo %s sem paralelismo", arquivo)
+        encerrar_pool(pool, esperar=False)
+        return None
+
+
+def _abas_do_modelo(
+    arquivo: Union[str, os.PathLike, BinaryIO],
+    formato: Optional[str],
+) -> Tuple[Literal["modelo1", "modelo2"], List[Tuple[str, List[str]]]]:
+    """Detecta o modelo pelos cabeçalhos e retorna (modelo, [(aba, colunas projetadas)])."""
+    abas_modelo = [
+        (aba, detectar_modelo_cabecalho(colunas), colunas)
+        for aba, colunas in leitor_para(arquivo, formato).cabecalhos(arquivo)
+    ]
+    modelo = next((m for _, m, _ in abas_modelo if m is not None), None)
+    if modelo is None:
         raise ValueError("Não foi possível identificar o modelo da planilha. Verifique os cabeçalhos.")
+    return modelo, [(aba, colunas_do_modelo(colunas, modelo)) for aba, m, colunas in abas_modelo if m == modelo]
+
+
+def carregar_e_detectar(
+    arquivo: Union[bytes, str, os.PathLike, BinaryIO],
+    formato: Optional[str] = None,
+) -> tuple[pd.DataFrame, Optional[Literal["modelo1", "modelo2"]]]:
+    """
+    Carrega arquivo .xlsx, .csv ou .parquet (bytes, caminho em disco ou arquivo aberto)
+    e retorna (DataFrame normalizado, modelo detectado).
+    O formato vem da extensão do caminho ou do parâmetro formato (bytes sem formato = .xlsx).
+    O modelo é detectado no cabeçalho de cada aba; as abas do modelo da primeira aba
+    reconhecida são lidas (em paralelo, quando o arquivo está em disco) e concatenadas.
+    Abas que não batem com nenhum modelo são ignoradas sem ler seus dados.
+    """
+    if isinstance(arquivo, bytes):
+        arquivo = BytesIO(arquivo)
+
+    leitor = leitor_para(arquivo, formato)
+    modelo, abas = _abas_do_modelo(arquivo, formato)
+
+    em_disco = isinstance(arquivo, (str, os.PathLike))
+    partes = None
+    if len(abas) > 1 and em_disco and leitor.abas_em_paralelo and PARSER_WORKERS > 1:
+        partes = _ler_abas_em_paralelo(arquivo, abas, modelo, formato)
+    if partes is None:
+        partes = [_ler_aba(arquivo, aba, modelo, colunas, formato) for aba, colunas in abas]
 
+    parsed = partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+    if parsed.empty:
+        raise ValueError("Não foi possível identificar o modelo da planilha. Verifique os cabeçalhos.")
     return parsed, modelo
+
+
+def carregar_em_blocos(
+    arquivo: Union[str, os.PathLike, BinaryIO],
+    formato: Optional[str] = None,
+    tamanho_bloco: int = TAMANHO_BLOCO,
+) -> Tuple[Literal["modelo1", "modelo2"], Iterator[pd.DataFrame]]:
+    """
+    Como carregar_e_detectar, mas devolve (modelo, iterador de blocos no schema interno)
+    para processar arquivos maiores que a memória.
+    """
+    leitor = leitor_para(arquivo, formato)
+    modelo, abas = _abas_do_modelo(arquivo, formato)
+
+    def _blocos() -> Iterator[pd.DataFrame]:
+        for aba, colunas in abas:
+            inicio = 0
+            for bloco in leitor.ler_blocos(arquivo, aba, colunas, tamanho_bloco):
+                bloco.index = bloco.index + inicio
+                inicio += len(bloco)
+                yield _converter_bloco(bloco, modelo, aba, leitor.primeira_linha)
+
+    return modelo, _blocos()
@@ -0,0 +1,232 @@
+"""
+Conciliação fora da memória, particionada por data.
+Os dois arquivos são lidos em blocos (parsers.carregar_em_blocos), normalizados e
+espalhados em arquivos temporários por data (DD/MM). Depois cada data é conciliada
+sozinha com as mesmas etapas do pipeline e o resultado vai direto para o disco, no
+mesmo layout da conciliação em lote. Como o matching só compara registros da mesma
+data, o resultado é o mesmo da conciliação em memória (ordenado por data); o pico de
+memória passa a ser o do maior dia, não o do arquivo inteiro.
+"""
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from conciliacao.cubo import DIMENSOES_CUBO, MEDIDAS_CUBO
+from conciliacao.etapas import executar_etapas
+from conciliacao.leitores import TAMANHO_BLOCO
+from conciliacao.normalizacao import aplicar_normalizacao
+from conciliacao.parsers import carregar_em_blocos
+from conciliacao.pipeline import ANO_REF_PADRAO, PIPELINE_THREADS, etapas_conciliacao
+
+# Linhas mantidas em memória antes de descarregar as partições no disco
+LIMITE_BUFFER = int(os.getenv("PARTICOES_BUFFER_LINHAS", "200000"))
+
+# Colunas usadas por _df_to_registros (o resto do DataFrame normalizado não vai para o disco)
+_COLUNAS = [
+    "fornecedor", "valor", "data_exib", "centro_custo", "departamento",
+    "fornecedor_norm", "aba_origem", "linha_origem", "data_iso",
+]
+
+_COLUNAS_RESUMO = (
+    "total_referencia", "total_comparacao", "matches_confirmados", "divergentes",
+    "nao_encontrados", "info_faltante", "total_alertas_diarios",
+)
+
+
+class Particoes:
+    """
+    Um lado (ref ou comp) espalhado por data em `diretorio`: cada data tem um arquivo
+    com DataFrames em pickle, anexados na ordem de leitura.
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self.arquivos: Dict[str, str] = {}
+        self.linhas = 0
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _arquivo(self, data: str) -> str:
+        if data not in self.arquivos:
+            self.arquivos[data] = os.path.join(self.diretorio, f"p{len(self.arquivos):05d}.pkl")
+        return self.arquivos[data]
+
+    def anexar(self, buffers: Dict[str, List[pd.DataFrame]]) -> None:
+        for data, partes in buffers.items():
+            with open(self._arquivo(data), "ab") as f:
+                for parte in partes:
+                    pickle.dump(parte, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def ler(self, data: str) -> pd.DataFrame:
+        """Registros da data na ordem original (DataFrame vazio se a data não existe deste lado)."""
+        if data not in self.arquivos:
+            return pd.DataFrame(columns=_COLUNAS)
+        partes = []
+        with open(self.arquivos[data], "rb") as f:
+            while True:
+                try:
+                    partes.append(pickle.load(f))
+                except EOFError:
+                    break
+        return partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+
+
+def particionar(
+    arquivo: str,
+    diretorio: str,
+    ano_ref: int = ANO_REF_PADRAO,
+    tamanho_bloco: int = TAMANHO_BLOCO,
+    limite_buffer: int = LIMITE_BUFFER,
+) -> Particoes:
+    """Lê o arquivo em blocos, normaliza e grava cada bloco nas partições das suas datas."""
+    _, blocos = carregar_em_blocos(arquivo, tamanho_bloco=tamanho_bloco)
+    particoes = Particoes(diretorio)
+    buffers: Dict[str, List[pd.DataFrame]] = {}
+    em_buffer = 0
+
+    for bloco in blocos:
+        df = aplicar_normalizacao(bloco, ano_ref=ano_ref)[_COLUNAS]
+        for data, parte in df.groupby("data_exib", sort=False):
+            buffers.setdefault(data, []).append(parte.reset_index(drop=True))
+        em_buffer += len(df)
+        particoes.linhas += len(df)
+        if em_buffer >= limite_buffer:
+            particoes.anexar(buffers)
+            buffers, em_buffer = {}, 0
+
+    particoes.anexar(buffers)
+    return particoes
+
+
+def _schema_resultados():
+    import pyarrow as pa
+
+    texto, decimal, inteiro = pa.string(), pa.float64(), pa.int64()
+    return pa.schema([
+        ("status", texto), ("data", texto), ("fornecedor_ref", texto), ("valor_ref", decimal),
+        ("centro_custo_ref", texto), ("departamento_ref", texto), ("aba_ref", texto), ("linha_ref", inteiro),
+        ("fornecedor_comp", texto), ("valor_comp", decimal), ("centro_custo_comp", texto),
+        ("departamento_comp", texto), ("aba_comp", texto), ("linha_comp", inteiro),
+        ("score_nome", decimal), ("diferenca_valor", decimal), ("alerta", texto),
+    ])
+
+
+class _EscritorResultados:
+    """Parquet escrito em grupos de linhas, um por data, com schema fixo."""
+
+    def __init__(self, caminho: str):
+        import pyarrow.parquet as pq
+
+        from conciliacao.lote import _tabela_resultados
+
+        self._tabela = _tabela_resultados
+        self._schema = _schema_resultados()
+        self._escritor = pq.ParquetWriter(caminho, self._schema)
+
+    def escrever(self, resultados: List[dict]) -> None:
+        import pyarrow as pa
+
+        if resultados:
+            tabela = pa.Table.from_pandas(self._tabela(resultados), schema=self._schema, preserve_index=False)
+            self._escritor.write_table(tabela)
+
+    def fechar(self) -> None:
+        self._escritor.close()
+
+
+def _datas(ref: Particoes, comp: Particoes) -> List[str]:
+    # Mesma ordem de agrupar_por_data; registros sem data ("") também são conciliados entre si
+    return sorted(set(ref.arquivos) | set(comp.arquivos))
+
+
+def conciliar_particoes(
+    ref: Particoes,
+    comp: Particoes,
+    destino: str,
+    tolerancia_valor: float = 0.01,
+) -> Dict[str, Any]:
+    """
+    Concilia data a data e grava em destino resultados.parquet, resultados_centro_custo.parquet,
+    por_data.parquet, alertas.parquet, cubo.parquet, cubo_centro_custo.parquet e resumo.json.
+    Retorna o resumo.
+    """
+    os.makedirs(destino, exist_ok=True)
+    # As partições já estão normalizadas: o grafo começa nos DataFrames normalizados
+    etapas = [e for e in etapas_conciliacao(tolerancia_valor=tolerancia_valor) if e.nome not in ("df_ref", "df_comp")]
+
+    resumos = {analise: dict.fromkeys(_COLUNAS_RESUMO, 0) for analise in ("valor_data", "centro_custo")}
+    tempos: Dict[str, float] = {}
+    por_data: List[dict] = []
+    alertas: List[dict] = []
+    # As células do cubo têm a data como dimensão: os cubos de cada data só se concatenam
+    cubos = {analise: {c: [] for c in DIMENSOES_CUBO + MEDIDAS_CUBO} for analise in ("valor_data", "centro_custo")}
+    escritores = {
+        "valor_data": _EscritorResultados(os.path.join(destino, "resultados.parquet")),
+        "centro_custo": _EscritorResultados(os.path.join(destino, "resultados_centro_custo.parquet")),
+    }
+    try:
+        for data in _datas(ref, comp):
+            artefatos, tempos_data = executar_etapas(
+                etapas,
+                {"df_ref": ref.ler(data), "df_comp": comp.ler(data)},
+                max_workers=PIPELINE_THREADS,
+            )
+            resposta = artefatos["resposta"]
+            for analise, dados in (("valor_data", resposta), ("centro_custo", resposta["analise_centro_custo"])):
+                escritores[analise].escrever(dados["resultados"])
+                for c in _COLUNAS_RESUMO:
+                    resumos[analise][c] += dados["resumo"][c]
+                for c, valores in dados["cubo"].items():
+                    cubos[analise][c].extend(valores)
+            por_data.extend({k: v for k, v in g.items() if k != "resultados"} for g in resposta["por_data"])
+            alertas.extend(resposta["alertas_diarios"])
+            for nome, ms in tempos_data.items():
+                tempos[nome] = round(tempos.get(nome, 0.0) + ms, 1)
+    finally:
+        for escritor in escritores.values():
+            escritor.fechar()
+
+    pd.DataFrame(por_data, columns=["data", "qtd_ref", "qtd_comp", "total_ref", "total_comp", "divergente"]).to_parquet(
+        os.path.join(destino, "por_data.parquet"), index=False
+    )
+    pd.DataFrame(alertas, columns=["data", "mensagem"]).to_parquet(os.path.join(destino, "alertas.parquet"), index=False)
+    pd.DataFrame(cubos["valor_data"]).to_parquet(os.path.join(destino, "cubo.parquet"), index=False)
+    pd.DataFrame(cubos["centro_custo"]).to_parquet(os.path.join(destino, "cubo_centro_custo.parquet"), index=False)
+
+    resumo = {
+        "valor_data": resumos["valor_data"],
+        "centro_custo": resumos["centro_custo"],
+        "tempos_etapas": tempos,
+        "particoes": len(_datas(ref, comp)),
+    }
+    with open(os.path.join(destino, "resumo.json"), "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+    return resumo
+
+
+def conciliar_particionado(
+    arquivo_ref: str,
+    arquivo_comp: str,
+    destino: str,
+    ano_ref: int = ANO_REF_PADRAO,
+    tolerancia_valor: float = 0.01,
+    diretorio_temporario: Optional[str] = None,
+    tamanho_bloco: int = TAMANHO_BLOCO,
+) -> Dict[str, Any]:
+    """
+    Concilia dois arquivos grandes (.xlsx, .csv ou .parquet) sem carregá-los inteiros.
+    As partições ficam num diretório temporário (em diretorio_temporario, se informado),
+    removido no fim.
+    """
+    spill = tempfile.mkdtemp(prefix="particoes_", dir=diretorio_temporario)
+    try:
+        ref = particionar(arquivo_ref, os.path.join(spill, "ref"), ano_ref, tamanho_bloco)
+        comp = particionar(arquivo_comp, os.path.join(spill, "comp"), ano_ref, tamanho_bloco)
+        return conciliar_particoes(ref, comp, destino, tolerancia_valor)
+    finally:
+        shutil.rmtree(spill, ignore_errors=True)
+
@@ -0,0 +1,239 @@
+"""
+Pipeline completo de conciliação: normalização, matching e cheques.
+Usado pela API (/conciliar) e pela conciliação em lote; devolve dicts simples
+no formato de RespostaConciliacaoSchema.
+"""
+import os
+from typing import TYPE_CHECKING, Any, List, Optional, Sized, Union
+
+import pandas as pd
+
+from conciliacao.cheques import agregar_por_data, agrupar_por_data, checar_alertas_diarios, checar_info_faltante
+from conciliacao.cubo import colunas_cubo, montar_cubo
+from conciliacao.etapas import Etapa, executar_etapas
+from conciliacao.matching import Aliases, ResultadoMatch, _df_to_registros, executar_matching, indexar_por_data
+from conciliacao.matching_centro_custo import ResultadoMatchCentroCusto, executar_matching_centro_custo
+from conciliacao.normalizacao import aplicar_normalizacao
+from conciliacao.parsers import carregar_e_detectar
+
+if TYPE_CHECKING:
+    from conciliacao.referencias import ReferenciaColunar
+
+# Ano usado quando a data vem só como DD/MM
+ANO_REF_PADRAO = 2026
+
+# Threads para etapas independentes (os dois matchings, cheques e normalizações).
+# Boa parte é Python puro e disputa o GIL; o ganho vem das partes em pandas/rapidfuzz.
+PIPELINE_THREADS = int(os.getenv("PIPELINE_THREADS", "4"))
+
+
+def resultado_to_dict(r: Union[ResultadoMatch, ResultadoMatchCentroCusto]) -> dict:
+    return {
+        "status": r.status,
+        "referencia": r.referencia,
+        "comparacao": r.comparacao,
+        "score_nome": r.score_nome,
+        "diferenca_valor": r.diferenca_valor,
+        "alerta": r.alerta,
+        "alias_fornecedor": r.alias_fornecedor,
+    }
+
+
+def _resumo(
+    resultados_match: list,
+    total_referencia: int,
+    total_comparacao: int,
+    info_faltante: int,
+    total_alertas_diarios: int,
+) -> dict:
+    return {
+        "total_referencia": total_referencia,
+        "total_comparacao": total_comparacao,
+        "matches_confirmados": sum(1 for r in resultados_match if r.status == "ok"),
+        "divergentes": sum(1 for r in resultados_match if r.status == "divergente"),
+        "nao_encontrados": sum(1 for r in resultados_match if r.status == "nao_encontrado"),
+        "info_faltante": info_faltante,
+        "total_alertas_diarios": total_alertas_diarios,
+    }
+
+
+def _vincular_por_data(grupos_data: List[dict], resultados: List[dict]) -> List[dict]:
+    """Cada grupo de data recebe os resultados cuja referência é daquela data."""
+    por_data_map = {g["data"]: {**g, "resultados": []} for g in grupos_data}
+    for r in resultados:
+        data_ref = r.get("referencia", {}).get("data", "")
+        if data_ref and data_ref in por_data_map:
+            por_data_map[data_ref]["resultados"].append(r)
+    return list(por_data_map.values())
+
+
+def _montar_resposta(
+    df_ref: Sized,
+    df_comp: Sized,
+    resultados_match: list,
+    resultados_centro: list,
+    alertas_info: List[dict],
+    alertas_diarios: List[dict],
+    grupos_data: List[dict],
+    cubo: dict,
+    cubo_centro: dict,
+) -> dict[str, Any]:
+    # Lista de resultados (match + info_faltante)
+    resultados: List[dict] = [resultado_to_dict(r) for r in resultados_match]
+    resultados.extend(alertas_info)
+
+    resultados_centro_dict = [resultado_to_dict(r) for r in resultados_centro]
+
+    return {
+        "resumo": _resumo(resultados_match, len(df_ref), len(df_comp), len(alertas_info), len(alertas_diarios)),
+        "resultados": resultados,
+        "alertas_diarios": alertas_diarios,
+        "por_data": _vincular_por_data(grupos_data, resultados),
+        # Cubos de agregados: gravados com a execução, não vão na resposta HTTP
+        "cubo": cubo,
+        "analise_centro_custo": {
+            "resumo": _resumo(resultados_centro, len(df_ref), len(df_comp), 0, len(alertas_diarios)),
+            "resultados": resultados_centro_dict,
+            "por_data": _vincular_por_data(grupos_data, resultados_centro_dict),
+            "cubo": cubo_centro,
+        },
+    }
+
+
+def etapas_conciliacao(
+    ano_ref: int = ANO_REF_PADRAO,
+    tolerancia_valor: float = 0.01,
+    aliases: Optional[Aliases] = None,
+) -> List[Etapa]:
+    """
+    Grafo de etapas a partir de df_ref_raw/df_comp_raw. Registros, índice de datas da
+    comparação e agregados diários são calculados uma vez e compartilhados (só leitura)
+    pelos dois matchings, pelos cheques e pelos cubos de agregados (conciliacao.cubo).
+    aliases: dicionário de fornecedores conhecidos.
+    """
+    return [
+        Etapa("df_ref", lambda df: aplicar_normalizacao(df, ano_ref=ano_ref), ("df_ref_raw",)),
+        Etapa("df_comp", lambda df: aplicar_normalizacao(df, ano_ref=ano_ref), ("df_comp_raw",)),
+        Etapa("registros_ref", _df_to_registros, ("df_ref",)),
+        Etapa("registros_comp", _df_to_registros, ("df_comp",)),
+        Etapa("comp_por_data", indexar_por_data, ("registros_comp",)),
+        Etapa(
+            "agregados_diarios",
+            lambda ref, comp: (agregar_por_data(ref), agregar_por_data(comp)),
+            ("registros_ref", "registros_comp"),
+        ),
+        Etapa(
+            "matching",
+            lambda df_ref, df_comp, ref, comp, por_data: executar_matching(
+                df_ref, df_comp, tolerancia_valor, registros=(ref, comp), comp_por_data=por_data, aliases=aliases
+            ),
+            ("df_ref", "df_comp", "registros_ref", "registros_comp", "comp_por_data"),
+        ),
+        Etapa(
+            "matching_centro_custo",
+            lambda df_ref, df_comp, ref, comp, por_data: executar_matching_centro_custo(
+                df_ref, df_comp, tolerancia_valor, registros=(ref, comp), comp_por_data=por_data, aliases=aliases
+            ),
+            ("df_ref", "df_comp", "registros_ref", "registros_comp", "comp_por_data"),
+        ),
+        Etapa(
+            "info_faltante",
+            lambda df_ref, ref: checar_info_faltante(df_ref, "ref", registros=ref),
+            ("df_ref", "registros_ref"),
+        ),
+        Etapa(
+            "alertas_diarios",
+            lambda df_ref, df_comp, agregados: checar_alertas_diarios(df_ref, df_comp, agregados=agregados),
+            ("df_ref", "df_comp", "agregados_diarios"),
+        ),
+        Etapa(
+            "grupos_data",
+            lambda df_ref, df_comp, agregados: agrupar_por_data(df_ref, df_comp, agregados=agregados),
+            ("df_ref", "df_comp", "agregados_diarios"),
+        ),
+        Etapa("colunas_cubo_ref", colunas_cubo, ("df_ref",)),
+        Etapa("colunas_cubo_comp", colunas_cubo, ("df_comp",)),
+        Etapa("cubo", montar_cubo, ("colunas_cubo_ref", "colunas_cubo_comp", "matching")),
+        Etapa("cubo_centro_custo", montar_cubo, ("colunas_cubo_ref", "colunas_cubo_comp", "matching_centro_custo")),
+        Etapa(
+            "resposta",
+            _montar_resposta,
+            (
+                "df_ref", "df_comp", "matching", "matching_centro_custo",
+                "info_faltante", "alertas_diarios", "grupos_data", "cubo", "cubo_centro_custo",
+            ),
+        ),
+    ]
+
+
+def etapas_com_referencia(
+    ano_ref: int = ANO_REF_PADRAO,
+    tolerancia_valor: float = 0.01,
+    aliases: Optional[Aliases] = None,
+) -> List[Etapa]:
+    """
+    Grafo de etapas_conciliacao para uma referência publicada (conciliacao.referencias):
+    df_ref e registros_ref são a própria ReferenciaColunar (os matchings e o cheque de
+    informação faltante leem os buffers compartilhados como LinhasReferencia), as colunas do
+    cubo saem dos códigos e os agregados diários da referência já vêm prontos.
+    """
+    substituidas = {"df_ref", "registros_ref", "agregados_diarios", "colunas_cubo_ref"}
+    return [e for e in etapas_conciliacao(ano_ref, tolerancia_valor, aliases) if e.nome not in substituidas] + [
+        Etapa("registros_ref", lambda ref: ref, ("df_ref",)),
+        Etapa("colunas_cubo_ref", lambda ref: ref.colunas_cubo(), ("df_ref",)),
+        Etapa(
+            "agregados_diarios",
+            lambda ref, comp: (ref.agregados, agregar_por_data(comp)),
+            ("df_ref", "registros_comp"),
+        ),
+    ]
+
+
+def conciliar_dataframes(
+    df_ref_raw: pd.DataFrame,
+    df_comp_raw: pd.DataFrame,
+    ano_ref: int = ANO_REF_PADRAO,
+    tolerancia_valor: float = 0.01,
+    aliases: Optional[Aliases] = None,
+) -> dict[str, Any]:
+    """
+    Concilia DataFrames já parseados (schema interno de parsers).
+    A resposta inclui tempos_etapas (ms por etapa).
+    """
+    artefatos, tempos = executar_etapas(
+        etapas_conciliacao(ano_ref, tolerancia_valor, aliases),
+        {"df_ref_raw": df_ref_raw, "df_comp_raw": df_comp_raw},
+        max_workers=PIPELINE_THREADS,
+    )
+    return {**artefatos["resposta"], "tempos_etapas": tempos}
+
+
+def conciliar_com_referencia(
+    referencia: "ReferenciaColunar",
+    df_comp_raw: pd.DataFrame,
+    ano_ref: int = ANO_REF_PADRAO,
+    tolerancia_valor: float = 0.01,
+    aliases: Optional[Aliases] = None,
+) -> dict[str, Any]:
+    """Concilia a comparação já parseada contra uma referência publicada (mesma resposta de conciliar_dataframes)."""
+    artefatos, tempos = executar_etapas(
+        etapas_com_referencia(ano_ref, tolerancia_valor, aliases),
+        {"df_ref": referencia, "df_comp_raw": df_comp_raw},
+        max_workers=PIPELINE_THREADS,
+    )
+    return {**artefatos["resposta"], "tempos_etapas": tempos}
+
+
+def conciliar_arquivos(
+    arquivo_ref: str,
+    arquivo_comp: str,
+    ano_ref: int = ANO_REF_PADRAO,
+    tolerancia_valor: float = 0.01,
+    aliases: Optional[Aliases] = None,
+) -> dict[str, Any]:
+    """Lê os dois arquivos (.xlsx, .csv ou .parquet) e concilia."""
+    df_ref_raw, _ = carregar_e_detectar(arquivo_ref)
+    df_comp_raw, _ = carregar_e_detectar(arquivo_comp)
+    return conciliar_dataframes(
+        df_ref_raw, df_comp_raw, ano_ref=ano_ref, tolerancia_valor=tolerancia_valor, aliases=aliases
+    )
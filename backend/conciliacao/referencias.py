@@ -0,0 +1,378 @@
+"""
+Referências publicadas: uma planilha de referência já normalizada, gravada uma única vez
+em formato colunar (valores em centavos, datas e textos codificados por dicionário) num
+arquivo que os workers mapeiam em memória só para leitura. As páginas ficam uma vez no
+page cache (/dev/shm por padrão, se couber) em vez de uma cópia por processo.
+
+Um índice travado com flock registra quantos usos cada processo tem em cada referência;
+quando o total passa do limite, as referências sem uso menos usadas recentemente são
+descartadas. numpy e pandas só são importados ao gravar ou mapear uma referência.
+"""
+import fcntl
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_MAGICO = b"CONCREF2"
+_ALINHAMENTO = 64
+_ID_VALIDO = re.compile(r"^[0-9a-f]{32}$")
+
+# Linhas decodificadas por vez em campos_matching (listas temporárias de tamanho fixo)
+_BLOCO_LINHAS = 65536
+
+# Colunas de texto: cada uma guarda o código (int32) da string no dicionário de mesmo nome
+COLUNAS_TEXTO = ("fornecedor", "fornecedor_norm", "data", "centro_custo", "departamento", "aba", "data_iso")
+
+
+class ReferenciaNaoEncontrada(LookupError):
+    """Referência inexistente, descartada ou id inválido."""
+
+
+def _bytes_no_diretorio(diretorio: str) -> int:
+    try:
+        return sum(e.stat().st_size for e in os.scandir(diretorio) if e.is_file())
+    except OSError:
+        return 0
+
+
+def _diretorio_padrao(limite_bytes: int) -> str:
+    """
+    /dev/shm se o espaço livre (mais o que as referências já ocupam lá) comporta limite_bytes;
+    senão o diretório temporário. O /dev/shm do Docker tem 64 MB por padrão.
+    """
+    shm = os.path.join("/dev/shm", "conciliacao_referencias")
+    try:
+        estado = os.statvfs("/dev/shm")
+    except OSError:
+        pass
+    else:
+        if estado.f_bavail * estado.f_frsize + _bytes_no_diretorio(shm) >= limite_bytes:
+            return shm
+    return os.path.join(tempfile.gettempdir(), "conciliacao_referencias")
+
+
+def gravar_referencia(caminho: str, df: "pd.DataFrame", metadados: Optional[dict] = None) -> int:
+    """
+    Grava o DataFrame normalizado (aplicar_normalizacao) no formato colunar e retorna o
+    tamanho em bytes. Textos e datas são os mesmos de _df_to_registros; os agregados
+    diários (cheques.agregar_por_data) vão pré-calculados no cabeçalho.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from conciliacao.cheques import agregar_por_data
+    from conciliacao.matching import _df_to_registros
+
+    registros = _df_to_registros(df)
+    n = len(registros)
+    textos = {
+        "fornecedor": [r.fornecedor for r in registros],
+        "fornecedor_norm": [r.fornecedor_norm for r in registros],
+        "data": [r.data for r in registros],
+        "centro_custo": [r.centro_custo for r in registros],
+        "departamento": [r.departamento for r in registros],
+        "aba": [r.aba_origem for r in registros],
+        "data_iso": [r.data_iso for r in registros],
+    }
+    colunas: Dict[str, Any] = {}
+    dicionarios: Dict[str, List[str]] = {}
+    for nome in COLUNAS_TEXTO:
+        codigos, unicos = pd.factorize(pd.Series(textos[nome], dtype=object), sort=False)
+        colunas[nome] = codigos.astype(np.int32)
+        dicionarios[nome] = [str(u) for u in unicos]
+    valores = np.fromiter((r.valor for r in registros), dtype=np.float64, count=n)
+    colunas["valor_centavos"] = np.rint(valores * 100).astype(np.int64)
+    colunas["linha"] = np.fromiter((r.linha_origem for r in registros), dtype=np.int64, count=n)
+
+    layout: Dict[str, Tuple[str, int]] = {}
+    deslocamento = 0
+    for nome, array in colunas.items():
+        layout[nome] = (array.dtype.str, deslocamento)
+        deslocamento += -(-array.nbytes // _ALINHAMENTO) * _ALINHAMENTO
+
+    cabecalho = json.dumps(
+        {
+            "linhas": n,
+            "colunas": layout,
+            "dicionarios": dicionarios,
+            "agregados": agregar_por_data(registros),
+            "metadados": metadados or {},
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    inicio_dados = -(-(len(_MAGICO) + 8 + len(cabecalho)) // _ALINHAMENTO) * _ALINHAMENTO
+
+    with open(caminho, "wb") as f:
+        f.write(_MAGICO + struct.pack("<Q", len(cabecalho)) + cabecalho)
+        for nome, array in colunas.items():
+            f.seek(inicio_dados + layout[nome][1])
+            f.write(array.tobytes())
+        f.truncate(inicio_dados + deslocamento)
+        f.flush()
+        os.fsync(f.fileno())
+    return inicio_dados + deslocamento
+
+
+class ReferenciaColunar:
+    """
+    Referência mapeada só para leitura: arrays numpy sobre o mmap, sem cópia.
+    É a matching.LinhasReferencia dos matchings e do cheque de informação faltante: eles
+    leem os códigos e os dicionários direto dos buffers, e só as linhas que vão para a
+    resposta viram dict (para_dict). Nenhuma conciliação cria um Registro por linha.
+    """
+
+    def __init__(self, caminho: str):
+        import numpy as np
+
+        with open(caminho, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGICO)] != _MAGICO:
+            self._mm.close()
+            raise ValueError(f"{caminho} não é uma referência publicada")
+        (tamanho,) = struct.unpack_from("<Q", self._mm, len(_MAGICO))
+        inicio = len(_MAGICO) + 8
+        cabecalho = json.loads(self._mm[inicio:inicio + tamanho].decode("utf-8"))
+        inicio_dados = -(-(inicio + tamanho) // _ALINHAMENTO) * _ALINHAMENTO
+
+        self.linhas: int = cabecalho["linhas"]
+        self.dicionarios: Dict[str, List[str]] = cabecalho["dicionarios"]
+        self.metadados: dict = cabecalho["metadados"]
+        self.agregados: Dict[str, Tuple[int, float]] = {
+            data: (qtd, total) for data, (qtd, total) in cabecalho["agregados"].items()
+        }
+        self.colunas: Dict[str, Any] = {
+            nome: np.frombuffer(self._mm, dtype=np.dtype(dtype), count=self.linhas, offset=inicio_dados + desloc)
+            for nome, (dtype, desloc) in cabecalho["colunas"].items()
+        }
+
+    def __len__(self) -> int:
+        return self.linhas
+
+    def campos_matching(self) -> Iterator[Tuple[float, str, str, str]]:
+        """
+        (valor, data, centro de custo, fornecedor normalizado) por linha, lidos dos códigos em
+        blocos de _BLOCO_LINHAS; os textos são os próprios objetos dos dicionários.
+        """
+        datas, centros, normalizados = (self.dicionarios[n] for n in ("data", "centro_custo", "fornecedor_norm"))
+        for inicio in range(0, self.linhas, _BLOCO_LINHAS):
+            fim = inicio + _BLOCO_LINHAS
+            blocos = (
+                self.colunas[n][inicio:fim].tolist() for n in ("valor_centavos", "data", "centro_custo", "fornecedor_norm")
+            )
+            for centavos, d, cc, fn in zip(*blocos):
+                yield centavos / 100, datas[d], centros[cc], normalizados[fn]
+
+    def sem_centro_custo(self) -> List[int]:
+        """Linhas cujo código de centro de custo aponta para um texto vazio, sem percorrê-las em Python."""
+        import numpy as np
+
+        vazios = [codigo for codigo, texto in enumerate(self.dicionarios["centro_custo"]) if not texto.strip()]
+        return np.flatnonzero(np.isin(self.colunas["centro_custo"], vazios)).tolist()
+
+    def para_dict(self, idx: int) -> Dict[str, Any]:
+        """A linha idx no formato de matching._registro_to_dict (só para as linhas da resposta)."""
+        colunas, dicionarios = self.colunas, self.dicionarios
+
+        def texto(nome: str) -> str:
+            return dicionarios[nome][colunas[nome][idx]]
+
+        registro: Dict[str, Any] = {
+            "fornecedor": texto("fornecedor"),
+            "valor": round(int(colunas["valor_centavos"][idx]) / 100, 2),
+            "data": texto("data"),
+            "centro_custo": texto("centro_custo"),
+            "departamento": texto("departamento"),
+        }
+        if texto("data_iso"):
+            registro["data_iso"] = texto("data_iso")
+        if texto("aba"):
+            registro["aba"] = texto("aba")
+            registro["linha"] = int(colunas["linha"][idx])
+        return registro
+
+    def colunas_cubo(self) -> Tuple[Any, Any, Any, Any]:
+        """
+        As colunas de cubo.colunas_cubo direto dos códigos: cada dicionário é aparado uma vez
+        e indexado pelo array de códigos; os centavos são o próprio buffer.
+        """
+        import numpy as np
+
+        def texto(nome: str):
+            return np.array([s.strip() for s in self.dicionarios[nome]], dtype=object)[self.colunas[nome]]
+
+        return texto("data"), texto("centro_custo"), texto("departamento"), self.colunas["valor_centavos"]
+
+    def fechar(self) -> None:
+        self.colunas = {}
+        try:
+            self._mm.close()
+        except BufferError:
+            # Ainda há views abertas (ex: arrays retidos por quem chamou); o mmap fecha no GC
+            pass
+
+
+def _processo_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class RepositorioReferencias:
+    """
+    Referências em diretorio/<id>.ref com o índice em diretorio/indice.json.
+    O índice só é lido e gravado com diretorio/indice.lock travado (flock), então pode
+    ser compartilhado por vários processos da mesma máquina.
+    """
+
+    def __init__(self, diretorio: Optional[str] = None, limite_bytes: int = 1024 * 1024 * 1024):
+        self.diretorio = diretorio or _diretorio_padrao(limite_bytes)
+        self.limite_bytes = limite_bytes
+
+    def _caminho(self, id_referencia: str) -> str:
+        if not _ID_VALIDO.match(id_referencia or ""):
+            raise ReferenciaNaoEncontrada(id_referencia)
+        return os.path.join(self.diretorio, f"{id_referencia}.ref")
+
+    @contextmanager
+    def _indice(self) -> Iterator[Dict[str, dict]]:
+        """Índice travado durante o bloco e gravado no fim (se o bloco não falhar)."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = os.path.join(self.diretorio, "indice.json")
+        with open(os.path.join(self.diretorio, "indice.lock"), "a+") as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(caminho, encoding="utf-8") as f:
+                        indice = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    indice = {}
+                # Usos de processos que morreram sem liberar (ex: worker reciclado)
+                for entrada in indice.values():
+                    entrada["usos"] = {pid: n for pid, n in entrada["usos"].items() if _processo_vivo(int(pid))}
+                yield indice
+                tmp = caminho + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(indice, f, ensure_ascii=False)
+                os.replace(tmp, caminho)
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _descricao(entrada: dict) -> dict:
+        return {
+            **{k: v for k, v in entrada.items() if k != "usos"},
+            "em_uso": sum(entrada["usos"].values()),
+        }
+
+    def _descartar_excedentes(self, indice: Dict[str, dict], manter: str) -> None:
+        """Remove as referências sem uso, da menos recente para a mais recente, até caber no limite."""
+        total = sum(e["bytes"] for e in indice.values())
+        livres = sorted(
+            (e for i, e in indice.items() if i != manter and not e["usos"]),
+            key=lambda e: e["ultimo_uso"],
+        )
+        for entrada in livres:
+            if total <= self.limite_bytes:
+                break
+            self._apagar(entrada["id"])
+            del indice[entrada["id"]]
+            total -= entrada["bytes"]
+
+    def _apagar(self, id_referencia: str) -> None:
+        # Processos que ainda têm o arquivo mapeado continuam lendo até liberar
+        try:
+            os.remove(self._caminho(id_referencia))
+        except FileNotFoundError:
+            pass
+
+    def publicar(self, df: "pd.DataFrame", nome: str = "", ano_ref: Optional[int] = None) -> dict:
+        """Grava o DataFrame normalizado como nova referência e retorna sua descrição."""
+        id_referencia = uuid.uuid4().hex
+        caminho = self._caminho(id_referencia)
+        os.makedirs(self.diretorio, exist_ok=True)
+        tmp = caminho + ".tmp"
+        try:
+            tamanho = gravar_referencia(tmp, df, {"nome": nome, "ano_ref": ano_ref})
+            os.rename(tmp, caminho)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        agora = time.time()
+        with self._indice() as indice:
+            indice[id_referencia] = {
+                "id": id_referencia,
+                "nome": nome,
+                "linhas": len(df),
+                "bytes": tamanho,
+                "criado_em": agora,
+                "ultimo_uso": agora,
+                "usos": {},
+            }
+            self._descartar_excedentes(indice, manter=id_referencia)
+            return self._descricao(indice[id_referencia])
+
+    def listar(self) -> List[dict]:
+        """Referências publicadas, mais recentes primeiro."""
+        with self._indice() as indice:
+            return sorted((self._descricao(e) for e in indice.values()), key=lambda e: -e["criado_em"])
+
+    def descrever(self, id_referencia: str) -> dict:
+        self._caminho(id_referencia)
+        with self._indice() as indice:
+            if id_referencia not in indice:
+                raise ReferenciaNaoEncontrada(id_referencia)
+            return self._descricao(indice[id_referencia])
+
+    def remover(self, id_referencia: str) -> bool:
+        """Remove do índice e apaga o arquivo; quem já está usando termina normalmente."""
+        self._caminho(id_referencia)
+        with self._indice() as indice:
+            if indice.pop(id_referencia, None) is None:
+                return False
+            self._apagar(id_referencia)
+            return True
+
+    @contextmanager
+    def anexar(self, id_referencia: str) -> Iterator[ReferenciaColunar]:
+        """Mapeia a referência durante o bloco, contando o uso deste processo no índice."""
+        caminho = self._caminho(id_referencia)
+        pid = str(os.getpid())
+        with self._indice() as indice:
+            entrada = indice.get(id_referencia)
+            if entrada is None:
+                raise ReferenciaNaoEncontrada(id_referencia)
+            entrada["usos"][pid] = entrada["usos"].get(pid, 0) + 1
+            entrada["ultimo_uso"] = time.time()
+
+        try:
+            try:
+                referencia = ReferenciaColunar(caminho)
+            except FileNotFoundError:
+                raise ReferenciaNaoEncontrada(id_referencia)
+            try:
+                yield referencia
+            finally:
+                referencia.fechar()
+        finally:
+            with self._indice() as indice:
+                entrada = indice.get(id_referencia)
+                if entrada is not None and pid in entrada["usos"]:
+                    entrada["usos"][pid] -= 1
+                    if entrada["usos"][pid] <= 0:
+                        del entrada["usos"][pid]
@@ -0,0 +1,134 @@
+"""
+Recebimento de uploads em disco e orçamento de memória por requisição.
+Os arquivos são gravados em blocos num arquivo temporário (nunca inteiros em memória)
+e o custo de processamento é estimado pelas dimensões do arquivo antes do parse.
+"""
+import asyncio
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import UploadFile
+
+# Tamanho do bloco lido do upload a cada iteração
+TAMANHO_BLOCO = 1024 * 1024
+
+# Estimativa de memória por célula lida (objeto Python no DataFrame bruto + cópias do parse)
+BYTES_POR_CELULA = 160
+
+# Estimativa de memória por linha no pipeline (normalização, Registros e dicts de resultado)
+BYTES_POR_LINHA = 3 * 1024
+
+# Por linha de uma referência publicada numa conciliação: sem parse nem Registros (os
+# matchings leem os buffers compartilhados), só os dicts de resultado das duas análises
+BYTES_POR_LINHA_REFERENCIA = 1024
+
+
+class ArquivoMuitoGrande(ValueError):
+    """Upload excedeu o tamanho máximo configurado."""
+
+
+class OrcamentoExcedido(RuntimeError):
+    """Não há memória disponível no orçamento para processar a requisição."""
+
+
+class PlanilhaAcimaDoOrcamento(OrcamentoExcedido):
+    """A estimativa sozinha já excede o orçamento inteiro (não adianta esperar)."""
+
+
+async def salvar_upload(
+    upload: UploadFile,
+    limite_bytes: int,
+    diretorio: Optional[str] = None,
+) -> str:
+    """
+    Copia o upload em blocos para um arquivo temporário e retorna o caminho.
+    Levanta ArquivoMuitoGrande (removendo o temporário) se passar de limite_bytes.
+    """
+    _, ext = os.path.splitext(upload.filename or "")
+    fd, caminho = tempfile.mkstemp(suffix=ext.lower(), prefix="upload_", dir=diretorio)
+    total = 0
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            while True:
+                bloco = await upload.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                total += len(bloco)
+                if total > limite_bytes:
+                    raise ArquivoMuitoGrande(
+                        f"{upload.filename} excede o tamanho máximo de {limite_bytes // (1024 * 1024)} MB"
+                    )
+                destino.write(bloco)
+    except BaseException:
+        os.remove(caminho)
+        raise
+    finally:
+        await upload.close()
+    return caminho
+
+
+def estimar_memoria(caminho: str) -> int:
+    """
+    Estima, em bytes, o pico de memória para processar o arquivo.
+    Usa linhas x colunas de cada aba quando o formato as informa sem carregar células
+    (cabeçalho do .xlsx, metadados do .parquet); senão, o tamanho do arquivo.
+    """
+    from conciliacao.leitores import leitor_para
+
+    leitor = leitor_para(caminho)
+    try:
+        dimensoes = leitor.dimensoes(caminho)
+    except Exception as e:
+        raise ValueError(f"Arquivo inválido ou corrompido: {e}")
+
+    if not dimensoes:
+        return os.path.getsize(caminho) * leitor.fator_memoria
+    return sum(linhas * (colunas * BYTES_POR_CELULA + BYTES_POR_LINHA) for linhas, colunas in dimensoes)
+
+
+class OrcamentoMemoria:
+    """
+    Orçamento de memória compartilhado pelas requisições de um processo.
+    Requisições que não cabem esperam na fila até espera_maxima_s; depois são recusadas.
+    """
+
+    def __init__(self, limite_bytes: int, espera_maxima_s: float = 30.0):
+        self.limite_bytes = limite_bytes
+        self.espera_maxima_s = espera_maxima_s
+        self.em_uso = 0
+        self._condicao: Optional[asyncio.Condition] = None
+
+    def _cond(self) -> asyncio.Condition:
+        # Criada sob demanda para ficar presa ao event loop do servidor
+        if self._condicao is None:
+            self._condicao = asyncio.Condition()
+        return self._condicao
+
+    @asynccontextmanager
+    async def reservar(self, estimativa: int) -> AsyncIterator[None]:
+        """Reserva estimativa bytes durante o bloco; levanta OrcamentoExcedido se não couber."""
+        if estimativa > self.limite_bytes:
+            raise PlanilhaAcimaDoOrcamento(
+                f"Planilhas grandes demais para processar: estimativa de "
+                f"{estimativa // (1024 * 1024)} MB excede o orçamento de {self.limite_bytes // (1024 * 1024)} MB"
+            )
+
+        cond = self._cond()
+        async with cond:
+            try:
+                await asyncio.wait_for(
+                    cond.wait_for(lambda: self.em_uso + estimativa <= self.limite_bytes),
+                    timeout=self.espera_maxima_s,
+                )
+            except asyncio.TimeoutError:
+                raise OrcamentoExcedido("Servidor ocupado processando outras conciliações. Tente novamente.")
+            self.em_uso += estimativa
+
+        try:
+            yield
+        finally:
+            async with cond:
+                self.em_uso -= estimativa
+                cond.notify_all()
@@ -0,0 +1,25 @@
+"""
+Perfil de produção: gunicorn com workers uvicorn e app pré-carregado.
+O processo mestre importa e aquece o pipeline uma vez; os workers nascem por fork
+já com pandas/openpyxl/rapidfuzz carregados (memória compartilhada copy-on-write).
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT_S", "180"))
+graceful_timeout = 30
+keepalive = 5
+
+# O aquecimento do mestre vale para todos os workers: o lifespan não aquece de novo
+os.environ["AQUECER_PIPELINE"] = "0"
+
+
+def on_starting(server):
+    """Aquece no mestre (após o preload), antes do fork dos workers."""
+    from aquecimento import aquecer_pipeline
+
+    duracao = aquecer_pipeline()
+    server.log.info("Pipeline aquecido em %.2fs", duracao)
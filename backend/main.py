@@ -1,22 +1,58 @@
 """
 API FastAPI para conciliação financeira.
 """
+import logging
 import os
-from io import BytesIO
+import sys
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from typing import Union
-
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, Query, Request, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from conciliacao.cubo import DIMENSOES_CUBO, consultar_cubo
+from conciliacao.execucoes import ANALISES, ExecucaoNaoEncontrada, RepositorioExecucoes
+from conciliacao.exportacao import PDF_MAX_LINHAS, gerar_csv, gerar_pdf, gerar_xlsx
+from conciliacao.historico import DIMENSOES, ORIGENS_ALIAS, HistoricoConciliacoes
+from conciliacao.referencias import ReferenciaNaoEncontrada, RepositorioReferencias
+# pandas, openpyxl e rapidfuzz são importados só no caminho de processamento
+# (ou no aquecimento), para o /health responder sem pagar esse custo.
+from conciliacao.uploads import (
+    BYTES_POR_LINHA_REFERENCIA,
+    ArquivoMuitoGrande,
+    OrcamentoExcedido,
+    OrcamentoMemoria,
+    PlanilhaAcimaDoOrcamento,
+    estimar_memoria,
+    salvar_upload,
+)
+from schemas import AliasFornecedorSchema, RespostaConciliacaoSchema
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Carrega o dicionário de aliases de fornecedor e, com AQUECER_PIPELINE=1, só aceita
+    requisições depois de aquecer o pipeline. No desligamento encerra o pool de leitura de abas.
+    """
+    await run_in_threadpool(_aliases_atuais)
+    if os.getenv("AQUECER_PIPELINE", "0") == "1":
+        from aquecimento import aquecer_pipeline
+
+        await run_in_threadpool(aquecer_pipeline)
+    yield
+    # Só se o parser foi carregado: importá-lo aqui traria o pandas só para desligar
+    parsers = sys.modules.get("conciliacao.parsers")
+    if parsers is not None:
+        await run_in_threadpool(parsers.encerrar_pool)
 
-from conciliacao.parsers import carregar_e_detectar
-from conciliacao.normalizacao import aplicar_normalizacao
-from conciliacao.matching import executar_matching, ResultadoMatch
-from conciliacao.matching_centro_custo import executar_matching_centro_custo, ResultadoMatchCentroCusto
-from conciliacao.cheques import checar_info_faltante, checar_alertas_diarios, agrupar_por_data
-from schemas import RespostaConciliacaoSchema, ResumoSchema, ResultadoItemSchema, AlertaDiarioSchema, PorDataSchema, AnaliseSchema
 
-app = FastAPI(title="API Conciliação Financeira")
+app = FastAPI(title="API Conciliação Financeira", lifespan=lifespan)
 
 _cors_origins = os.getenv(
     "CORS_ORIGINS",
@@ -31,16 +67,114 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Limites por arquivo e orçamento de memória por processo (MB). Com PARSER_WORKERS > 1 os
+# processos do pool de leitura de abas (PARSER_WORKER_MB cada) saem do orçamento.
+_MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "50")) * 1024 * 1024
+_parser_workers = int(os.getenv("PARSER_WORKERS", "1"))
+_reserva_parser_mb = _parser_workers * int(os.getenv("PARSER_WORKER_MB", "150")) if _parser_workers > 1 else 0
+_orcamento = OrcamentoMemoria(
+    limite_bytes=max(int(os.getenv("MEMORIA_ORCAMENTO_MB", "600")) - _reserva_parser_mb, 0) * 1024 * 1024,
+    espera_maxima_s=float(os.getenv("MEMORIA_ESPERA_S", "30")),
+)
+
+# Resultados de cada execução ficam em disco para exportação no servidor
+_execucoes = RepositorioExecucoes(
+    diretorio=os.getenv("EXECUCOES_DIR") or None,
+    ttl_s=float(os.getenv("EXECUCOES_TTL_H", "24")) * 3600,
+)
+
+# Histórico permanente (SQLite) para consultas de tendência entre execuções; o banco só é
+# aberto (e criado) na primeira consulta, no lifespan de cada worker
+_historico = HistoricoConciliacoes(
+    os.getenv("HISTORICO_DB") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "historico.sqlite3"),
+    limiar_alias=float(os.getenv("ALIAS_SCORE_MINIMO", "0.9")),
+)
+
+# Aliases de fornecedor em memória; recarregados quando o banco muda (ex: outro worker aprendeu)
+_aliases: Dict[str, Tuple[str, float]] = {}
+_versao_aliases: Optional[Tuple[int, float]] = None
+
+
+def _aliases_atuais() -> Dict[str, Tuple[str, float]]:
+    global _aliases, _versao_aliases
+    try:
+        versao = _historico.versao_aliases()
+        if versao != _versao_aliases:
+            _aliases, _versao_aliases = _historico.carregar_aliases(), versao
+    except Exception:
+        logger.exception("Falha ao carregar aliases de fornecedor; seguindo com os já carregados")
+    return _aliases
+
+
+# Referências publicadas, mapeadas em memória e compartilhadas entre os workers
+_referencias = RepositorioReferencias(
+    diretorio=os.getenv("REFERENCIAS_DIR") or None,
+    limite_bytes=int(os.getenv("REFERENCIAS_MAX_MB", "1024")) * 1024 * 1024,
+)
+
+
+@app.middleware("http")
+async def limitar_tamanho_requisicao(request: Request, call_next):
+    """Recusa uploads pelo Content-Length antes de o corpo ser recebido."""
+    tamanho = request.headers.get("content-length")
+    # Dois arquivos + folga para os cabeçalhos multipart
+    if tamanho and tamanho.isdigit() and int(tamanho) > 2 * _MAX_UPLOAD_BYTES + 64 * 1024:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Requisição excede o tamanho máximo de {_MAX_UPLOAD_BYTES // (1024 * 1024)} MB por arquivo"},
+        )
+    return await call_next(request)
+
+
+def _checar_extensao(upload: UploadFile, campo: str) -> None:
+    from conciliacao.leitores import extensoes_suportadas
 
-def _resultado_to_dict(r: Union[ResultadoMatch, ResultadoMatchCentroCusto]) -> dict:
-    return {
-        "status": r.status,
-        "referencia": r.referencia,
-        "comparacao": r.comparacao,
-        "score_nome": r.score_nome,
-        "diferenca_valor": r.diferenca_valor,
-        "alerta": r.alerta,
-    }
+    extensoes = tuple(extensoes_suportadas())
+    if not upload.filename or not upload.filename.lower().endswith(extensoes):
+        raise HTTPException(400, f"{campo} deve ser um arquivo {', '.join(extensoes)}")
+
+
+async def _processar_uploads(
+    uploads: List[UploadFile],
+    processar: Callable[..., Any],
+    *args: Any,
+    memoria_extra: int = 0,
+) -> Any:
+    """
+    Grava os uploads em disco, reserva no orçamento a memória estimada para eles (mais
+    memoria_extra, o que a requisição usa além dos uploads) e roda processar(*caminhos, *args)
+    numa thread. Os arquivos temporários são removidos no fim.
+    """
+    caminhos: list[str] = []
+    try:
+        try:
+            for upload in uploads:
+                caminhos.append(await salvar_upload(upload, _MAX_UPLOAD_BYTES))
+        except ArquivoMuitoGrande as e:
+            raise HTTPException(413, str(e))
+        except Exception as e:
+            raise HTTPException(400, f"Erro ao ler arquivos: {e}")
+
+        try:
+            estimativa = memoria_extra
+            for caminho in caminhos:
+                estimativa += await run_in_threadpool(estimar_memoria, caminho)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+        try:
+            async with _orcamento.reservar(estimativa):
+                return await run_in_threadpool(processar, *caminhos, *args)
+        except PlanilhaAcimaDoOrcamento as e:
+            raise HTTPException(413, str(e))
+        except OrcamentoExcedido as e:
+            raise HTTPException(503, str(e), headers={"Retry-After": "30"})
+    finally:
+        for caminho in caminhos:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
 
 
 @app.post("/conciliar", response_model=RespostaConciliacaoSchema)
@@ -49,107 +183,308 @@ async def conciliar(
     arquivo_comparacao: UploadFile = File(...),
 ):
     """
-    Recebe dois arquivos .xlsx (referência e comparação), processa em memória
-    e retorna o resultado da conciliação.
+    Recebe dois arquivos .xlsx, .csv ou .parquet (referência e comparação), grava em disco,
+    processa dentro do orçamento de memória e retorna o resultado da conciliação.
     """
-    if not arquivo_referencia.filename or not arquivo_referencia.filename.lower().endswith(".xlsx"):
-        raise HTTPException(400, "arquivo_referencia deve ser um arquivo .xlsx")
-    if not arquivo_comparacao.filename or not arquivo_comparacao.filename.lower().endswith(".xlsx"):
-        raise HTTPException(400, "arquivo_comparacao deve ser um arquivo .xlsx")
+    _checar_extensao(arquivo_referencia, "arquivo_referencia")
+    _checar_extensao(arquivo_comparacao, "arquivo_comparacao")
+    return await _processar_uploads(
+        [arquivo_referencia, arquivo_comparacao],
+        _processar_conciliacao,
+        (arquivo_referencia.filename, arquivo_comparacao.filename),
+    )
 
-    try:
-        ref_bytes = await arquivo_referencia.read()
-        comp_bytes = await arquivo_comparacao.read()
-    except Exception as e:
-        raise HTTPException(400, f"Erro ao ler arquivos: {e}")
+
+def _carregar(caminho: str):
+    from conciliacao.parsers import carregar_e_detectar
 
     try:
-        df_ref_raw, _ = carregar_e_detectar(ref_bytes)
-        df_comp_raw, _ = carregar_e_detectar(comp_bytes)
+        df, _ = carregar_e_detectar(caminho)
     except ValueError as e:
         raise HTTPException(400, str(e))
     except Exception as e:
         raise HTTPException(500, f"Erro ao processar planilhas: {e}")
+    return df
+
+
+def _processar_conciliacao(
+    caminho_ref: str,
+    caminho_comp: str,
+    nomes_arquivos: Optional[Tuple[str, str]] = None,
+) -> RespostaConciliacaoSchema:
+    """
+    Parse, normalização, matching e cheques (executado fora do event loop).
+    Com nomes_arquivos, a execução também é gravada no histórico.
+    """
+    from conciliacao.pipeline import ANO_REF_PADRAO, conciliar_dataframes
+
+    df_ref_raw = _carregar(caminho_ref)
+    df_comp_raw = _carregar(caminho_comp)
+    resposta = conciliar_dataframes(df_ref_raw, df_comp_raw, ano_ref=ANO_REF_PADRAO, aliases=_aliases_atuais())
+    return _registrar_resposta(resposta, nomes_arquivos)
+
+
+def _registrar_resposta(resposta: dict, nomes_arquivos: Optional[Tuple[str, str]]) -> RespostaConciliacaoSchema:
+    """Grava a execução para exportação (e no histórico, com nomes_arquivos) e monta a resposta."""
+    from conciliacao.pipeline import ANO_REF_PADRAO
+
+    analise_cc = resposta["analise_centro_custo"]
+
+    id_execucao = _execucoes.salvar(
+        {
+            "valor_data": {k: resposta[k] for k in ("resumo", "resultados", "por_data", "cubo")},
+            "centro_custo": analise_cc,
+        },
+        resposta["alertas_diarios"],
+    )
+
+    if nomes_arquivos is not None:
+        # Falha no histórico não invalida a conciliação já feita
+        try:
+            _historico.registrar(id_execucao, resposta, ANO_REF_PADRAO, "api", *nomes_arquivos)
+        except Exception:
+            logger.exception("Falha ao gravar execução %s no histórico", id_execucao)
+
+    return RespostaConciliacaoSchema(id_execucao=id_execucao, **resposta)
+
+
+@app.post("/referencias")
+async def publicar_referencia(arquivo_referencia: UploadFile = File(...)):
+    """
+    Publica uma planilha de referência (Modelo 1) já normalizada em memória compartilhada,
+    para conciliar várias comparações contra ela sem reenviar nem reprocessar.
+    """
+    _checar_extensao(arquivo_referencia, "arquivo_referencia")
+    return await _processar_uploads([arquivo_referencia], _publicar_referencia, arquivo_referencia.filename)
+
+
+def _publicar_referencia(caminho: str, nome: str) -> dict:
+    from conciliacao.normalizacao import aplicar_normalizacao
+    from conciliacao.pipeline import ANO_REF_PADRAO
+
+    df = aplicar_normalizacao(_carregar(caminho), ano_ref=ANO_REF_PADRAO)
+    return _referencias.publicar(df, nome, ANO_REF_PADRAO)
 
-    # Normalizar (usar ano da comparação se houver datas com ano)
-    ano_ref = 2026  # default; poderia inferir da planilha de comparação
-    df_ref = aplicar_normalizacao(df_ref_raw, ano_ref=ano_ref)
-    df_comp = aplicar_normalizacao(df_comp_raw, ano_ref=ano_ref)
-
-    # Matching (valor + data)
-    resultados_match = executar_matching(df_ref, df_comp, tolerancia_valor=0.01)
-
-    # Matching (valor + data + centro de custo)
-    resultados_centro = executar_matching_centro_custo(df_ref, df_comp, tolerancia_valor=0.01)
-
-    # Cheques adicionais
-    alertas_info = checar_info_faltante(df_ref, "ref")
-    alertas_diarios = checar_alertas_diarios(df_ref, df_comp)
-    grupos_data = agrupar_por_data(df_ref, df_comp)
-
-    # Montar lista de resultados (match + info_faltante)
-    resultados: list[dict] = [_resultado_to_dict(r) for r in resultados_match]
-    resultados.extend(alertas_info)
-
-    # Resumo
-    ok = sum(1 for r in resultados_match if r.status == "ok")
-    div = sum(1 for r in resultados_match if r.status == "divergente")
-    nao = sum(1 for r in resultados_match if r.status == "nao_encontrado")
-    info = len(alertas_info)
-
-    resumo = ResumoSchema(
-        total_referencia=len(df_ref),
-        total_comparacao=len(df_comp),
-        matches_confirmados=ok,
-        divergentes=div,
-        nao_encontrados=nao,
-        info_faltante=info,
-        total_alertas_diarios=len(alertas_diarios),
+
+@app.get("/referencias")
+async def listar_referencias():
+    """Referências publicadas, com tamanho e quantos usos estão em andamento."""
+    return await run_in_threadpool(_referencias.listar)
+
+
+@app.delete("/referencias/{id_referencia}")
+async def remover_referencia(id_referencia: str):
+    """Remove uma referência publicada; conciliações em andamento com ela terminam normalmente."""
+    try:
+        removida = await run_in_threadpool(_referencias.remover, id_referencia)
+    except ReferenciaNaoEncontrada:
+        removida = False
+    if not removida:
+        raise HTTPException(404, "Referência não encontrada")
+    return {"removida": id_referencia}
+
+
+@app.post("/referencias/{id_referencia}/conciliar", response_model=RespostaConciliacaoSchema)
+async def conciliar_com_referencia(id_referencia: str, arquivo_comparacao: UploadFile = File(...)):
+    """
+    Concilia uma planilha de comparação contra uma referência publicada. O orçamento conta
+    o upload e os resultados das linhas da referência (que não é reprocessada).
+    """
+    _checar_extensao(arquivo_comparacao, "arquivo_comparacao")
+    try:
+        descricao = await run_in_threadpool(_referencias.descrever, id_referencia)
+    except ReferenciaNaoEncontrada:
+        raise HTTPException(404, "Referência não encontrada ou descartada. Publique novamente.")
+    return await _processar_uploads(
+        [arquivo_comparacao],
+        _processar_com_referencia,
+        id_referencia,
+        (descricao["nome"], arquivo_comparacao.filename),
+        memoria_extra=descricao["linhas"] * BYTES_POR_LINHA_REFERENCIA,
     )
 
-    # Vincular resultados a cada data
-    por_data_map = {g["data"]: {**g, "resultados": []} for g in grupos_data}
-    for r in resultados:
-        data_ref = r.get("referencia", {}).get("data", "")
-        if data_ref and data_ref in por_data_map:
-            por_data_map[data_ref]["resultados"].append(r)
-
-    por_data_list = [PorDataSchema(**v) for v in por_data_map.values()]
-
-    # Montar analise_centro_custo
-    resultados_centro_dict = [_resultado_to_dict(r) for r in resultados_centro]
-    ok_cc = sum(1 for r in resultados_centro if r.status == "ok")
-    div_cc = sum(1 for r in resultados_centro if r.status == "divergente")
-    nao_cc = sum(1 for r in resultados_centro if r.status == "nao_encontrado")
-    resumo_cc = ResumoSchema(
-        total_referencia=len(df_ref),
-        total_comparacao=len(df_comp),
-        matches_confirmados=ok_cc,
-        divergentes=div_cc,
-        nao_encontrados=nao_cc,
-        info_faltante=0,
-        total_alertas_diarios=len(alertas_diarios),
+
+def _processar_com_referencia(
+    caminho_comp: str,
+    id_referencia: str,
+    nomes_arquivos: Tuple[str, str],
+) -> RespostaConciliacaoSchema:
+    from conciliacao.pipeline import ANO_REF_PADRAO, conciliar_com_referencia as conciliar
+
+    df_comp_raw = _carregar(caminho_comp)
+    try:
+        with _referencias.anexar(id_referencia) as referencia:
+            resposta = conciliar(referencia, df_comp_raw, ano_ref=ANO_REF_PADRAO, aliases=_aliases_atuais())
+    except ReferenciaNaoEncontrada:
+        raise HTTPException(404, "Referência não encontrada ou descartada. Publique novamente.")
+    return _registrar_resposta(resposta, nomes_arquivos)
+
+
+_FORMATOS_EXPORTACAO = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "pdf": "application/pdf",
+}
+
+# Linhas de resultado no PDF (o reportlab guarda as páginas em memória até o fim)
+_PDF_MAX_LINHAS = int(os.getenv("PDF_MAX_LINHAS", str(PDF_MAX_LINHAS)))
+
+
+@app.get("/execucoes/{id_execucao}/exportar")
+async def exportar(
+    id_execucao: str,
+    formato: str = "xlsx",
+    tipo: str = "divergentes",
+    analise: str = "valor_data",
+):
+    """
+    Gera o relatório (divergentes ou total) de uma execução e envia em streaming,
+    lendo os resultados do disco à medida que as linhas são escritas. O PDF traz no
+    máximo PDF_MAX_LINHAS linhas de resultado (padrão 5000) e avisa quantas omitiu;
+    XLSX e CSV não têm limite.
+    """
+    if formato not in _FORMATOS_EXPORTACAO:
+        raise HTTPException(400, "formato deve ser xlsx, csv ou pdf")
+    if tipo not in ("divergentes", "total"):
+        raise HTTPException(400, "tipo deve ser divergentes ou total")
+    if analise not in ANALISES:
+        raise HTTPException(400, f"analise deve ser uma de: {', '.join(ANALISES)}")
+
+    try:
+        resultados = _execucoes.iterar_resultados(id_execucao, analise)
+        resumo = _execucoes.ler_resumo(id_execucao, analise)
+        alertas = _execucoes.ler_alertas(id_execucao)
+        por_data = _execucoes.ler_por_data(id_execucao, analise)
+    except ExecucaoNaoEncontrada:
+        raise HTTPException(404, "Execução não encontrada ou expirada. Refaça a conciliação.")
+
+    if formato == "xlsx":
+        corpo = gerar_xlsx(resultados, resumo, alertas, tipo, por_data)
+    elif formato == "csv":
+        corpo = gerar_csv(resultados, tipo)
+    else:
+        corpo = gerar_pdf(resultados, resumo, alertas, tipo, max_linhas=_PDF_MAX_LINHAS)
+
+    nome = f"conciliacao_{tipo}_{date.today().isoformat()}.{formato}"
+    return StreamingResponse(
+        corpo,
+        media_type=_FORMATOS_EXPORTACAO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}"'},
     )
-    por_data_map_cc = {g["data"]: {**g, "resultados": []} for g in grupos_data}
-    for r in resultados_centro_dict:
-        data_ref = r.get("referencia", {}).get("data", "")
-        if data_ref and data_ref in por_data_map_cc:
-            por_data_map_cc[data_ref]["resultados"].append(r)
-    por_data_list_cc = [PorDataSchema(**v) for v in por_data_map_cc.values()]
-
-    return RespostaConciliacaoSchema(
-        resumo=resumo,
-        resultados=resultados,
-        alertas_diarios=[AlertaDiarioSchema(**a) for a in alertas_diarios],
-        por_data=por_data_list,
-        analise_centro_custo=AnaliseSchema(
-            resumo=resumo_cc,
-            resultados=resultados_centro_dict,
-            por_data=por_data_list_cc,
-        ),
+
+
+@app.get("/execucoes/{id_execucao}/cubo")
+async def cubo_execucao(
+    id_execucao: str,
+    analise: str = "valor_data",
+    agrupar: List[str] = Query([]),
+    data: List[str] = Query([]),
+    centro_custo: List[str] = Query([]),
+    departamento: List[str] = Query([]),
+    status: List[str] = Query([]),
+):
+    """
+    Quantidade e total (centavos) de cada planilha somados do cubo da execução, agrupados
+    pelas dimensões de `agrupar` (nenhuma: só o total). Os filtros por dimensão (repetíveis,
+    ex: ?agrupar=departamento&centro_custo=ADM) detalham uma célula de um agrupamento anterior.
+    """
+    if analise not in ANALISES:
+        raise HTTPException(400, f"analise deve ser uma de: {', '.join(ANALISES)}")
+    filtros = dict(zip(DIMENSOES_CUBO, (data, centro_custo, departamento, status)))
+    try:
+        cubo = await run_in_threadpool(_execucoes.ler_cubo, id_execucao, analise)
+        return await run_in_threadpool(consultar_cubo, cubo, agrupar, filtros)
+    except ExecucaoNaoEncontrada:
+        raise HTTPException(404, "Execução não encontrada ou expirada. Refaça a conciliação.")
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+@app.get("/historico/execucoes")
+async def historico_execucoes(limite: int = 50):
+    """Execuções gravadas no histórico, mais recentes primeiro."""
+    return await run_in_threadpool(_historico.listar_execucoes, min(max(limite, 1), 1000))
+
+
+@app.delete("/historico/execucoes/{id_execucao}")
+async def historico_remover(id_execucao: str):
+    """Remove uma execução do histórico (ex: planilha enviada em duplicidade)."""
+    if not await run_in_threadpool(_historico.remover_execucao, id_execucao):
+        raise HTTPException(404, "Execução não encontrada no histórico")
+    return {"removida": id_execucao}
+
+
+@app.get("/historico/tendencias")
+async def historico_tendencias(
+    dimensao: str = "fornecedor",
+    status: str = "nao_encontrado",
+    meses: int = 3,
+    min_meses: Optional[int] = None,
+    analise: str = "valor_data",
+    limite: int = 100,
+):
+    """
+    Fornecedores ou centros de custo com resultados `status` em pelo menos `min_meses`
+    das últimas `meses` competências (padrão: em todas), ex: não encontrados 3 meses seguidos.
+    """
+    if dimensao not in DIMENSOES:
+        raise HTTPException(400, f"dimensao deve ser uma de: {', '.join(DIMENSOES)}")
+    if analise not in ANALISES:
+        raise HTTPException(400, f"analise deve ser uma de: {', '.join(ANALISES)}")
+    if meses < 1:
+        raise HTTPException(400, "meses deve ser maior que zero")
+    return await run_in_threadpool(
+        _historico.tendencias, dimensao, status, meses, min_meses, analise, min(max(limite, 1), 1000)
     )
 
 
+@app.get("/historico/serie")
+async def historico_serie(dimensao: str, chave: str, analise: str = "valor_data"):
+    """Quantidade e valor por competência e status de um fornecedor ou centro de custo."""
+    if dimensao not in DIMENSOES:
+        raise HTTPException(400, f"dimensao deve ser uma de: {', '.join(DIMENSOES)}")
+    if analise not in ANALISES:
+        raise HTTPException(400, f"analise deve ser uma de: {', '.join(ANALISES)}")
+    return await run_in_threadpool(_historico.serie, dimensao, chave, analise)
+
+
+@app.get("/historico/datas")
+async def historico_datas(inicio: Optional[date] = None, fim: Optional[date] = None):
+    """Totais diários (Ref x Comp) somados entre execuções no intervalo."""
+    return await run_in_threadpool(
+        _historico.totais_por_data,
+        inicio.isoformat() if inicio else None,
+        fim.isoformat() if fim else None,
+    )
+
+
+@app.get("/aliases")
+async def listar_aliases(origem: Optional[str] = None, limite: int = 500):
+    """Aliases de fornecedor (nome normalizado na referência -> na comparação), mais recentes primeiro."""
+    if origem is not None and origem not in ORIGENS_ALIAS:
+        raise HTTPException(400, f"origem deve ser uma de: {', '.join(ORIGENS_ALIAS)}")
+    return await run_in_threadpool(_historico.listar_aliases, origem, min(max(limite, 1), 10000))
+
+
+@app.post("/aliases")
+async def confirmar_alias(alias: AliasFornecedorSchema):
+    """Confirmação do usuário de que os dois nomes são o mesmo fornecedor (prevalece sobre o aprendido)."""
+    try:
+        return await run_in_threadpool(
+            _historico.confirmar_alias, alias.fornecedor_referencia, alias.fornecedor_comparacao
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+
+@app.delete("/aliases")
+async def remover_alias(fornecedor_referencia: str):
+    """Remove o alias de um fornecedor da referência."""
+    if not await run_in_threadpool(_historico.remover_alias, fornecedor_referencia):
+        raise HTTPException(404, "Alias não encontrado")
+    return {"removido": fornecedor_referencia}
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
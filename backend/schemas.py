@@ -1,7 +1,7 @@
 """
 Pydantic schemas para request/response da API.
 """
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -21,6 +21,7 @@ class ResultadoItemSchema(BaseModel):
     score_nome: Optional[float] = None
     diferenca_valor: Optional[float] = None
     alerta: str = ""
+    alias_fornecedor: bool = False  # nomes casados pelo dicionário de aliases (score_nome segue o real)
 
 
 class AlertaDiarioSchema(BaseModel):
@@ -55,9 +56,17 @@ class AnaliseSchema(BaseModel):
     por_data: List[PorDataSchema] = []
 
 
+class AliasFornecedorSchema(BaseModel):
+    """Par de nomes confirmados como o mesmo fornecedor (referência -> comparação)."""
+    fornecedor_referencia: str
+    fornecedor_comparacao: str
+
+
 class RespostaConciliacaoSchema(BaseModel):
+    id_execucao: Optional[str] = None  # usado em /execucoes/{id}/exportar
     resumo: ResumoSchema
     resultados: List[ResultadoItemSchema]
     alertas_diarios: List[AlertaDiarioSchema]
     por_data: List[PorDataSchema] = []
     analise_centro_custo: Optional[AnaliseSchema] = None
+    tempos_etapas: Dict[str, float] = {}  # ms por etapa do pipeline
@@ -0,0 +1,70 @@
+"""
+Configuração comum dos testes (rodar a partir de backend/: python -m pytest).
+Histórico, execuções e referências da API apontam para um diretório temporário antes de
+importar main, para os testes nunca gravarem nos dados do app.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_DADOS = tempfile.mkdtemp(prefix="testes_conciliacao_")
+os.environ["HISTORICO_DB"] = os.path.join(_DADOS, "historico.sqlite3")
+os.environ["EXECUCOES_DIR"] = os.path.join(_DADOS, "execucoes")
+os.environ["REFERENCIAS_DIR"] = os.path.join(_DADOS, "referencias")
+os.environ.setdefault("PARSER_WORKERS", "2")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DADOS, ignore_errors=True)
+
+
+CABECALHO_REF = ["FORNECEDOR/COLABORADOR", "DATA", "VALOR", "CENTRO DE CUSTO", "Departamento"]
+CABECALHO_COMP = ["Fornecedor - nome", "Data pagamento", "Valor pagamento", "Centro custo", "Descrição"]
+
+
+def gravar_planilha(caminho, cabecalho, linhas, aba="Dados"):
+    """Grava uma planilha .xlsx de uma aba com cabeçalho e linhas."""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = aba
+    ws.append(cabecalho)
+    for linha in linhas:
+        ws.append(list(linha))
+    wb.save(caminho)
+    return str(caminho)
+
+
+@pytest.fixture(scope="session")
+def par_planilhas(tmp_path_factory):
+    """(referencia.xlsx, comparacao.xlsx) sintéticos com 300 lançamentos em janeiro/2026."""
+    from benchmarks.planilhas import gerar_par
+
+    return gerar_par(str(tmp_path_factory.mktemp("planilhas")), 300)
+
+
+@pytest.fixture(scope="session")
+def resposta_par(par_planilhas):
+    """Conciliação em memória de par_planilhas (conciliar_arquivos)."""
+    from conciliacao.pipeline import conciliar_arquivos
+
+    return conciliar_arquivos(*par_planilhas)
+
+
+@pytest.fixture
+def cliente():
+    """TestClient da API (executa o lifespan)."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as c:
+        yield c
@@ -0,0 +1,80 @@
+import sqlite3
+
+from rapidfuzz import fuzz
+
+from conciliacao.historico import HistoricoConciliacoes
+from conciliacao.normalizacao import normalizar_nome
+from conciliacao.pipeline import conciliar_arquivos
+from tests.conftest import CABECALHO_COMP, CABECALHO_REF, gravar_planilha
+
+REF = [
+    ("Distribuidora Andrade Irmaos", "05/01", "R$ 120,00", "MATRIZ", "ADM"),
+    ("Transportes Lima", "06/01", "R$ 80,00", "MATRIZ", "ADM"),
+]
+COMP = [
+    ("Distribuidora Andrade Irmao", "05/01/2026", 120.0, "MATRIZ", "Pagamento"),
+    ("TL Logistica", "06/01/2026", 80.0, "MATRIZ", "Pagamento"),
+]
+
+
+def _score_real(a, b):
+    return round(fuzz.ratio(normalizar_nome(a), normalizar_nome(b)) / 100.0, 2)
+
+
+def _conciliar(tmp_path, historico):
+    ref = gravar_planilha(tmp_path / "ref.xlsx", CABECALHO_REF, REF)
+    comp = gravar_planilha(tmp_path / "comp.xlsx", CABECALHO_COMP, COMP)
+    resposta = conciliar_arquivos(ref, comp, ano_ref=2026, aliases=historico.carregar_aliases())
+    return {r["referencia"]["fornecedor"]: r for r in resposta["resultados"]}, resposta
+
+
+def _alias(historico, fornecedor_ref):
+    chave = normalizar_nome(fornecedor_ref)
+    return next(a for a in historico.listar_aliases() if a["chave_ref"] == chave)
+
+
+def test_alias_aprendido_mantem_score_real_entre_execucoes(tmp_path):
+    historico = HistoricoConciliacoes(str(tmp_path / "h.sqlite3"))
+    real = _score_real(REF[0][0], COMP[0][0])
+    assert 0.9 <= real < 1.0
+
+    for i in range(3):
+        resultados, resposta = _conciliar(tmp_path, historico)
+        andrade = resultados[REF[0][0]]
+        assert andrade["score_nome"] == real
+        assert andrade["alias_fornecedor"] is (i > 0)
+        historico.registrar(f"e{i}", resposta, 2026)
+
+        alias = _alias(historico, REF[0][0])
+        assert (alias["score"], alias["ocorrencias"], alias["origem"]) == (real, 1, "automatico")
+
+    with sqlite3.connect(historico.caminho) as con:
+        scores = {s for (s,) in con.execute(
+            "SELECT score_nome FROM resultados WHERE fornecedor = ? AND analise = 'valor_data'", (REF[0][0],)
+        )}
+    assert scores == {real}
+
+
+def test_alias_confirmado_exibe_score_real(tmp_path):
+    historico = HistoricoConciliacoes(str(tmp_path / "h.sqlite3"))
+    real = _score_real(REF[1][0], COMP[1][0])
+    assert real < 0.9
+
+    historico.confirmar_alias(REF[1][0], COMP[1][0])
+    assert _alias(historico, REF[1][0])["score"] == real
+
+    resultados, _ = _conciliar(tmp_path, historico)
+    lima = resultados[REF[1][0]]
+    assert (lima["score_nome"], lima["alias_fornecedor"]) == (real, True)
+
+
+def test_alias_aprendido_e_confirmado_guardam_o_mesmo_score(tmp_path):
+    historico = HistoricoConciliacoes(str(tmp_path / "h.sqlite3"))
+    _, resposta = _conciliar(tmp_path, historico)
+    historico.registrar("e0", resposta, 2026)
+    aprendido = _alias(historico, REF[0][0])
+
+    historico.confirmar_alias(REF[0][0], COMP[0][0])
+    confirmado = _alias(historico, REF[0][0])
+    assert confirmado["origem"] == "usuario"
+    assert confirmado["score"] == aprendido["score"] == _score_real(REF[0][0], COMP[0][0])
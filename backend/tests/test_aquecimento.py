@@ -0,0 +1,55 @@
+import os
+import runpy
+import subprocess
+import sys
+
+from tests.conftest import BACKEND_DIR
+
+
+def test_aquecimento_nao_grava_execucao_nem_historico(monkeypatch):
+    import main
+    from aquecimento import aquecer_pipeline
+
+    def proibido(*args, **kwargs):
+        raise AssertionError("o aquecimento não deve gravar nada")
+
+    monkeypatch.setattr(main._execucoes, "salvar", proibido)
+    monkeypatch.setattr(main._historico, "registrar", proibido)
+    execucoes_antes = main._historico.listar_execucoes()
+
+    assert aquecer_pipeline() > 0
+    assert main._historico.listar_execucoes() == execucoes_antes
+
+
+def test_gunicorn_aquece_so_no_mestre(monkeypatch):
+    monkeypatch.setenv("AQUECER_PIPELINE", "1")
+    config = runpy.run_path(os.path.join(BACKEND_DIR, "gunicorn.conf.py"))
+
+    assert config["preload_app"] is True
+    assert callable(config["on_starting"])
+    assert os.environ["AQUECER_PIPELINE"] == "0"
+
+
+def test_lifespan_aquece_quando_pedido(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import aquecimento
+    import main
+
+    chamadas = []
+    monkeypatch.setattr(aquecimento, "aquecer_pipeline", lambda: chamadas.append(1) or 0.0)
+
+    monkeypatch.setenv("AQUECER_PIPELINE", "0")
+    with TestClient(main.app):
+        pass
+    monkeypatch.setenv("AQUECER_PIPELINE", "1")
+    with TestClient(main.app):
+        pass
+    assert chamadas == [1]
+
+
+def test_importar_main_nao_cria_dados(tmp_path):
+    banco = tmp_path / "dados" / "historico.sqlite3"
+    ambiente = {**os.environ, "HISTORICO_DB": str(banco), "EXECUCOES_DIR": str(tmp_path / "execucoes")}
+    subprocess.run([sys.executable, "-c", "import main"], cwd=BACKEND_DIR, env=ambiente, check=True)
+    assert not (tmp_path / "dados").exists()
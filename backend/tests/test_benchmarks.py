@@ -0,0 +1,24 @@
+import os
+
+from benchmarks.bench_inicializacao import ambiente_servidor
+from benchmarks.carga import _ler_mix, _percentil
+
+
+def test_servidor_do_benchmark_nao_usa_dados_do_app(tmp_path):
+    env = ambiente_servidor(8123, 3, str(tmp_path))
+    assert env["PORT"] == "8123"
+    assert env["WEB_CONCURRENCY"] == "3"
+    for variavel in ("HISTORICO_DB", "EXECUCOES_DIR", "REFERENCIAS_DIR"):
+        assert os.path.dirname(env[variavel]) == str(tmp_path)
+
+
+def test_percentil_posicao_mais_proxima():
+    valores = [float(v) for v in range(1, 101)]
+    assert _percentil(valores, 50) == 50
+    assert _percentil(valores, 95) == 95
+    assert _percentil(valores, 100) == 100
+    assert _percentil([3.0], 99) == 3.0
+
+
+def test_ler_mix():
+    assert _ler_mix(["500:6", "5000"]) == [(500, 6.0), (5000, 1.0)]
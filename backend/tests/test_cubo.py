@@ -0,0 +1,93 @@
+import pytest
+
+from conciliacao.cubo import SEM_REFERENCIA, STATUS_SEM_PAR, consultar_cubo
+
+
+def _centavos(valor):
+    return int(round(valor * 100))
+
+
+def _rollup_dos_resultados(resultados, total_comparacao):
+    """Totais por centro de custo da referência, calculados linha a linha na tabela de resultados."""
+    esperado = {}
+    casados = 0
+    for r in resultados:
+        if r["status"] == "info_faltante":
+            continue
+        linha = esperado.setdefault(r["referencia"]["centro_custo"].strip(), [0, 0, 0, 0])
+        linha[0] += 1
+        linha[1] += _centavos(r["referencia"]["valor"])
+        if r["comparacao"]:
+            casados += 1
+            linha[2] += 1
+            linha[3] += _centavos(r["comparacao"]["valor"])
+    return esperado, total_comparacao - casados
+
+
+@pytest.mark.parametrize("analise", ["valor_data", "centro_custo"])
+def test_rollup_por_centro_de_custo_bate_com_resultados(resposta_par, analise):
+    dados = resposta_par if analise == "valor_data" else resposta_par["analise_centro_custo"]
+    esperado, sem_par = _rollup_dos_resultados(dados["resultados"], dados["resumo"]["total_comparacao"])
+
+    linhas = consultar_cubo(dados["cubo"], ["centro_custo"])["linhas"]
+    obtido = {
+        l["centro_custo"]: [l["qtd_ref"], l["centavos_ref"], l["qtd_comp"], l["centavos_comp"]] for l in linhas
+    }
+
+    balde = obtido.pop(SEM_REFERENCIA)
+    assert balde[:3] == [0, 0, sem_par]
+    assert obtido == esperado
+    # Os centros da comparação ("RECIFE") não viram linhas próprias
+    assert "RECIFE" not in obtido
+
+
+def test_rollup_por_status_bate_com_resumo(resposta_par):
+    resumo = resposta_par["resumo"]
+    linhas = {l["status"]: l for l in consultar_cubo(resposta_par["cubo"], ["status"])["linhas"]}
+
+    assert linhas["ok"]["qtd_ref"] == linhas["ok"]["qtd_comp"] == resumo["matches_confirmados"]
+    assert linhas.get("divergente", {}).get("qtd_ref", 0) == resumo["divergentes"]
+    assert linhas["nao_encontrado"]["qtd_ref"] == resumo["nao_encontrados"]
+    assert linhas["nao_encontrado"]["qtd_comp"] == 0
+    total = consultar_cubo(resposta_par["cubo"])["total"]
+    assert (total["qtd_ref"], total["qtd_comp"]) == (resumo["total_referencia"], resumo["total_comparacao"])
+    assert linhas[STATUS_SEM_PAR]["qtd_comp"] == resumo["total_comparacao"] - resumo["matches_confirmados"] - resumo["divergentes"]
+
+
+def test_consultar_cubo_recusa_dimensao_invalida(resposta_par):
+    with pytest.raises(ValueError):
+        consultar_cubo(resposta_par["cubo"], ["fornecedor"])
+    with pytest.raises(ValueError):
+        consultar_cubo(resposta_par["cubo"], ["status", "status"])
+
+
+def test_endpoint_do_cubo(cliente, par_planilhas, resposta_par):
+    ref, comp = par_planilhas
+    with open(ref, "rb") as fr, open(comp, "rb") as fc:
+        resposta = cliente.post(
+            "/conciliar", files={"arquivo_referencia": ("ref.xlsx", fr), "arquivo_comparacao": ("comp.xlsx", fc)}
+        )
+    assert resposta.status_code == 200
+    id_execucao = resposta.json()["id_execucao"]
+
+    consulta = cliente.get(f"/execucoes/{id_execucao}/cubo", params={"agrupar": "centro_custo", "status": "ok"})
+    assert consulta.status_code == 200
+    assert consulta.json() == consultar_cubo(resposta_par["cubo"], ["centro_custo"], {"status": ["ok"]})
+
+    assert cliente.get(f"/execucoes/{id_execucao}/cubo", params={"agrupar": "fornecedor"}).status_code == 400
+
+
+def test_colunas_da_referencia_publicada_iguais_as_do_dataframe(tmp_path, par_planilhas):
+    from conciliacao.cubo import colunas_cubo
+    from conciliacao.normalizacao import aplicar_normalizacao
+    from conciliacao.parsers import carregar_e_detectar
+    from conciliacao.referencias import RepositorioReferencias
+
+    df = aplicar_normalizacao(carregar_e_detectar(par_planilhas[0])[0])
+    repositorio = RepositorioReferencias(str(tmp_path))
+    id_ref = repositorio.publicar(df)["id"]
+
+    esperado = colunas_cubo(df)
+    with repositorio.anexar(id_ref) as referencia:
+        obtido = [list(coluna) for coluna in referencia.colunas_cubo()]
+    assert obtido == [list(coluna) for coluna in esperado]
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from conciliacao.etapas import Etapa, executar_etapas
+
+
+def test_etapas_independentes_rodam_juntas_e_cada_uma_uma_vez():
+    chamadas = []
+    barreira = threading.Barrier(2, timeout=5)
+
+    def lado(x):
+        chamadas.append(x)
+        barreira.wait()  # só passa se as duas etapas estiverem rodando ao mesmo tempo
+        return x * 2
+
+    etapas = [
+        Etapa("soma", lambda a, b: a + b, ("dobro_a", "dobro_b")),
+        Etapa("dobro_a", lado, ("a",)),
+        Etapa("dobro_b", lado, ("b",)),
+    ]
+    artefatos, tempos = executar_etapas(etapas, {"a": 1, "b": 10}, max_workers=2)
+
+    assert artefatos["soma"] == 22
+    assert sorted(chamadas) == [1, 10]
+    assert set(tempos) == {"soma", "dobro_a", "dobro_b"}
+
+
+@pytest.mark.parametrize("etapas, mensagem", [
+    ([Etapa("x", lambda: 1), Etapa("x", lambda: 2)], "mais de uma vez"),
+    ([Etapa("a", lambda: 1)], "mais de uma vez"),
+    ([Etapa("x", lambda y: y, ("y",))], "sem etapa produtora"),
+    ([Etapa("x", lambda y: y, ("y",)), Etapa("y", lambda x: x, ("x",))], "Ciclo"),
+])
+def test_grafo_invalido(etapas, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        executar_etapas(etapas, {"a": 0})
+
+
+def test_erro_cancela_etapas_dependentes():
+    chamadas = []
+
+    def falha():
+        raise RuntimeError("quebrou")
+
+    etapas = [Etapa("x", falha), Etapa("y", lambda x: chamadas.append(x), ("x",))]
+    with pytest.raises(RuntimeError, match="quebrou"):
+        executar_etapas(etapas, {})
+    assert chamadas == []
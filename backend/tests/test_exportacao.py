@@ -0,0 +1,68 @@
+import csv
+import io
+import re
+
+import pytest
+
+from conciliacao.exportacao import (
+    COLUNAS_RESULTADOS,
+    STATUS_DIVERGENTES,
+    gerar_csv,
+    gerar_pdf,
+    gerar_xlsx,
+    resultado_para_linha,
+)
+
+
+def _vazio_para_none(valores):
+    return [None if v == "" else v for v in valores]
+
+
+@pytest.mark.parametrize("tipo", ["divergentes", "total"])
+def test_xlsx_ida_e_volta(resposta_par, tipo):
+    from openpyxl import load_workbook
+
+    resultados = resposta_par["resultados"]
+    esperados = [r for r in resultados if tipo == "total" or r["status"] in STATUS_DIVERGENTES]
+    corpo = b"".join(gerar_xlsx(
+        iter(resultados), resposta_par["resumo"], resposta_par["alertas_diarios"], tipo, resposta_par["por_data"]
+    ))
+
+    wb = load_workbook(io.BytesIO(corpo), read_only=True)
+    aba = "Todos" if tipo == "total" else "Divergentes"
+    assert wb.sheetnames[:2] == ["Resumo", aba]
+    linhas = [list(l) for l in wb[aba].iter_rows(values_only=True)]
+    assert linhas[0] == COLUNAS_RESULTADOS
+    assert linhas[1:] == [_vazio_para_none(resultado_para_linha(r)) for r in esperados]
+
+
+def test_csv_ida_e_volta(resposta_par):
+    resultados = resposta_par["resultados"]
+    texto = b"".join(gerar_csv(iter(resultados), "total")).decode("utf-8")
+    assert texto.startswith("﻿")
+
+    linhas = list(csv.reader(io.StringIO(texto[1:]), delimiter=";"))
+    assert linhas[0] == COLUNAS_RESULTADOS
+    assert len(linhas) == len(resultados) + 1
+    for linha, r in zip(linhas[1:], resultados):
+        ref = r["referencia"]
+        assert linha[:3] == [resultado_para_linha(r)[0], ref["data"], ref["fornecedor"]]
+        assert float(linha[3].replace(",", ".")) == pytest.approx(ref["valor"])
+        if r["comparacao"]:
+            assert float(linha[6].replace(",", ".")) == pytest.approx(r["comparacao"]["valor"])
+
+
+def _paginas(pdf: bytes) -> int:
+    return len(re.findall(rb"/Type /Page\b(?!s)", pdf))
+
+
+def test_pdf_limita_linhas(resposta_par):
+    resultados = resposta_par["resultados"]
+    args = (resposta_par["resumo"], [], "total")
+
+    completo = b"".join(gerar_pdf(iter(resultados), *args))
+    limitado = b"".join(gerar_pdf(iter(resultados), *args, max_linhas=10))
+
+    assert completo.startswith(b"%PDF") and limitado.startswith(b"%PDF")
+    assert _paginas(limitado) == 1
+    assert _paginas(completo) > 1
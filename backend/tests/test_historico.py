@@ -0,0 +1,84 @@
+import sqlite3
+
+from conciliacao.historico import HistoricoConciliacoes, _data_iso
+from conciliacao.pipeline import conciliar_arquivos
+from tests.conftest import CABECALHO_COMP, CABECALHO_REF, gravar_planilha
+
+
+def _executar(tmp_path, nome, ref, comp, ano_ref=2026):
+    caminho_ref = gravar_planilha(tmp_path / f"{nome}_ref.xlsx", CABECALHO_REF, ref)
+    caminho_comp = gravar_planilha(tmp_path / f"{nome}_comp.xlsx", CABECALHO_COMP, comp)
+    return conciliar_arquivos(caminho_ref, caminho_comp, ano_ref=ano_ref)
+
+
+def test_data_iso_ano_mais_proximo():
+    from datetime import date
+
+    assert _data_iso("31/12", 2026) == "2026-12-31"
+    assert _data_iso("31/12", 2026, date(2026, 1, 3)) == "2025-12-31"
+    assert _data_iso("02/01", 2025, date(2025, 12, 30)) == "2026-01-02"
+    assert _data_iso("29/02", 2026, date(2024, 3, 1)) == "2024-02-29"
+    assert _data_iso("", 2026) is None
+
+
+def test_execucao_na_virada_do_ano_usa_o_ano_das_planilhas(tmp_path):
+    # Referência só tem DD/MM; a comparação traz o ano (dez/2025 e jan/2026)
+    ref = [
+        ("Acme LTDA", "30/12", "R$ 100,00", "MATRIZ", "ADM"),
+        ("Beta ME", "31/12", "R$ 50,00", "MATRIZ", "ADM"),  # sem par na comparação
+        ("Acme LTDA", "02/01", "R$ 200,00", "MATRIZ", "ADM"),
+    ]
+    comp = [
+        ("Acme", "30/12/2025", 100.0, "MATRIZ", "Pagamento"),
+        ("Acme", "02/01/2026", 200.0, "MATRIZ", "Pagamento"),
+        ("Gama", "05/01/2026", 10.0, "MATRIZ", "Pagamento"),
+    ]
+    resposta = _executar(tmp_path, "virada", ref, comp, ano_ref=2026)
+    historico = HistoricoConciliacoes(str(tmp_path / "h.sqlite3"))
+    historico.registrar("e1", resposta, 2026)
+
+    with sqlite3.connect(historico.caminho) as con:
+        resultados = dict(con.execute(
+            "SELECT fornecedor || ' ' || valor, data FROM resultados WHERE analise = 'valor_data'"
+        ).fetchall())
+        agregados = dict(con.execute("SELECT data, competencia FROM agregados_data").fetchall())
+
+    assert resultados == {
+        "Acme LTDA 100.0": "2025-12-30",
+        "Beta ME 50.0": "2025-12-31",
+        "Acme LTDA 200.0": "2026-01-02",
+    }
+    assert agregados == {
+        "2025-12-30": "2025-12",
+        "2025-12-31": "2025-12",
+        "2026-01-02": "2026-01",
+        "2026-01-05": "2026-01",
+    }
+    assert [t["data"] for t in historico.totais_por_data("2025-12-01", "2025-12-31")] == ["2025-12-30", "2025-12-31"]
+
+
+def test_tendencias_entre_execucoes(tmp_path):
+    historico = HistoricoConciliacoes(str(tmp_path / "h.sqlite3"))
+    for i, mes in enumerate(("11/2025", "12/2025", "01/2026")):
+        dia = f"10/{mes[:2]}"
+        ref = [("Acme LTDA", dia, "R$ 100,00", "MATRIZ", "ADM"), ("Sumida ME", dia, "R$ 7,00", "MATRIZ", "ADM")]
+        comp = [("Acme", f"10/{mes}", 100.0, "MATRIZ", "Pagamento")]
+        historico.registrar(f"e{i}", _executar(tmp_path, f"m{i}", ref, comp), 2026)
+
+    tendencias = historico.tendencias(meses=3)
+    assert tendencias["competencias"] == ["2025-11", "2025-12", "2026-01"]
+    assert [item["chave"] for item in tendencias["itens"]] == ["sumida"]
+    assert len(historico.serie("fornecedor", "Sumida ME")) == 3
+
+    assert historico.remover_execucao("e0")
+    assert historico.tendencias(meses=3)["competencias"] == ["2025-12", "2026-01"]
+    assert len(historico.listar_execucoes()) == 2
+
+
+def test_banco_so_criado_na_primeira_operacao(tmp_path):
+    caminho = tmp_path / "dados" / "h.sqlite3"
+    historico = HistoricoConciliacoes(str(caminho))
+    assert not caminho.parent.exists()
+
+    assert historico.listar_execucoes() == []
+    assert caminho.exists()
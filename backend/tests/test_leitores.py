@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from conciliacao.leitores import Leitor, LeitorCsv
+from conciliacao.parsers import _texto, carregar_e_detectar
+
+CABECALHO = "FORNECEDOR/COLABORADOR;DATA;VALOR;CENTRO DE CUSTO;Departamento"
+
+
+def _csv(tmp_path, linhas, cabecalho=CABECALHO, nome="ref.csv"):
+    caminho = tmp_path / nome
+    caminho.write_text("\n".join([cabecalho, *linhas]) + "\n", encoding="utf-8")
+    return str(caminho)
+
+
+def test_leitor_exige_metodos_abstratos():
+    with pytest.raises(TypeError):
+        Leitor()
+
+    class SoCabecalhos(Leitor):
+        def cabecalhos(self, arquivo):
+            return [("", [])]
+
+    with pytest.raises(TypeError):
+        SoCabecalhos()
+
+
+@pytest.mark.parametrize(
+    "valores, esperados",
+    [
+        (["1.178,93", "460,00"], [1178.93, 460.0]),
+        (["1178.93", "460.00"], [1178.93, 460.0]),
+        (["1,178.93", "460.00"], [1178.93, 460.0]),
+        (["460"], [460.0]),
+    ],
+)
+def test_csv_ponto_e_virgula_detecta_separador_decimal(tmp_path, valores, esperados):
+    linhas = [f"Fornecedor {i};05/01;{v};MATRIZ;ADM" for i, v in enumerate(valores)]
+    df, modelo = carregar_e_detectar(_csv(tmp_path, linhas))
+
+    assert modelo == "modelo1"
+    assert [float(v) for v in df["valor_raw"]] == esperados
+
+
+def test_csv_virgula_usa_ponto_decimal(tmp_path):
+    caminho = _csv(tmp_path, ['"Acme, LTDA",05/01,460.00,MATRIZ,ADM'], CABECALHO.replace(";", ","))
+    assert LeitorCsv()._dialeto(caminho)["decimal"] == "."
+    df, _ = carregar_e_detectar(caminho)
+    assert float(df["valor_raw"].iloc[0]) == 460.0
+
+
+def test_texto_nao_converte_coluna_que_ja_e_str():
+    serie = pd.Series(["a", "b"], dtype=object)
+    assert _texto(serie) is serie
+    com_nulo = pd.Series(["a", None], dtype=object)
+    assert _texto(com_nulo).tolist() == com_nulo.astype(str).fillna("").tolist()
+    assert _texto(pd.Series([1, 2])).tolist() == ["1", "2"]
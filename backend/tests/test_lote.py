@@ -0,0 +1,98 @@
+import csv
+import os
+import sqlite3
+
+import pytest
+
+from conciliacao.lote import (
+    ESTADO, RESUMO_LOTE, ParConciliacao, _checar_nomes, descobrir_pares, executar_lote, processar_par,
+)
+from tests.conftest import CABECALHO_COMP, CABECALHO_REF, gravar_planilha
+
+REF = [("Acme LTDA", "05/01", "R$ 100,00", "MATRIZ", "ADM"), ("Beta ME", "06/01", "R$ 50,00", "MATRIZ", "ADM")]
+COMP = [("Acme", "05/01/2026", 100.0, "MATRIZ", "Pagamento"), ("Beta", "06/01/2026", 55.0, "MATRIZ", "Pagamento")]
+
+
+def _linhas_estado(saida):
+    with open(os.path.join(saida, ESTADO), encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def _resumo_lote(saida):
+    with open(os.path.join(saida, RESUMO_LOTE), encoding="utf-8", newline="") as f:
+        return {linha["nome"]: linha for linha in csv.DictReader(f)}
+
+
+@pytest.fixture
+def entradas(tmp_path):
+    diretorio = tmp_path / "entradas"
+    diretorio.mkdir()
+    for nome in ("janeiro", "fevereiro"):
+        gravar_planilha(diretorio / f"{nome}_ref.xlsx", CABECALHO_REF, REF)
+        gravar_planilha(diretorio / f"{nome}_comp.xlsx", CABECALHO_COMP, COMP)
+    gravar_planilha(diretorio / "quebrado_ref.xlsx", CABECALHO_REF, REF)
+    (diretorio / "quebrado_comp.csv").write_text("nada;a;ver\n1;2;3\n", encoding="utf-8")
+    return str(diretorio)
+
+
+def test_lote_retoma_do_estado(entradas, tmp_path):
+    saida = str(tmp_path / "saida")
+    pares = descobrir_pares(entradas)
+    assert [p.nome for p in pares] == ["fevereiro", "janeiro", "quebrado"]
+
+    estado = executar_lote(pares, saida, workers=2)
+    assert {n: r["status"] for n, r in estado.items()} == {"fevereiro": "ok", "janeiro": "ok", "quebrado": "erro"}
+    assert len(_linhas_estado(saida)) == 3
+    resumo = os.path.join(saida, "pares", "janeiro", "resumo.json")
+    modificado = os.path.getmtime(resumo)
+
+    # Traceback não vai para o resumo; só a mensagem de uma linha
+    linhas = _resumo_lote(saida)
+    assert "detalhe" not in linhas["quebrado"]
+    assert linhas["quebrado"]["erro"] and "\n" not in linhas["quebrado"]["erro"]
+    assert linhas["janeiro"]["vd_matches_confirmados"] == "1"
+
+    # Segunda rodada: só o par com erro é refeito
+    executar_lote(pares, saida, workers=2)
+    assert len(_linhas_estado(saida)) == 4
+    assert os.path.getmtime(resumo) == modificado
+
+    executar_lote(pares, saida, workers=2, repetir_erros=False)
+    assert len(_linhas_estado(saida)) == 4
+
+
+def test_descobrir_pares_recusa_lado_repetido(entradas):
+    gravar_planilha(os.path.join(entradas, "janeiro_ref.csv"), CABECALHO_REF, REF)
+    with pytest.raises(ValueError, match="janeiro_ref"):
+        descobrir_pares(entradas)
+
+
+def test_nomes_que_colidem_na_saida():
+    with pytest.raises(ValueError, match="mesma saída"):
+        _checar_nomes([ParConciliacao("filial a", "r", "c"), ParConciliacao("filial_a", "r", "c")])
+    _checar_nomes([ParConciliacao("filial a", "r", "c"), ParConciliacao("filial b", "r", "c")])
+
+
+def test_historico_falha_nao_publica_o_par_e_refazer_nao_duplica(entradas, tmp_path, monkeypatch):
+    from conciliacao.historico import HistoricoConciliacoes
+
+    saida = str(tmp_path / "saida")
+    banco = str(tmp_path / "h.sqlite3")
+    janeiro = next(p for p in descobrir_pares(entradas) if p.nome == "janeiro")
+    destino = os.path.join(saida, "pares", "janeiro")
+    original = HistoricoConciliacoes.registrar
+
+    def falha(self, *args, **kwargs):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(HistoricoConciliacoes, "registrar", falha)
+    registro = processar_par(janeiro, saida, 2026, 0.01, historico=banco)
+    assert registro["status"] == "erro" and "database is locked" in registro["erro"]
+    assert not os.path.exists(destino) and not os.path.exists(destino + ".tmp")
+
+    # Queda depois do rename e antes do estado.jsonl: a retomada refaz o par
+    monkeypatch.setattr(HistoricoConciliacoes, "registrar", original)
+    for _ in range(2):
+        assert processar_par(janeiro, saida, 2026, 0.01, historico=banco)["status"] == "ok"
+    assert os.path.exists(os.path.join(destino, "resumo.json"))
+    assert len(HistoricoConciliacoes(banco).listar_execucoes()) == 1
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from conciliacao import parsers
+from tests.conftest import CABECALHO_REF
+
+
+def _planilha_com_abas(caminho, abas=3, linhas=20):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    for a in range(abas):
+        ws = wb.create_sheet(f"Semana {a + 1}")
+        ws.append(CABECALHO_REF)
+        for i in range(linhas):
+            ws.append([f"Fornecedor {a}-{i}", f"{i % 28 + 1:02d}/01", f"R$ {i + 1},00", "MATRIZ", "ADM"])
+    wb.save(caminho)
+    return str(caminho)
+
+
+@pytest.fixture
+def pool_paralelo(monkeypatch):
+    monkeypatch.setattr(parsers, "PARSER_WORKERS", 2)
+    yield
+    parsers.encerrar_pool()
+
+
+def test_abas_em_paralelo_iguais_a_leitura_sequencial(tmp_path, pool_paralelo, monkeypatch):
+    caminho = _planilha_com_abas(tmp_path / "abas.xlsx")
+    paralelo, modelo = parsers.carregar_e_detectar(caminho)
+    monkeypatch.setattr(parsers, "PARSER_WORKERS", 1)
+    sequencial, _ = parsers.carregar_e_detectar(caminho)
+
+    assert modelo == "modelo1"
+    assert len(paralelo) == 60
+    assert paralelo.equals(sequencial)
+
+
+def test_pool_quebrado_e_recriado(tmp_path, pool_paralelo):
+    caminho = _planilha_com_abas(tmp_path / "abas.xlsx")
+    quebrado = parsers._pool()
+    with pytest.raises(parsers.BrokenProcessPool):
+        quebrado.submit(os._exit, 1).result()
+
+    df, _ = parsers.carregar_e_detectar(caminho)
+    assert len(df) == 60
+    assert parsers._executor is None
+
+    df, _ = parsers.carregar_e_detectar(caminho)
+    assert len(df) == 60
+    assert parsers._executor is not None and parsers._executor is not quebrado
+
+
+def test_encerrar_pool_ignora_pool_ja_trocado(pool_paralelo):
+    antigo = parsers._pool()
+    parsers.encerrar_pool()
+    atual = parsers._pool()
+    parsers.encerrar_pool(antigo)
+    assert parsers._executor is atual
+
+
+def test_lifespan_encerra_pool(pool_paralelo):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app):
+        parsers._pool()
+    assert parsers._executor is None
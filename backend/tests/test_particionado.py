@@ -0,0 +1,58 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from conciliacao.cubo import consultar_cubo
+from conciliacao.lote import _tabela_resultados
+from conciliacao.particionado import _COLUNAS_RESUMO, _schema_resultados, conciliar_particionado
+
+_ORDEM = ["data", "aba_ref", "linha_ref", "aba_comp", "linha_comp"]
+
+
+def _ordenado(df):
+    return df.sort_values(_ORDEM, na_position="first").reset_index(drop=True)
+
+
+@pytest.fixture(scope="module")
+def destino_particionado(tmp_path_factory, par_planilhas):
+    destino = str(tmp_path_factory.mktemp("particionado"))
+    # Blocos pequenos: várias datas atravessam mais de um bloco
+    conciliar_particionado(*par_planilhas, destino, tamanho_bloco=37)
+    return destino
+
+
+def test_resumo_igual_ao_em_memoria(destino_particionado, resposta_par):
+    with open(os.path.join(destino_particionado, "resumo.json"), encoding="utf-8") as f:
+        resumo = json.load(f)
+
+    assert resumo["valor_data"] == {c: resposta_par["resumo"][c] for c in _COLUNAS_RESUMO}
+    centro_custo = resposta_par["analise_centro_custo"]["resumo"]
+    assert resumo["centro_custo"] == {c: centro_custo[c] for c in _COLUNAS_RESUMO}
+
+
+@pytest.mark.parametrize("arquivo, analise", [
+    ("resultados.parquet", "valor_data"),
+    ("resultados_centro_custo.parquet", "centro_custo"),
+])
+def test_resultados_iguais_ao_em_memoria(destino_particionado, resposta_par, arquivo, analise):
+    dados = resposta_par if analise == "valor_data" else resposta_par["analise_centro_custo"]
+    # Mesmo schema do parquet, para os nulos saírem iguais dos dois lados
+    esperado = pa.Table.from_pandas(
+        _tabela_resultados(dados["resultados"]), schema=_schema_resultados(), preserve_index=False
+    ).to_pandas()
+    obtido = pd.read_parquet(os.path.join(destino_particionado, arquivo))
+
+    pd.testing.assert_frame_equal(_ordenado(obtido), _ordenado(esperado))
+
+
+def test_por_data_e_cubo_iguais_ao_em_memoria(destino_particionado, resposta_par):
+    por_data = pd.read_parquet(os.path.join(destino_particionado, "por_data.parquet"))
+    esperado = [{k: v for k, v in g.items() if k in por_data.columns} for g in resposta_par["por_data"]]
+    assert por_data.to_dict("records") == esperado
+
+    cubo = pd.read_parquet(os.path.join(destino_particionado, "cubo.parquet")).to_dict("list")
+    for dimensoes in (["centro_custo"], ["status"], ["data"]):
+        assert consultar_cubo(cubo, dimensoes) == consultar_cubo(resposta_par["cubo"], dimensoes)
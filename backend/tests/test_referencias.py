@@ -0,0 +1,84 @@
+import os
+from collections import namedtuple
+
+from conciliacao import referencias
+from conciliacao.parsers import carregar_e_detectar
+from conciliacao.pipeline import conciliar_com_referencia
+from conciliacao.referencias import RepositorioReferencias
+
+
+def _sem_tempos(resposta):
+    return {k: v for k, v in resposta.items() if k != "tempos_etapas"}
+
+
+def test_conciliacao_com_referencia_igual_a_em_memoria(tmp_path, par_planilhas, resposta_par):
+    from conciliacao.normalizacao import aplicar_normalizacao
+
+    arquivo_ref, arquivo_comp = par_planilhas
+    repositorio = RepositorioReferencias(str(tmp_path))
+    df_ref, _ = carregar_e_detectar(arquivo_ref)
+    id_ref = repositorio.publicar(aplicar_normalizacao(df_ref), "ref")["id"]
+    df_comp, _ = carregar_e_detectar(arquivo_comp)
+
+    with repositorio.anexar(id_ref) as referencia:
+        resposta = conciliar_com_referencia(referencia, df_comp)
+        assert repositorio.descrever(id_ref)["em_uso"] == 1
+
+    assert _sem_tempos(resposta) == _sem_tempos(resposta_par)
+    assert repositorio.descrever(id_ref)["em_uso"] == 0
+
+
+def test_referencia_nao_vira_registros(tmp_path, par_planilhas, monkeypatch):
+    """Os matchings leem os buffers: só a comparação (upload da requisição) vira Registro."""
+    from conciliacao.matching import Registro
+    from conciliacao.normalizacao import aplicar_normalizacao
+
+    arquivo_ref, arquivo_comp = par_planilhas
+    repositorio = RepositorioReferencias(str(tmp_path))
+    df_ref, _ = carregar_e_detectar(arquivo_ref)
+    id_ref = repositorio.publicar(aplicar_normalizacao(df_ref))["id"]
+    df_comp, _ = carregar_e_detectar(arquivo_comp)
+
+    criados = []
+    original = Registro.__init__
+    monkeypatch.setattr(Registro, "__init__", lambda self, *a, **k: criados.append(1) or original(self, *a, **k))
+    with repositorio.anexar(id_ref) as referencia:
+        resposta = conciliar_com_referencia(referencia, df_comp)
+    assert len(criados) == len(df_comp)
+    assert resposta["resumo"]["total_referencia"] == len(df_ref)
+
+
+def test_sem_centro_custo_pelos_codigos(tmp_path):
+    import pandas as pd
+
+    from conciliacao.normalizacao import aplicar_normalizacao
+
+    df = pd.DataFrame({
+        "fornecedor": ["A", "B", "C", "D"],
+        "valor": [1.0, 2.0, 3.0, 4.0],
+        "data": ["05/01", "05/01", "06/01", "06/01"],
+        "centro_custo": ["ADM", "  ", "", "ADM"],
+        "departamento": ["X", "X", "X", "X"],
+    })
+    repositorio = RepositorioReferencias(str(tmp_path))
+    id_ref = repositorio.publicar(aplicar_normalizacao(df))["id"]
+    with repositorio.anexar(id_ref) as referencia:
+        assert referencia.sem_centro_custo() == [1, 2]
+
+
+Estado = namedtuple("Estado", "f_bavail f_frsize")
+
+
+def test_diretorio_padrao_evita_shm_pequeno(monkeypatch):
+    mb = 1024 * 1024
+    monkeypatch.setattr(referencias, "_bytes_no_diretorio", lambda d: 0)
+
+    monkeypatch.setattr(os, "statvfs", lambda p: Estado(64 * mb // 4096, 4096))
+    assert referencias._diretorio_padrao(1024 * mb).startswith(referencias.tempfile.gettempdir())
+    assert referencias._diretorio_padrao(32 * mb) == "/dev/shm/conciliacao_referencias"
+
+    def sem_shm(p):
+        raise FileNotFoundError(p)
+
+    monkeypatch.setattr(os, "statvfs", sem_shm)
+    assert referencias._diretorio_padrao(mb).startswith(referencias.tempfile.gettempdir())
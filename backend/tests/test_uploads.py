@@ -0,0 +1,112 @@
+import asyncio
+import io
+import os
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from conciliacao.uploads import (
+    ArquivoMuitoGrande,
+    OrcamentoExcedido,
+    OrcamentoMemoria,
+    PlanilhaAcimaDoOrcamento,
+    estimar_memoria,
+    salvar_upload,
+)
+
+
+def test_salvar_upload_grava_em_disco(tmp_path):
+    conteudo = b"x" * (3 * 1024 * 1024 + 10)
+    caminho = asyncio.run(salvar_upload(UploadFile(io.BytesIO(conteudo), filename="a.XLSX"), 10**8, str(tmp_path)))
+    assert caminho.endswith(".xlsx")
+    with open(caminho, "rb") as f:
+        assert f.read() == conteudo
+
+
+def test_salvar_upload_acima_do_limite_remove_temporario(tmp_path):
+    upload = UploadFile(io.BytesIO(b"x" * 2048), filename="a.xlsx")
+    with pytest.raises(ArquivoMuitoGrande):
+        asyncio.run(salvar_upload(upload, 1024, str(tmp_path)))
+    assert os.listdir(tmp_path) == []
+
+
+def test_orcamento_recusa_estimativa_maior_que_o_limite():
+    async def cenario():
+        async with OrcamentoMemoria(100).reservar(101):
+            pass
+
+    with pytest.raises(PlanilhaAcimaDoOrcamento):
+        asyncio.run(cenario())
+
+
+def test_orcamento_enfileira_ate_liberar():
+    async def cenario():
+        orcamento = OrcamentoMemoria(100, espera_maxima_s=5)
+        ordem = []
+
+        async def usar(nome, estimativa, segundos):
+            async with orcamento.reservar(estimativa):
+                ordem.append((nome, orcamento.em_uso))
+                await asyncio.sleep(segundos)
+
+        await asyncio.gather(usar("a", 70, 0.05), usar("b", 70, 0))
+        return ordem, orcamento.em_uso
+
+    ordem, em_uso = asyncio.run(cenario())
+    # b só entra depois que a libera a reserva
+    assert ordem == [("a", 70), ("b", 70)]
+    assert em_uso == 0
+
+
+def test_orcamento_recusa_apos_espera_maxima():
+    async def cenario():
+        orcamento = OrcamentoMemoria(100, espera_maxima_s=0.05)
+        async with orcamento.reservar(80):
+            with pytest.raises(OrcamentoExcedido):
+                async with orcamento.reservar(80):
+                    pass
+        return orcamento.em_uso
+
+    assert asyncio.run(cenario()) == 0
+
+
+def test_estimar_memoria_cresce_com_as_linhas(par_planilhas, tmp_path):
+    from benchmarks.planilhas import gerar_par
+
+    pequeno, _ = gerar_par(str(tmp_path), 30)
+    assert 0 < estimar_memoria(pequeno) < estimar_memoria(par_planilhas[0])
+
+
+def test_estimar_memoria_arquivo_invalido(tmp_path):
+    caminho = tmp_path / "quebrado.xlsx"
+    caminho.write_bytes(b"nao e um zip")
+    with pytest.raises(ValueError):
+        estimar_memoria(str(caminho))
+
+
+def test_conciliar_acima_do_orcamento_retorna_413(cliente, par_planilhas, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main._orcamento, "limite_bytes", 1)
+    with open(par_planilhas[0], "rb") as ref, open(par_planilhas[1], "rb") as comp:
+        r = cliente.post(
+            "/conciliar",
+            files={"arquivo_referencia": ("ref.xlsx", ref), "arquivo_comparacao": ("comp.xlsx", comp)},
+        )
+    assert r.status_code == 413
+
+
+def test_conciliar_com_referencia_reserva_as_linhas_da_referencia(cliente, par_planilhas, monkeypatch):
+    import main
+    from conciliacao.uploads import BYTES_POR_LINHA_REFERENCIA
+
+    with open(par_planilhas[0], "rb") as ref:
+        publicada = cliente.post("/referencias", files={"arquivo_referencia": ("ref.xlsx", ref)}).json()
+
+    reservas = []
+    original = main._orcamento.reservar
+    monkeypatch.setattr(main._orcamento, "reservar", lambda estimativa: reservas.append(estimativa) or original(estimativa))
+    with open(par_planilhas[1], "rb") as comp:
+        r = cliente.post(f"/referencias/{publicada['id']}/conciliar", files={"arquivo_comparacao": ("comp.xlsx", comp)})
+    assert r.status_code == 200
+    assert reservas == [estimar_memoria(par_planilhas[1]) + publicada["linhas"] * BYTES_POR_LINHA_REFERENCIA]
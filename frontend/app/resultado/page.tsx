@@ -8,6 +8,7 @@ import AuditoriaDePara from "@/components/AuditoriaDePara";
 import ExportarRelatorio from "@/components/ExportarRelatorio";
 import FiltrosResultado, { type FiltroStatus } from "@/components/FiltrosResultado";
 import TabelaConciliacao from "@/components/TabelaConciliacao";
+import { confirmarAlias } from "@/lib/aliases";
 
 type TipoAnalise = "valor_data" | "centro_custo";
 
@@ -29,9 +30,20 @@ export default function ResultadoPage() {
     }
   }, []);
 
-  const handleConfirmarMatch = useCallback((idx: number) => {
-    setConfirmados((prev) => new Set(prev).add(idx));
-  }, []);
+  const handleConfirmarMatch = useCallback(
+    (idx: number) => {
+      setConfirmados((prev) => new Set(prev).add(idx));
+      const analise =
+        tipoAnalise === "centro_custo" && data?.analise_centro_custo ? data.analise_centro_custo : data;
+      const item = analise?.resultados[idx];
+      if (item?.referencia && item.comparacao) {
+        confirmarAlias(item.referencia.fornecedor, item.comparacao.fornecedor).catch((e) =>
+          console.error("Falha ao confirmar alias de fornecedor", e)
+        );
+      }
+    },
+    [data, tipoAnalise]
+  );
 
   if (!data) {
     return (
@@ -76,6 +88,8 @@ export default function ResultadoPage() {
               resumo={resumoAtual}
               alertas_diarios={alertas_diarios}
               por_data={porData}
+              idExecucao={data.id_execucao}
+              analise={tipoAnalise === "centro_custo" && analise_centro_custo ? "centro_custo" : "valor_data"}
             />
             <Link
               href="/"
@@ -113,7 +127,14 @@ export default function ResultadoPage() {
           </button>
         </div>
 
-        {porData.length > 0 && <DashboardAnalitico resumo={resumoAtual} porData={porData} />}
+        {porData.length > 0 && (
+          <DashboardAnalitico
+            resumo={resumoAtual}
+            porData={porData}
+            idExecucao={data.id_execucao}
+            analise={tipoAnalise === "centro_custo" && analise_centro_custo ? "centro_custo" : "valor_data"}
+          />
+        )}
 
         <div className="mb-4">
           <FiltrosResultado
@@ -156,7 +177,7 @@ export default function ResultadoPage() {
 
         {aba === "auditoria" ? (
           porData.length > 0 ? (
-            <AuditoriaDePara porData={porData} filtro={filtro} />
+            <AuditoriaDePara resultados={resultadosAtuais} porData={porData} filtro={filtro} />
           ) : (
             <div className="rounded-xl border border-slate-200/80 bg-white p-12 text-center text-slate-600 shadow-[var(--shadow-sm)]">
               Faça uma nova conciliação para ver a auditoria por data
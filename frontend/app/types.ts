@@ -4,6 +4,10 @@ export interface RegistroItem {
   data: string;
   centro_custo: string;
   departamento: string;
+  /** AAAA-MM-DD quando a planilha traz o ano */
+  data_iso?: string;
+  aba?: string;
+  linha?: number;
 }
 
 export interface ResultadoItem {
@@ -13,6 +17,7 @@ export interface ResultadoItem {
   score_nome: number | null;
   diferenca_valor: number | null;
   alerta: string;
+  alias_fornecedor?: boolean;
 }
 
 export interface AlertaDiario {
@@ -47,6 +52,8 @@ export interface AnaliseConciliacao {
 }
 
 export interface RespostaConciliacao {
+  id_execucao?: string | null;
+  tempos_etapas?: Record<string, number>;
   resumo: Resumo;
   resultados: ResultadoItem[];
   alertas_diarios: AlertaDiario[];
@@ -1,24 +1,27 @@
 "use client";
 
-import { useState } from "react";
+import { useMemo, useState } from "react";
 import type { PorData, ResultadoItem } from "@/app/types";
+import { useGruposFiltrados } from "@/lib/consultaResultados";
+import { useVirtualizacao } from "@/lib/useVirtualizacao";
 import type { FiltroStatus } from "./FiltrosResultado";
 
-const STATUS_DIVERGENTES = ["divergente", "nao_encontrado", "info_faltante"];
+// Altura inicial de cabeçalhos de data e lançamentos antes de serem medidos (px)
+const ALTURA_ESTIMADA = 96;
 
-const MAP_FILTRO_STATUS: Record<string, string> = {
-  divergentes: "divergente",
-  nao_encontrados: "nao_encontrado",
-};
-
-function aplicarFiltro(filtro: FiltroStatus, r: ResultadoItem): boolean {
-  if (filtro === "todos") return true;
-  if (filtro === "apenas_divergentes") return STATUS_DIVERGENTES.includes(r.status);
-  const status = MAP_FILTRO_STATUS[filtro] ?? filtro;
-  return r.status === status;
-}
+/**
+ * Item da lista achatada (cabeçalho de data, rótulo, lançamento ou aviso de vazio) que é
+ * virtualizada. `g` é a posição do grupo exibido; `i`, o índice do resultado.
+ */
+type ItemLista =
+  | { tipo: "grupo"; g: number }
+  | { tipo: "rotulo"; g: number }
+  | { tipo: "linha"; g: number; i: number; ultima: boolean }
+  | { tipo: "vazio"; g: number };
 
 interface AuditoriaDeParaProps {
+  /** Resultados da análise; cada data de porData agrupa os de referencia.data igual */
+  resultados: ResultadoItem[];
   porData: PorData[];
   filtro?: FiltroStatus;
 }
@@ -45,13 +48,13 @@ function statusInfo(status: string) {
   }
 }
 
-function LinhaAuditoria({ r }: { r: ResultadoItem }) {
+function LinhaAuditoria({ r, ultima }: { r: ResultadoItem; ultima: boolean }) {
   const info = statusInfo(r.status);
   const isProblema = r.status === "nao_encontrado" || r.status === "divergente";
 
   return (
     <div
-      className={`grid grid-cols-1 gap-3 border-b border-slate-100 py-3 last:border-0 sm:grid-cols-[1fr_auto_1fr] ${
+      className={`grid grid-cols-1 gap-3 py-3 sm:grid-cols-[1fr_auto_1fr] ${ultima ? "" : "border-b border-slate-100"} ${
         isProblema ? "bg-red-50/50 -mx-3 px-3 rounded-lg" : ""
       }`}
     >
@@ -81,7 +84,9 @@ function LinhaAuditoria({ r }: { r: ResultadoItem }) {
           {info.icon} {info.label}
         </span>
         {r.score_nome != null && (
-          <span className="text-[10px] text-slate-400">{Math.round(r.score_nome * 100)}%</span>
+          <span className="text-[10px] text-slate-400">
+            {Math.round(r.score_nome * 100)}%{r.alias_fornecedor && " · alias"}
+          </span>
         )}
         {r.diferenca_valor != null && r.diferenca_valor > 0 && (
           <span className="text-[10px] font-medium text-amber-600">{formatarValor(r.diferenca_valor)}</span>
@@ -123,8 +128,10 @@ function LinhaAuditoria({ r }: { r: ResultadoItem }) {
   );
 }
 
-export default function AuditoriaDePara({ porData, filtro = "todos" }: AuditoriaDeParaProps) {
+export default function AuditoriaDePara({ resultados, porData, filtro = "todos" }: AuditoriaDeParaProps) {
   const [expandido, setExpandido] = useState<Set<string>>(new Set());
+  // Agrupamento e filtro no worker: índices dos resultados de cada data exibida
+  const { valor: grupos, erro } = useGruposFiltrados(resultados, porData, filtro);
 
   const toggle = (data: string) => {
     setExpandido((prev) => {
@@ -135,6 +142,114 @@ export default function AuditoriaDePara({ porData, filtro = "todos" }: Auditoria
     });
   };
 
+  const itens = useMemo(() => {
+    const lista: ItemLista[] = [];
+    if (!grupos) return lista;
+    grupos.grupos.forEach((posicao, g) => {
+      lista.push({ tipo: "grupo", g });
+      if (!expandido.has(porData[posicao].data)) return;
+      const de = grupos.offsets[g];
+      const ate = grupos.offsets[g + 1];
+      if (de === ate) {
+        lista.push({ tipo: "vazio", g });
+        return;
+      }
+      lista.push({ tipo: "rotulo", g });
+      for (let k = de; k < ate; k++) {
+        lista.push({ tipo: "linha", g, i: grupos.indices[k], ultima: k === ate - 1 });
+      }
+    });
+    return lista;
+  }, [grupos, porData, expandido]);
+
+  const { containerRef, medir, inicio, fim, espacoAntes, espacoDepois } = useVirtualizacao({
+    quantidade: itens.length,
+    alturaEstimada: ALTURA_ESTIMADA,
+    chave: itens,
+  });
+
+  const renderizarItem = (item: ItemLista) => {
+    const grupo = porData[grupos!.grupos[item.g]];
+    const borda = grupo.divergente ? "border-amber-200" : "border-slate-200/80";
+    const aberto = expandido.has(grupo.data);
+
+    if (item.tipo === "grupo") {
+      const problemas = grupos!.problemas[item.g];
+      return (
+        <div className="pt-2">
+          <div
+            className={`overflow-hidden border shadow-[var(--shadow-sm)] ${borda} ${
+              aberto ? "rounded-t-xl border-b-0" : "rounded-xl"
+            } ${grupo.divergente ? "bg-amber-50/20" : "bg-white"}`}
+          >
+            <button
+              type="button"
+              onClick={() => toggle(grupo.data)}
+              className="flex w-full items-center justify-between px-5 py-4 text-left"
+            >
+              <div className="flex items-center gap-3">
+                <span className="text-base font-bold tabular-nums text-slate-800">{grupo.data}</span>
+                {grupo.divergente && (
+                  <span className="rounded-full bg-amber-100 px-2.5 py-0.5 text-[10px] font-semibold uppercase tracking-wider text-amber-700">
+                    Divergência
+                  </span>
+                )}
+                {problemas > 0 && (
+                  <span className="text-xs text-slate-500">
+                    {problemas} {problemas === 1 ? "item" : "itens"} a revisar
+                  </span>
+                )}
+              </div>
+              <div className="flex items-center gap-8 text-sm tabular-nums">
+                <div className="text-left">
+                  <p className="text-[10px] font-semibold uppercase text-teal-600/80">DE</p>
+                  <p className="font-semibold text-teal-700">{formatarValor(grupo.total_ref)}</p>
+                  <p className="text-xs text-slate-500">{grupo.qtd_ref} lanç.</p>
+                </div>
+                <div className="text-slate-300">→</div>
+                <div className="text-left">
+                  <p className="text-[10px] font-semibold uppercase text-blue-600/80">PARA</p>
+                  <p className="font-semibold text-blue-700">{formatarValor(grupo.total_comp)}</p>
+                  <p className="text-xs text-slate-500">{grupo.qtd_comp} lanç.</p>
+                </div>
+                <span className={`ml-2 text-slate-400 transition-transform ${aberto ? "rotate-180" : ""}`}>▼</span>
+              </div>
+            </button>
+          </div>
+        </div>
+      );
+    }
+
+    if (item.tipo === "vazio") {
+      return (
+        <div className={`rounded-b-xl border border-t-slate-200/80 bg-white px-4 py-8 text-center text-sm text-slate-500 ${borda}`}>
+          Nenhum lançamento para esta data
+        </div>
+      );
+    }
+
+    if (item.tipo === "rotulo") {
+      return (
+        <div className={`border-x border-t border-t-slate-200/80 bg-white px-4 pt-4 ${borda}`}>
+          <div className="mb-3 flex items-center gap-2">
+            <span className="text-[10px] font-semibold uppercase tracking-wider text-slate-400">
+              Lançamentos
+            </span>
+          </div>
+        </div>
+      );
+    }
+
+    return (
+      <div className={`border-x bg-white px-4 ${item.ultima ? "rounded-b-xl border-b pb-4" : ""} ${borda}`}>
+        <LinhaAuditoria r={resultados[item.i]} ultima={item.ultima} />
+      </div>
+    );
+  };
+
+  const chaveItem = (item: ItemLista) =>
+    item.tipo === "linha" ? `l${item.i}` : `${item.tipo}-${porData[grupos!.grupos[item.g]].data}`;
+
   return (
     <section>
       <div className="mb-6 flex items-center justify-between">
@@ -160,94 +275,29 @@ export default function AuditoriaDePara({ porData, filtro = "todos" }: Auditoria
         </div>
       </div>
 
-      <div className="space-y-2">
-        {(() => {
-          const gruposFiltrados = porData
-            .map((grupo) => ({
-              ...grupo,
-              resultadosFiltrados: grupo.resultados.filter((r) => aplicarFiltro(filtro, r)),
-            }))
-            .filter((g) => g.resultadosFiltrados.length > 0 || filtro === "todos");
-          if (gruposFiltrados.length === 0) {
-            return (
-              <div className="rounded-xl border border-slate-200/80 bg-white px-6 py-12 text-center text-sm text-slate-500 shadow-[var(--shadow-sm)]">
-                Nenhum resultado para o filtro selecionado
-              </div>
-            );
-          }
-          return gruposFiltrados.map((grupo) => {
-          const aberto = expandido.has(grupo.data);
-          const resultados = filtro === "todos" ? grupo.resultados : grupo.resultadosFiltrados;
-          const problemas = resultados.filter(
-            (r) => r.status === "divergente" || r.status === "nao_encontrado" || r.status === "info_faltante"
-          );
-
-          return (
-            <div
-              key={grupo.data}
-              className={`overflow-hidden rounded-xl border shadow-[var(--shadow-sm)] transition-shadow hover:shadow-[var(--shadow-md)] ${
-                grupo.divergente ? "border-amber-200 bg-amber-50/20" : "border-slate-200/80 bg-white"
-              }`}
-            >
-              <button
-                type="button"
-                onClick={() => toggle(grupo.data)}
-                className="flex w-full items-center justify-between px-5 py-4 text-left"
-              >
-                <div className="flex items-center gap-3">
-                  <span className="text-base font-bold tabular-nums text-slate-800">{grupo.data}</span>
-                  {grupo.divergente && (
-                    <span className="rounded-full bg-amber-100 px-2.5 py-0.5 text-[10px] font-semibold uppercase tracking-wider text-amber-700">
-                      Divergência
-                    </span>
-                  )}
-                  {problemas.length > 0 && (
-                    <span className="text-xs text-slate-500">
-                      {problemas.length} {problemas.length === 1 ? "item" : "itens"} a revisar
-                    </span>
-                  )}
-                </div>
-                <div className="flex items-center gap-8 text-sm tabular-nums">
-                  <div className="text-left">
-                    <p className="text-[10px] font-semibold uppercase text-teal-600/80">DE</p>
-                    <p className="font-semibold text-teal-700">{formatarValor(grupo.total_ref)}</p>
-                    <p className="text-xs text-slate-500">{grupo.qtd_ref} lanç.</p>
-                  </div>
-                  <div className="text-slate-300">→</div>
-                  <div className="text-left">
-                    <p className="text-[10px] font-semibold uppercase text-blue-600/80">PARA</p>
-                    <p className="font-semibold text-blue-700">{formatarValor(grupo.total_comp)}</p>
-                    <p className="text-xs text-slate-500">{grupo.qtd_comp} lanç.</p>
-                  </div>
-                  <span className={`ml-2 text-slate-400 transition-transform ${aberto ? "rotate-180" : ""}`}>▼</span>
-                </div>
-              </button>
-
-              {aberto && resultados.length > 0 && (
-                <div className="border-t border-slate-200/80 bg-white px-4 py-4">
-                  <div className="mb-3 flex items-center gap-2">
-                    <span className="text-[10px] font-semibold uppercase tracking-wider text-slate-400">
-                      Lançamentos
-                    </span>
-                  </div>
-                  <div className="divide-y divide-slate-100">
-                    {resultados.map((r, i) => (
-                      <LinhaAuditoria key={i} r={r} />
-                    ))}
-                  </div>
-                </div>
-              )}
-
-              {aberto && resultados.length === 0 && (
-                <div className="border-t border-slate-200/80 px-4 py-8 text-center text-sm text-slate-500">
-                  Nenhum lançamento para esta data
-                </div>
-              )}
+      {erro !== null ? (
+        <div className="rounded-xl border border-slate-200/80 bg-white px-6 py-12 text-center text-sm text-red-600 shadow-[var(--shadow-sm)]">
+          Não foi possível agrupar os resultados: {erro}
+        </div>
+      ) : grupos === null ? (
+        <div className="rounded-xl border border-slate-200/80 bg-white px-6 py-12 text-center text-sm text-slate-500 shadow-[var(--shadow-sm)]">
+          Carregando resultados…
+        </div>
+      ) : itens.length === 0 ? (
+        <div className="rounded-xl border border-slate-200/80 bg-white px-6 py-12 text-center text-sm text-slate-500 shadow-[var(--shadow-sm)]">
+          Nenhum resultado para o filtro selecionado
+        </div>
+      ) : (
+        <div ref={containerRef} className="-mt-2">
+          <div style={{ height: espacoAntes }} />
+          {itens.slice(inicio, fim).map((item, k) => (
+            <div key={chaveItem(item)} ref={medir} data-indice={inicio + k}>
+              {renderizarItem(item)}
             </div>
-          );
-          });
-        })()}
-      </div>
+          ))}
+          <div style={{ height: espacoDepois }} />
+        </div>
+      )}
     </section>
   );
 }
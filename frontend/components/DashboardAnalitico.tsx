@@ -2,10 +2,16 @@
 
 import { useState } from "react";
 import type { PorData, Resumo } from "@/app/types";
+import DetalhamentoCubo from "@/components/DetalhamentoCubo";
+import { useDatasOrdenadas } from "@/lib/consultaResultados";
+import type { OrdemDatas } from "@/lib/resultadosColunar";
 
 interface DashboardAnaliticoProps {
   resumo: Resumo;
   porData: PorData[];
+  /** Com a execução gravada no servidor, mostra o detalhamento por centro de custo, departamento e status */
+  idExecucao?: string | null;
+  analise?: "valor_data" | "centro_custo";
 }
 
 function formatarValor(v: number) {
@@ -16,26 +22,19 @@ function formatarValor(v: number) {
   }).format(v);
 }
 
-export default function DashboardAnalitico({ resumo, porData }: DashboardAnaliticoProps) {
-  const totalDe = porData.reduce((s, d) => s + d.total_ref, 0);
-  const totalPara = porData.reduce((s, d) => s + d.total_comp, 0);
-  const datasComDivergencia = porData.filter((d) => d.divergente).length;
-  const [ordenarPor, setOrdenarPor] = useState<"data" | "valor" | "divergente">("data");
-
-  const porDataOrdenado = [...porData].sort((a, b) => {
-    if (ordenarPor === "data") return 0;
-    if (ordenarPor === "valor") {
-      const maxA = Math.max(a.total_ref, a.total_comp);
-      const maxB = Math.max(b.total_ref, b.total_comp);
-      return maxB - maxA;
-    }
-    if (ordenarPor === "divergente") {
-      if (a.divergente && !b.divergente) return -1;
-      if (!a.divergente && b.divergente) return 1;
-      return 0;
-    }
-    return 0;
-  });
+export default function DashboardAnalitico({
+  resumo,
+  porData,
+  idExecucao,
+  analise = "valor_data",
+}: DashboardAnaliticoProps) {
+  const [ordenarPor, setOrdenarPor] = useState<OrdemDatas>("data");
+  // Totais e ordenação calculados no worker; até chegarem, usa a ordem original
+  const { valor: ordenadas, erro } = useDatasOrdenadas(porData, ordenarPor);
+  const totalDe = ordenadas?.totalDe ?? 0;
+  const totalPara = ordenadas?.totalPara ?? 0;
+  const datasComDivergencia = ordenadas?.datasComDivergencia ?? 0;
+  const porDataOrdenado = ordenadas ? Array.from(ordenadas.ordem, (i) => porData[i]) : porData;
 
   return (
     <section className="mb-10">
@@ -100,6 +99,11 @@ export default function DashboardAnalitico({ resumo, porData }: DashboardAnaliti
                 </button>
               ))}
             </div>
+            {erro !== null && (
+              <span className="text-xs font-medium text-red-600" title={erro}>
+                Não foi possível ordenar; exibindo na ordem original
+              </span>
+            )}
             {datasComDivergencia > 0 && (
               <span className="rounded-full bg-amber-100 px-2.5 py-0.5 text-xs font-medium text-amber-700">
                 {datasComDivergencia} data{datasComDivergencia !== 1 ? "s" : ""} com divergência
@@ -183,6 +187,8 @@ export default function DashboardAnalitico({ resumo, porData }: DashboardAnaliti
           </table>
         </div>
       </div>
+
+      {idExecucao && <DetalhamentoCubo idExecucao={idExecucao} analise={analise} />}
     </section>
   );
 }
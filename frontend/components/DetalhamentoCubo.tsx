@@ -0,0 +1,173 @@
+"use client";
+
+import { useState } from "react";
+import { DIMENSOES_CUBO, useCubo, type DimensaoCubo, type FiltrosCubo } from "@/lib/cubo";
+
+interface DetalhamentoCuboProps {
+  idExecucao: string;
+  analise: "valor_data" | "centro_custo";
+}
+
+const ROTULOS: Record<DimensaoCubo, string> = {
+  centro_custo: "Centro de custo",
+  departamento: "Departamento",
+  status: "Status",
+  data: "Data",
+};
+
+const ROTULOS_STATUS: Record<string, string> = {
+  ok: "Conciliado",
+  divergente: "Divergente",
+  nao_encontrado: "Não encontrado",
+  sem_par: "Só no PARA",
+};
+
+function formatarCentavos(c: number) {
+  return new Intl.NumberFormat("pt-BR", {
+    style: "currency",
+    currency: "BRL",
+    maximumFractionDigits: 0,
+  }).format(c / 100);
+}
+
+function rotuloValor(dimensao: DimensaoCubo, valor: string | undefined) {
+  if (!valor) return "(vazio)";
+  return dimensao === "status" ? ROTULOS_STATUS[valor] ?? valor : valor;
+}
+
+/**
+ * Totais DE/PARA agrupados por uma dimensão, vindos do cubo da execução. Clicar numa linha
+ * detalha aquele valor pela próxima dimensão; o caminho no topo volta aos níveis anteriores.
+ */
+export default function DetalhamentoCubo({ idExecucao, analise }: DetalhamentoCuboProps) {
+  const [caminho, setCaminho] = useState<{ dimensao: DimensaoCubo; valor: string }[]>([]);
+  const [agrupar, setAgrupar] = useState<DimensaoCubo>("centro_custo");
+
+  const filtros: FiltrosCubo = Object.fromEntries(caminho.map((p) => [p.dimensao, [p.valor]]));
+  const consulta = useCubo(idExecucao, analise, [agrupar], filtros);
+  const livres = DIMENSOES_CUBO.filter((d) => !caminho.some((p) => p.dimensao === d));
+
+  const detalhar = (valor: string) => {
+    const novoCaminho = [...caminho, { dimensao: agrupar, valor }];
+    const proxima = DIMENSOES_CUBO.find((d) => !novoCaminho.some((p) => p.dimensao === d));
+    if (!proxima) return;
+    setCaminho(novoCaminho);
+    setAgrupar(proxima);
+  };
+
+  const voltar = (nivel: number) => {
+    setAgrupar(caminho[nivel]?.dimensao ?? agrupar);
+    setCaminho(caminho.slice(0, nivel));
+  };
+
+  return (
+    <div className="mt-6 overflow-hidden rounded-xl border border-slate-200/80 bg-white shadow-[var(--shadow-sm)]">
+      <div className="flex flex-col gap-4 border-b border-slate-200/80 bg-slate-50/50 px-5 py-4 sm:flex-row sm:items-center sm:justify-between">
+        <div className="flex flex-wrap items-center gap-1 text-sm">
+          <button
+            type="button"
+            onClick={() => voltar(0)}
+            className={`font-semibold ${caminho.length ? "text-teal-700 hover:underline" : "text-slate-700"}`}
+          >
+            Detalhamento
+          </button>
+          {caminho.map((p, i) => (
+            <span key={p.dimensao} className="flex items-center gap-1">
+              <span className="text-slate-300">›</span>
+              <button
+                type="button"
+                onClick={() => voltar(i + 1)}
+                className={i + 1 < caminho.length ? "text-teal-700 hover:underline" : "text-slate-700"}
+              >
+                {ROTULOS[p.dimensao]}: {rotuloValor(p.dimensao, p.valor)}
+              </button>
+            </span>
+          ))}
+        </div>
+        <div className="flex flex-wrap items-center gap-3">
+          <span className="text-xs text-slate-500">Agrupar por:</span>
+          <div className="flex gap-1 rounded-lg bg-slate-100 p-0.5">
+            {livres.map((d) => (
+              <button
+                key={d}
+                type="button"
+                onClick={() => setAgrupar(d)}
+                className={`rounded-md px-3 py-1.5 text-xs font-medium transition-colors ${
+                  agrupar === d ? "bg-white text-slate-900 shadow-sm" : "text-slate-600 hover:text-slate-900"
+                }`}
+              >
+                {ROTULOS[d]}
+              </button>
+            ))}
+          </div>
+        </div>
+      </div>
+
+      <div className="max-h-96 overflow-auto">
+        <table className="min-w-full divide-y divide-slate-200/80 text-left text-sm">
+          <thead>
+            <tr className="bg-slate-50/80">
+              <th className="px-5 py-3 text-[10px] font-semibold uppercase tracking-wider text-slate-500">{ROTULOS[agrupar]}</th>
+              <th className="px-5 py-3 text-right text-[10px] font-semibold uppercase tracking-wider text-teal-600">Qtd DE</th>
+              <th className="px-5 py-3 text-right text-[10px] font-semibold uppercase tracking-wider text-teal-600">Total DE</th>
+              <th className="px-5 py-3 text-right text-[10px] font-semibold uppercase tracking-wider text-blue-600">Qtd PARA</th>
+              <th className="px-5 py-3 text-right text-[10px] font-semibold uppercase tracking-wider text-blue-600">Total PARA</th>
+              <th className="px-5 py-3 text-right text-[10px] font-semibold uppercase tracking-wider text-slate-500">Diferença</th>
+            </tr>
+          </thead>
+          <tbody className="divide-y divide-slate-100 bg-white">
+            {!consulta && (
+              <tr>
+                <td colSpan={6} className="px-5 py-6 text-center text-slate-400">
+                  Carregando…
+                </td>
+              </tr>
+            )}
+            {consulta?.linhas.map((l) => {
+              const valor = l[agrupar] ?? "";
+              const diff = Math.abs(l.centavos_ref - l.centavos_comp);
+              return (
+                <tr
+                  key={valor}
+                  onClick={() => detalhar(valor)}
+                  className={`transition-colors hover:bg-slate-50/80 ${livres.length > 1 ? "cursor-pointer" : ""}`}
+                >
+                  <td className="whitespace-nowrap px-5 py-3 font-medium text-slate-800">{rotuloValor(agrupar, valor)}</td>
+                  <td className="whitespace-nowrap px-5 py-3 text-right tabular-nums text-slate-600">{l.qtd_ref}</td>
+                  <td className="whitespace-nowrap px-5 py-3 text-right tabular-nums font-medium text-teal-700">
+                    {formatarCentavos(l.centavos_ref)}
+                  </td>
+                  <td className="whitespace-nowrap px-5 py-3 text-right tabular-nums text-slate-600">{l.qtd_comp}</td>
+                  <td className="whitespace-nowrap px-5 py-3 text-right tabular-nums font-medium text-blue-700">
+                    {formatarCentavos(l.centavos_comp)}
+                  </td>
+                  <td
+                    className={`whitespace-nowrap px-5 py-3 text-right tabular-nums font-medium ${
+                      diff > 1 ? "text-amber-600" : "text-slate-400"
+                    }`}
+                  >
+                    {formatarCentavos(diff)}
+                  </td>
+                </tr>
+              );
+            })}
+          </tbody>
+          {consulta && (
+            <tfoot>
+              <tr className="border-t-2 border-slate-200 bg-slate-50/80 font-semibold">
+                <td className="px-5 py-3 text-slate-800">Total</td>
+                <td className="px-5 py-3 text-right tabular-nums text-slate-600">{consulta.total.qtd_ref}</td>
+                <td className="px-5 py-3 text-right tabular-nums text-teal-700">{formatarCentavos(consulta.total.centavos_ref)}</td>
+                <td className="px-5 py-3 text-right tabular-nums text-slate-600">{consulta.total.qtd_comp}</td>
+                <td className="px-5 py-3 text-right tabular-nums text-blue-700">{formatarCentavos(consulta.total.centavos_comp)}</td>
+                <td className="px-5 py-3 text-right tabular-nums text-slate-500">
+                  {formatarCentavos(Math.abs(consulta.total.centavos_ref - consulta.total.centavos_comp))}
+                </td>
+              </tr>
+            </tfoot>
+          )}
+        </table>
+      </div>
+    </div>
+  );
+}
@@ -2,13 +2,15 @@
 
 import { useState, useRef, useEffect } from "react";
 import type { ResultadoItem, Resumo, AlertaDiario, PorData } from "@/app/types";
-import { exportarExcel, exportarPDF, type TipoRelatorio } from "@/lib/exportar";
+import { exportarExcel, exportarPDF, urlExportacao, type TipoRelatorio } from "@/lib/exportar";
 
 interface ExportarRelatorioProps {
   resultados: ResultadoItem[];
   resumo: Resumo;
   alertas_diarios: AlertaDiario[];
   por_data: PorData[];
+  idExecucao?: string | null;
+  analise?: "valor_data" | "centro_custo";
 }
 
 export default function ExportarRelatorio({
@@ -16,6 +18,8 @@ export default function ExportarRelatorio({
   resumo,
   alertas_diarios,
   por_data,
+  idExecucao,
+  analise = "valor_data",
 }: ExportarRelatorioProps) {
   const [aberto, setAberto] = useState(false);
   const ref = useRef<HTMLDivElement>(null);
@@ -28,8 +32,13 @@ export default function ExportarRelatorio({
     return () => document.removeEventListener("click", handleClickOutside);
   }, [aberto]);
 
-  const handleExportar = (tipo: TipoRelatorio, formato: "pdf" | "excel") => {
-    if (formato === "pdf") {
+  const handleExportar = (tipo: TipoRelatorio, formato: "pdf" | "excel" | "csv") => {
+    if (idExecucao) {
+      // Gerado no servidor em streaming: o navegador só baixa o arquivo
+      const link = document.createElement("a");
+      link.href = urlExportacao(idExecucao, analise, tipo, formato === "excel" ? "xlsx" : formato);
+      link.click();
+    } else if (formato === "pdf") {
       exportarPDF(resultados, resumo, alertas_diarios, tipo, por_data);
     } else {
       exportarExcel(resultados, resumo, alertas_diarios, tipo, por_data);
@@ -86,6 +95,26 @@ export default function ExportarRelatorio({
               <span className="text-emerald-600">📊</span>
               Total Excel
             </button>
+            {idExecucao && (
+              <>
+                <button
+                  type="button"
+                  onClick={() => handleExportar("divergentes", "csv")}
+                  className="flex items-center gap-2 rounded-lg px-3 py-2 text-left text-sm text-slate-700 hover:bg-slate-50"
+                >
+                  <span className="text-slate-500">🧾</span>
+                  Divergentes CSV
+                </button>
+                <button
+                  type="button"
+                  onClick={() => handleExportar("total", "csv")}
+                  className="flex items-center gap-2 rounded-lg px-3 py-2 text-left text-sm text-slate-700 hover:bg-slate-50"
+                >
+                  <span className="text-slate-500">🧾</span>
+                  Total CSV
+                </button>
+              </>
+            )}
           </div>
         </div>
       )}
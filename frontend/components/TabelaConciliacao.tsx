@@ -1,8 +1,13 @@
 "use client";
 
 import type { ResultadoItem } from "@/app/types";
+import { useIndicesFiltrados } from "@/lib/consultaResultados";
+import { useVirtualizacao } from "@/lib/useVirtualizacao";
 import type { FiltroStatus } from "./FiltrosResultado";
 
+// Altura inicial de uma linha antes de ser medida (px)
+const ALTURA_LINHA = 112;
+
 interface TabelaConciliacaoProps {
   resultados: ResultadoItem[];
   filtro: FiltroStatus;
@@ -16,26 +21,20 @@ function formatarValor(v: number) {
   }).format(v);
 }
 
-const STATUS_DIVERGENTES = ["divergente", "nao_encontrado", "info_faltante"];
-const MAP_FILTRO_STATUS: Record<string, string> = {
-  divergentes: "divergente",
-  nao_encontrados: "nao_encontrado",
-};
-
-function aplicarFiltro(filtro: FiltroStatus, r: ResultadoItem): boolean {
-  if (filtro === "todos") return true;
-  if (filtro === "apenas_divergentes") return STATUS_DIVERGENTES.includes(r.status);
-  const status = MAP_FILTRO_STATUS[filtro] ?? filtro;
-  return r.status === status;
-}
-
 export default function TabelaConciliacao({
   resultados,
   filtro,
   onConfirmarMatch,
 }: TabelaConciliacaoProps) {
-  const comIndice = resultados.map((r, idx) => ({ r, idx }));
-  const filtrados = comIndice.filter(({ r }) => aplicarFiltro(filtro, r));
+  // Filtro no worker; só as linhas visíveis são montadas
+  const { valor: filtrados, erro } = useIndicesFiltrados(resultados, filtro);
+  const quantidade = filtrados?.length ?? 0;
+  const { containerRef, medir, inicio, fim, espacoAntes, espacoDepois } = useVirtualizacao<HTMLTableSectionElement>({
+    quantidade,
+    alturaEstimada: ALTURA_LINHA,
+    chave: filtrados,
+  });
+  const colunas = onConfirmarMatch ? 6 : 5;
 
   return (
     <div className="overflow-x-auto rounded-xl border border-slate-200/80 shadow-[var(--shadow-sm)]">
@@ -50,12 +49,22 @@ export default function TabelaConciliacao({
             {onConfirmarMatch && <th className="px-4 py-3" />}
           </tr>
         </thead>
-        <tbody className="divide-y divide-slate-100 bg-white">
-          {filtrados.map(({ r, idx: origIdx }) => {
+        <tbody ref={containerRef} className="divide-y divide-slate-100 bg-white">
+          {espacoAntes > 0 && (
+            <tr aria-hidden style={{ height: espacoAntes }}>
+              <td colSpan={colunas} />
+            </tr>
+          )}
+          {Array.from({ length: fim - inicio }, (_, k) => {
+            const posicao = inicio + k;
+            const origIdx = filtrados![posicao];
+            const r = resultados[origIdx];
             const isProblema = r.status === "nao_encontrado" || r.status === "divergente";
             return (
               <tr
                 key={origIdx}
+                ref={medir}
+                data-indice={posicao}
                 className={isProblema ? "bg-red-50/50" : "hover:bg-slate-50/50"}
               >
                 <td className="border-l-4 border-transparent px-4 py-3 align-top" style={isProblema ? { borderLeftColor: "var(--falta-color)" } : undefined}>
@@ -74,6 +83,11 @@ export default function TabelaConciliacao({
                   <div className="rounded-lg border border-slate-100 bg-slate-50/50 p-2">
                     <p className="font-medium text-slate-800">{r.referencia.fornecedor}</p>
                     <p className="mt-0.5 text-xs tabular-nums text-teal-700">{formatarValor(r.referencia.valor)}</p>
+                    {r.referencia.aba && (
+                      <p className="mt-0.5 text-[10px] text-slate-400">
+                        {r.referencia.aba} · linha {r.referencia.linha}
+                      </p>
+                    )}
                     <div className="mt-1 flex flex-wrap items-center gap-1.5">
                       <span
                         className={`inline-flex items-center rounded px-1.5 py-0.5 text-[10px] font-medium ${
@@ -96,6 +110,11 @@ export default function TabelaConciliacao({
                     <div className="rounded-lg border border-slate-100 bg-blue-50/30 p-2">
                       <p className="font-medium text-slate-800">{r.comparacao.fornecedor}</p>
                       <p className="mt-0.5 text-xs tabular-nums text-blue-700">{formatarValor(r.comparacao.valor)}</p>
+                      {r.comparacao.aba && (
+                        <p className="mt-0.5 text-[10px] text-slate-400">
+                          {r.comparacao.aba} · linha {r.comparacao.linha}
+                        </p>
+                      )}
                       <div className="mt-1 flex flex-wrap items-center gap-1.5">
                         <span
                           className={`inline-flex items-center rounded px-1.5 py-0.5 text-[10px] font-medium ${
@@ -120,7 +139,14 @@ export default function TabelaConciliacao({
                 </td>
                 <td className="px-4 py-3">
                   {r.score_nome != null ? (
-                    <span className="tabular-nums">{(r.score_nome * 100).toFixed(0)}%</span>
+                    <span className="tabular-nums">
+                      {(r.score_nome * 100).toFixed(0)}%
+                      {r.alias_fornecedor && (
+                        <span className="ml-1 text-[10px] text-teal-600" title="Mesmo fornecedor segundo o dicionário de aliases; o score é a similaridade real dos nomes">
+                          alias
+                        </span>
+                      )}
+                    </span>
                   ) : (
                     <span className="text-slate-300">—</span>
                   )}
@@ -139,6 +165,7 @@ export default function TabelaConciliacao({
                     <button
                       type="button"
                       onClick={() => onConfirmarMatch(origIdx)}
+                      title="Registra os dois nomes como o mesmo fornecedor (alias)"
                       className="rounded-lg bg-emerald-500/10 px-2 py-1 text-xs font-medium text-emerald-700 hover:bg-emerald-500/20"
                     >
                       Confirmar
@@ -148,9 +175,22 @@ export default function TabelaConciliacao({
               </tr>
             );
           })}
+          {espacoDepois > 0 && (
+            <tr aria-hidden style={{ height: espacoDepois }}>
+              <td colSpan={colunas} />
+            </tr>
+          )}
         </tbody>
       </table>
-      {filtrados.length === 0 && (
+      {erro !== null && (
+        <div className="px-4 py-12 text-center text-sm text-red-600">
+          Não foi possível filtrar os resultados: {erro}
+        </div>
+      )}
+      {filtrados === null && erro === null && (
+        <div className="px-4 py-12 text-center text-sm text-slate-500">Carregando resultados…</div>
+      )}
+      {filtrados !== null && quantidade === 0 && (
         <div className="px-4 py-12 text-center text-sm text-slate-500">
           Nenhum resultado para o filtro selecionado
         </div>
@@ -4,6 +4,13 @@ import { useState } from "react";
 import { useRouter } from "next/navigation";
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+const EXTENSOES = [".xlsx", ".csv", ".parquet"];
+const ACCEPT = EXTENSOES.join(",");
+
+function extensaoValida(nome: string) {
+  const lower = nome.toLowerCase();
+  return EXTENSOES.some((ext) => lower.endsWith(ext));
+}
 
 export default function UploadForm() {
   const router = useRouter();
@@ -15,11 +22,11 @@ export default function UploadForm() {
   async function handleSubmit(e: React.FormEvent) {
     e.preventDefault();
     if (!refFile || !compFile) {
-      setError("Selecione os dois arquivos .xlsx");
+      setError("Selecione os dois arquivos");
       return;
     }
-    if (!refFile.name.toLowerCase().endsWith(".xlsx") || !compFile.name.toLowerCase().endsWith(".xlsx")) {
-      setError("Ambos os arquivos devem ser .xlsx");
+    if (!extensaoValida(refFile.name) || !extensaoValida(compFile.name)) {
+      setError("Ambos os arquivos devem ser .xlsx, .csv ou .parquet");
       return;
     }
 
@@ -60,7 +67,7 @@ export default function UploadForm() {
         </label>
         <input
           type="file"
-          accept=".xlsx"
+          accept={ACCEPT}
           onChange={(e) => setRefFile(e.target.files?.[0] ?? null)}
           className="block w-full text-sm text-slate-600 file:mr-4 file:rounded-lg file:border-0 file:bg-teal-50 file:py-2 file:px-4 file:text-teal-700 file:hover:bg-teal-100"
         />
@@ -71,7 +78,7 @@ export default function UploadForm() {
         </label>
         <input
           type="file"
-          accept=".xlsx"
+          accept={ACCEPT}
           onChange={(e) => setCompFile(e.target.files?.[0] ?? null)}
           className="block w-full text-sm text-slate-600 file:mr-4 file:rounded-lg file:border-0 file:bg-blue-50 file:py-2 file:px-4 file:text-blue-700 file:hover:bg-blue-100"
         />
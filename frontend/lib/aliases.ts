@@ -0,0 +1,21 @@
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
+/**
+ * Registra no histórico que os dois nomes são o mesmo fornecedor. Nas próximas
+ * conciliações o par vem marcado como alias (alias_fornecedor), com a similaridade real
+ * dos nomes no score; o status do match continua dependendo só de valor e data.
+ */
+export async function confirmarAlias(fornecedorReferencia: string, fornecedorComparacao: string) {
+  const res = await fetch(`${API_URL}/aliases`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      fornecedor_referencia: fornecedorReferencia,
+      fornecedor_comparacao: fornecedorComparacao,
+    }),
+  });
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    throw new Error(err.detail || `Erro ${res.status}`);
+  }
+}
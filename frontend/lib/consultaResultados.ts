@@ -0,0 +1,219 @@
+"use client";
+
+import { useEffect, useState } from "react";
+import type { PorData, ResultadoItem } from "@/app/types";
+import type { FiltroStatus } from "@/components/FiltrosResultado";
+import type { PedidoWorker } from "./resultados.worker";
+import {
+  agruparPorData,
+  buffersDe,
+  filtrarIndices,
+  ordenarDatas,
+  paraColunar,
+  totaisPorData,
+  type DatasOrdenadas,
+  type GruposFiltrados,
+  type OrdemDatas,
+  type ResultadosColunar,
+} from "./resultadosColunar";
+
+/**
+ * Consultas sobre os resultados (filtro, agrupamento por data, ordenação das datas)
+ * executadas num Web Worker sobre a cópia colunar. Sem suporte a Worker, ou se o worker
+ * falhar, as mesmas funções rodam na thread principal.
+ */
+
+// Conjuntos mantidos no worker (as duas análises e alguma folga)
+const MAX_CONJUNTOS = 4;
+
+type Pendente = { resolver: (v: unknown) => void; rejeitar: (e: Error) => void };
+
+class ClienteResultados {
+  private worker: Worker | null = null;
+  private seq = 0;
+  private pendentes = new Map<number, Pendente>();
+  private chaves = new WeakMap<ResultadoItem[], number>();
+  private proximaChave = 1;
+  private carregados: number[] = [];
+  // Fallback sem worker: colunas na própria thread
+  private locais = new Map<number, ResultadosColunar>();
+
+  constructor() {
+    if (typeof Worker === "undefined") return;
+    try {
+      this.worker = new Worker(new URL("./resultados.worker.ts", import.meta.url));
+      this.worker.onmessage = (ev: MessageEvent<{ seq: number; resultado?: unknown; erro?: string }>) => {
+        const pendente = this.pendentes.get(ev.data.seq);
+        if (!pendente) return;
+        this.pendentes.delete(ev.data.seq);
+        if (ev.data.erro) pendente.rejeitar(new Error(ev.data.erro));
+        else pendente.resolver(ev.data.resultado);
+      };
+      // Worker que não carregou ou quebrou: nenhuma resposta pendente chegaria
+      this.worker.onerror = (ev) => {
+        ev.preventDefault();
+        this.desligarWorker(new Error(ev.message || "Falha no worker de resultados"));
+      };
+      this.worker.onmessageerror = () => this.desligarWorker(new Error("Mensagem inválida do worker de resultados"));
+    } catch {
+      this.worker = null;
+    }
+  }
+
+  /** Passa a consultar na thread principal; pedidos em andamento no worker são rejeitados. */
+  private desligarWorker(erro: Error) {
+    if (!this.worker) return;
+    this.worker.terminate();
+    this.worker = null;
+    this.carregados = [];
+    const pendentes = Array.from(this.pendentes.values());
+    this.pendentes.clear();
+    pendentes.forEach((p) => p.rejeitar(erro));
+  }
+
+  /** Consulta no worker; se ele falhar, desliga o worker e refaz na thread principal. */
+  private async executar<T>(noWorker: () => Promise<T>, local: () => T): Promise<T> {
+    if (this.worker) {
+      try {
+        return await noWorker();
+      } catch (e) {
+        console.error("Worker de resultados falhou; consultando na thread principal:", e);
+        this.desligarWorker(e instanceof Error ? e : new Error(String(e)));
+      }
+    }
+    return local();
+  }
+
+  /** Cópia colunar na thread principal (recriada se o worker foi desligado). */
+  private colunarLocal(resultados: ResultadoItem[]): ResultadosColunar {
+    return this.locais.get(this.chave(resultados))!;
+  }
+
+  /** Chave do conjunto no worker; na primeira vez, envia a cópia colunar (buffers transferidos). */
+  private chave(resultados: ResultadoItem[]): number {
+    const existente = this.chaves.get(resultados);
+    if (existente !== undefined && (this.carregados.includes(existente) || this.locais.has(existente))) {
+      return existente;
+    }
+    const chave = this.proximaChave++;
+    this.chaves.set(resultados, chave);
+    const colunar = paraColunar(resultados);
+    if (!this.worker) {
+      this.locais.set(chave, colunar);
+      return chave;
+    }
+    this.worker.postMessage({ tipo: "carregar", chave, colunar } satisfies PedidoWorker, buffersDe(
+      colunar.status,
+      colunar.data
+    ));
+    this.carregados.push(chave);
+    while (this.carregados.length > MAX_CONJUNTOS) {
+      this.worker.postMessage({ tipo: "descartar", chave: this.carregados.shift()! } satisfies PedidoWorker);
+    }
+    return chave;
+  }
+
+  private pedir<T>(pedido: PedidoWorker, transferir: Transferable[] = []): Promise<T> {
+    return new Promise<T>((resolver, rejeitar) => {
+      this.pendentes.set((pedido as { seq: number }).seq, {
+        resolver: resolver as (v: unknown) => void,
+        rejeitar,
+      });
+      this.worker!.postMessage(pedido, transferir);
+    });
+  }
+
+  filtrar(resultados: ResultadoItem[], filtro: FiltroStatus): Promise<Int32Array> {
+    return this.executar(
+      () => this.pedir({ tipo: "filtrar", seq: ++this.seq, chave: this.chave(resultados), filtro }),
+      () => filtrarIndices(this.colunarLocal(resultados), filtro)
+    );
+  }
+
+  agrupar(resultados: ResultadoItem[], datas: string[], filtro: FiltroStatus): Promise<GruposFiltrados> {
+    return this.executar(
+      () => this.pedir({ tipo: "agrupar", seq: ++this.seq, chave: this.chave(resultados), filtro, datas }),
+      () => agruparPorData(this.colunarLocal(resultados), datas, filtro)
+    );
+  }
+
+  ordenarDatas(porData: PorData[], ordenarPor: OrdemDatas): Promise<DatasOrdenadas> {
+    return this.executar(
+      () => {
+        // Buffers transferidos ao worker: o fallback recalcula os totais
+        const totais = totaisPorData(porData);
+        return this.pedir({ tipo: "ordenarDatas", seq: ++this.seq, totais, ordenarPor }, buffersDe(
+          totais.total_ref,
+          totais.total_comp,
+          totais.divergente
+        ));
+      },
+      () => ordenarDatas(totaisPorData(porData), ordenarPor)
+    );
+  }
+}
+
+let cliente: ClienteResultados | null = null;
+
+function obterCliente(): ClienteResultados {
+  if (!cliente) cliente = new ClienteResultados();
+  return cliente;
+}
+
+/** Estado de uma consulta: valor null enquanto carrega ou se ela falhou (erro preenchido). */
+export interface Consulta<T> {
+  valor: T | null;
+  erro: string | null;
+}
+
+/**
+ * Resultado assíncrono de uma consulta, associado às entradas que o geraram. Enquanto a
+ * consulta nova não chega, mantém o anterior se ele for do mesmo conjunto (evita piscar
+ * ao trocar o filtro); de outro conjunto, devolve valor null. Falhas (inclusive na thread
+ * principal, depois do fallback do worker) chegam em erro.
+ */
+function useConsulta<T, C>(conjunto: C, consultar: () => Promise<T>, deps: unknown[]): Consulta<T> {
+  const [estado, setEstado] = useState<({ conjunto: C } & Consulta<T>) | null>(null);
+
+  useEffect(() => {
+    let cancelado = false;
+    consultar().then(
+      (valor) => {
+        if (!cancelado) setEstado({ conjunto, valor, erro: null });
+      },
+      (e) => {
+        console.error("Falha na consulta de resultados:", e);
+        if (!cancelado) setEstado({ conjunto, valor: null, erro: e instanceof Error ? e.message : String(e) });
+      }
+    );
+    return () => {
+      cancelado = true;
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, deps);
+
+  return estado && estado.conjunto === conjunto ? { valor: estado.valor, erro: estado.erro } : { valor: null, erro: null };
+}
+
+/** Índices (em `resultados`) dos itens que passam no filtro. */
+export function useIndicesFiltrados(resultados: ResultadoItem[], filtro: FiltroStatus): Consulta<Int32Array> {
+  return useConsulta(resultados, () => obterCliente().filtrar(resultados, filtro), [resultados, filtro]);
+}
+
+/** Resultados filtrados de cada data de porData. */
+export function useGruposFiltrados(
+  resultados: ResultadoItem[],
+  porData: PorData[],
+  filtro: FiltroStatus
+): Consulta<GruposFiltrados> {
+  return useConsulta(
+    resultados,
+    () => obterCliente().agrupar(resultados, porData.map((d) => d.data), filtro),
+    [resultados, porData, filtro]
+  );
+}
+
+/** Ordem de exibição das datas e totais DE/PARA. */
+export function useDatasOrdenadas(porData: PorData[], ordenarPor: OrdemDatas): Consulta<DatasOrdenadas> {
+  return useConsulta(porData, () => obterCliente().ordenarDatas(porData, ordenarPor), [porData, ordenarPor]);
+}
@@ -0,0 +1,79 @@
+import { useEffect, useState } from "react";
+
+/**
+ * Consultas ao cubo de agregados da execução (GET /execucoes/{id}/cubo): totais DE/PARA
+ * por data, centro de custo, departamento e status somados no servidor, sem percorrer
+ * os resultados no navegador.
+ */
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
+export const DIMENSOES_CUBO = ["centro_custo", "departamento", "status", "data"] as const;
+
+export type DimensaoCubo = (typeof DIMENSOES_CUBO)[number];
+
+export type FiltrosCubo = Partial<Record<DimensaoCubo, string[]>>;
+
+export interface MedidasCubo {
+  qtd_ref: number;
+  centavos_ref: number;
+  qtd_comp: number;
+  centavos_comp: number;
+}
+
+export type LinhaCubo = MedidasCubo & Partial<Record<DimensaoCubo, string>>;
+
+export interface ConsultaCubo {
+  agrupar: DimensaoCubo[];
+  filtros: FiltrosCubo;
+  linhas: LinhaCubo[];
+  total: MedidasCubo;
+}
+
+export async function consultarCubo(
+  idExecucao: string,
+  analise: "valor_data" | "centro_custo",
+  agrupar: DimensaoCubo[],
+  filtros: FiltrosCubo = {}
+): Promise<ConsultaCubo> {
+  const params = new URLSearchParams({ analise });
+  agrupar.forEach((d) => params.append("agrupar", d));
+  for (const [dimensao, valores] of Object.entries(filtros)) {
+    valores?.forEach((v) => params.append(dimensao, v));
+  }
+  const res = await fetch(`${API_URL}/execucoes/${encodeURIComponent(idExecucao)}/cubo?${params}`);
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    throw new Error(err.detail || `Erro ${res.status}`);
+  }
+  return res.json();
+}
+
+/** Consulta do cubo refeita quando a execução, o agrupamento ou os filtros mudam (null enquanto carrega). */
+export function useCubo(
+  idExecucao: string | null | undefined,
+  analise: "valor_data" | "centro_custo",
+  agrupar: DimensaoCubo[],
+  filtros: FiltrosCubo
+): ConsultaCubo | null {
+  const [consulta, setConsulta] = useState<ConsultaCubo | null>(null);
+  const chave = JSON.stringify([idExecucao, analise, agrupar, filtros]);
+
+  useEffect(() => {
+    setConsulta(null);
+    if (!idExecucao) return;
+    let cancelado = false;
+    consultarCubo(idExecucao, analise, agrupar, filtros).then(
+      (c) => {
+        if (!cancelado) setConsulta(c);
+      },
+      (e) => console.error("Falha na consulta do cubo:", e)
+    );
+    return () => {
+      cancelado = true;
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [chave]);
+
+  return consulta;
+}
@@ -35,6 +35,19 @@ function resultadoParaLinha(r: ResultadoItem) {
 
 export type TipoRelatorio = "divergentes" | "total";
 
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
+
+/** URL do relatório gerado em streaming no servidor para uma execução. */
+export function urlExportacao(
+  idExecucao: string,
+  analise: "valor_data" | "centro_custo",
+  tipo: TipoRelatorio,
+  formato: "xlsx" | "csv" | "pdf"
+) {
+  const params = new URLSearchParams({ formato, tipo, analise });
+  return `${API_URL}/execucoes/${encodeURIComponent(idExecucao)}/exportar?${params}`;
+}
+
 function filtrarResultados(resultados: ResultadoItem[], tipo: TipoRelatorio): ResultadoItem[] {
   if (tipo === "divergentes") {
     return resultados.filter(
@@ -0,0 +1,68 @@
+import {
+  agruparPorData,
+  buffersDe,
+  filtrarIndices,
+  ordenarDatas,
+  type ResultadosColunar,
+  type TotaisPorData,
+  type OrdemDatas,
+} from "./resultadosColunar";
+import type { FiltroStatus } from "@/components/FiltrosResultado";
+
+/** Pedidos aceitos pelo worker (ver lib/consultaResultados.ts). */
+export type PedidoWorker =
+  | { tipo: "carregar"; chave: number; colunar: ResultadosColunar }
+  | { tipo: "descartar"; chave: number }
+  | { tipo: "filtrar"; seq: number; chave: number; filtro: FiltroStatus }
+  | { tipo: "agrupar"; seq: number; chave: number; filtro: FiltroStatus; datas: string[] }
+  | { tipo: "ordenarDatas"; seq: number; totais: TotaisPorData; ordenarPor: OrdemDatas };
+
+interface EscopoWorker {
+  onmessage: ((ev: MessageEvent<PedidoWorker>) => void) | null;
+  postMessage(mensagem: unknown, transferir?: Transferable[]): void;
+}
+
+const escopo = self as unknown as EscopoWorker;
+const conjuntos = new Map<number, ResultadosColunar>();
+
+escopo.onmessage = (ev) => {
+  const pedido = ev.data;
+  try {
+    switch (pedido.tipo) {
+      case "carregar":
+        conjuntos.set(pedido.chave, pedido.colunar);
+        return;
+      case "descartar":
+        conjuntos.delete(pedido.chave);
+        return;
+      case "filtrar": {
+        const col = conjuntos.get(pedido.chave);
+        if (!col) throw new Error(`Conjunto ${pedido.chave} não carregado`);
+        const indices = filtrarIndices(col, pedido.filtro);
+        escopo.postMessage({ seq: pedido.seq, resultado: indices }, buffersDe(indices));
+        return;
+      }
+      case "agrupar": {
+        const col = conjuntos.get(pedido.chave);
+        if (!col) throw new Error(`Conjunto ${pedido.chave} não carregado`);
+        const grupos = agruparPorData(col, pedido.datas, pedido.filtro);
+        escopo.postMessage({ seq: pedido.seq, resultado: grupos }, buffersDe(
+          grupos.grupos,
+          grupos.indices,
+          grupos.offsets,
+          grupos.problemas
+        ));
+        return;
+      }
+      case "ordenarDatas": {
+        const ordenadas = ordenarDatas(pedido.totais, pedido.ordenarPor);
+        escopo.postMessage({ seq: pedido.seq, resultado: ordenadas }, buffersDe(ordenadas.ordem));
+        return;
+      }
+    }
+  } catch (e) {
+    if ("seq" in pedido) {
+      escopo.postMessage({ seq: pedido.seq, erro: e instanceof Error ? e.message : String(e) });
+    }
+  }
+};
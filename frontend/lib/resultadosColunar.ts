@@ -0,0 +1,196 @@
+import type { FiltroStatus } from "@/components/FiltrosResultado";
+import type { PorData, ResultadoItem } from "@/app/types";
+
+/**
+ * Cópia colunar compacta dos resultados (status e data codificados em typed arrays)
+ * usada para filtrar, agrupar e ordenar sem percorrer os objetos. As funções daqui são
+ * puras e rodam no Web Worker (lib/resultados.worker.ts) ou, sem worker, na thread principal.
+ */
+
+export const STATUS = ["ok", "divergente", "nao_encontrado", "info_faltante"] as const;
+
+const STATUS_DIVERGENTES = ["divergente", "nao_encontrado", "info_faltante"];
+
+const MAP_FILTRO_STATUS: Record<string, string> = {
+  divergentes: "divergente",
+  nao_encontrados: "nao_encontrado",
+};
+
+const CODIGO_STATUS: Record<string, number> = Object.fromEntries(STATUS.map((s, i) => [s, i]));
+const CODIGO_DESCONHECIDO = 255;
+
+export interface ResultadosColunar {
+  quantidade: number;
+  /** Código do status (índice em STATUS; 255 se desconhecido) */
+  status: Uint8Array;
+  /** Índice em `datas` da data da referência (-1 sem data) */
+  data: Int32Array;
+  datas: string[];
+}
+
+export interface TotaisPorData {
+  total_ref: Float64Array;
+  total_comp: Float64Array;
+  divergente: Uint8Array;
+}
+
+export interface GruposFiltrados {
+  /** Posição do grupo em porData, só dos grupos exibidos */
+  grupos: Int32Array;
+  /** Índices dos resultados de cada grupo exibido: indices[offsets[g]..offsets[g + 1]] */
+  indices: Int32Array;
+  offsets: Int32Array;
+  /** Itens a revisar (divergente, não encontrado, info faltante) por grupo exibido */
+  problemas: Int32Array;
+}
+
+export type OrdemDatas = "data" | "valor" | "divergente";
+
+export interface DatasOrdenadas {
+  ordem: Int32Array;
+  totalDe: number;
+  totalPara: number;
+  datasComDivergencia: number;
+}
+
+/** Buffers para transferir (sem cópia) ao worker ou de volta. */
+export function buffersDe(...arrays: ArrayBufferView[]): ArrayBuffer[] {
+  return arrays.map((a) => a.buffer as ArrayBuffer);
+}
+
+export function paraColunar(resultados: ResultadoItem[]): ResultadosColunar {
+  const quantidade = resultados.length;
+  const status = new Uint8Array(quantidade);
+  const data = new Int32Array(quantidade);
+  const datas: string[] = [];
+  const codigoData = new Map<string, number>();
+
+  for (let i = 0; i < quantidade; i++) {
+    const r = resultados[i];
+    status[i] = CODIGO_STATUS[r.status] ?? CODIGO_DESCONHECIDO;
+    const d = r.referencia?.data ?? "";
+    if (!d) {
+      data[i] = -1;
+      continue;
+    }
+    let codigo = codigoData.get(d);
+    if (codigo === undefined) {
+      codigo = datas.length;
+      datas.push(d);
+      codigoData.set(d, codigo);
+    }
+    data[i] = codigo;
+  }
+  return { quantidade, status, data, datas };
+}
+
+export function totaisPorData(porData: PorData[]): TotaisPorData {
+  const n = porData.length;
+  const totais = {
+    total_ref: new Float64Array(n),
+    total_comp: new Float64Array(n),
+    divergente: new Uint8Array(n),
+  };
+  porData.forEach((d, i) => {
+    totais.total_ref[i] = d.total_ref;
+    totais.total_comp[i] = d.total_comp;
+    totais.divergente[i] = d.divergente ? 1 : 0;
+  });
+  return totais;
+}
+
+/** Tabela código de status -> passa no filtro. */
+function mascaraFiltro(filtro: FiltroStatus): Uint8Array {
+  const mascara = new Uint8Array(256);
+  if (filtro === "todos") return mascara.fill(1);
+  const aceitos = filtro === "apenas_divergentes" ? STATUS_DIVERGENTES : [MAP_FILTRO_STATUS[filtro] ?? filtro];
+  for (const s of aceitos) {
+    if (s in CODIGO_STATUS) mascara[CODIGO_STATUS[s]] = 1;
+  }
+  return mascara;
+}
+
+export function filtrarIndices(col: ResultadosColunar, filtro: FiltroStatus): Int32Array {
+  const mascara = mascaraFiltro(filtro);
+  const saida = new Int32Array(col.quantidade);
+  let n = 0;
+  for (let i = 0; i < col.quantidade; i++) {
+    if (mascara[col.status[i]]) saida[n++] = i;
+  }
+  return saida.slice(0, n);
+}
+
+/**
+ * Resultados filtrados de cada data de `datasGrupos` (ordem de porData), na ordem original.
+ * Com filtro "todos" todos os grupos são exibidos; nos demais, só os que têm resultados.
+ */
+export function agruparPorData(
+  col: ResultadosColunar,
+  datasGrupos: string[],
+  filtro: FiltroStatus
+): GruposFiltrados {
+  const mascara = mascaraFiltro(filtro);
+  const problema = mascaraFiltro("apenas_divergentes");
+
+  // Código de data do resultado -> posição do grupo
+  const grupoDaData = new Int32Array(col.datas.length).fill(-1);
+  const posicaoGrupo = new Map(datasGrupos.map((d, g) => [d, g]));
+  col.datas.forEach((d, codigo) => {
+    grupoDaData[codigo] = posicaoGrupo.get(d) ?? -1;
+  });
+
+  // Contagem por grupo e, depois, offsets (counting sort estável)
+  const contagem = new Int32Array(datasGrupos.length);
+  const problemasPorGrupo = new Int32Array(datasGrupos.length);
+  for (let i = 0; i < col.quantidade; i++) {
+    const codigo = col.data[i];
+    const g = codigo >= 0 ? grupoDaData[codigo] : -1;
+    if (g < 0 || !mascara[col.status[i]]) continue;
+    contagem[g]++;
+    if (problema[col.status[i]]) problemasPorGrupo[g]++;
+  }
+
+  const exibidos: number[] = [];
+  for (let g = 0; g < datasGrupos.length; g++) {
+    if (contagem[g] > 0 || filtro === "todos") exibidos.push(g);
+  }
+  const grupos = Int32Array.from(exibidos);
+  const offsets = new Int32Array(grupos.length + 1);
+  const cursor = new Int32Array(datasGrupos.length);
+  const problemas = new Int32Array(grupos.length);
+  grupos.forEach((g, k) => {
+    offsets[k + 1] = offsets[k] + contagem[g];
+    cursor[g] = offsets[k];
+    problemas[k] = problemasPorGrupo[g];
+  });
+
+  const indices = new Int32Array(offsets[grupos.length]);
+  for (let i = 0; i < col.quantidade; i++) {
+    const codigo = col.data[i];
+    const g = codigo >= 0 ? grupoDaData[codigo] : -1;
+    if (g < 0 || !mascara[col.status[i]]) continue;
+    indices[cursor[g]++] = i;
+  }
+  return { grupos, indices, offsets, problemas };
+}
+
+export function ordenarDatas(totais: TotaisPorData, ordenarPor: OrdemDatas): DatasOrdenadas {
+  const n = totais.total_ref.length;
+  let totalDe = 0;
+  let totalPara = 0;
+  let datasComDivergencia = 0;
+  for (let i = 0; i < n; i++) {
+    totalDe += totais.total_ref[i];
+    totalPara += totais.total_comp[i];
+    datasComDivergencia += totais.divergente[i];
+  }
+
+  const ordem = Array.from({ length: n }, (_, i) => i);
+  if (ordenarPor === "valor") {
+    const maximo = (i: number) => Math.max(totais.total_ref[i], totais.total_comp[i]);
+    ordem.sort((a, b) => maximo(b) - maximo(a));
+  } else if (ordenarPor === "divergente") {
+    ordem.sort((a, b) => totais.divergente[b] - totais.divergente[a]);
+  }
+  return { ordem: Int32Array.from(ordem), totalDe, totalPara, datasComDivergencia };
+}
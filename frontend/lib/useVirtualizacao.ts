@@ -0,0 +1,143 @@
+"use client";
+
+import { useCallback, useEffect, useLayoutEffect, useMemo, useRef, useState } from "react";
+
+/**
+ * Renderização em janela para listas longas que rolam com a página.
+ * Só os itens visíveis (mais `overscan` de cada lado) são montados; o espaço dos demais
+ * é reservado com `espacoAntes`/`espacoDepois`. As alturas começam em `alturaEstimada`
+ * e são corrigidas com ResizeObserver conforme os itens aparecem.
+ *
+ * Uso: `containerRef` no elemento que contém a lista, `medir` + `data-indice` em cada item.
+ */
+
+interface OpcoesVirtualizacao {
+  quantidade: number;
+  alturaEstimada: number;
+  overscan?: number;
+  /** Muda quando os itens passam a ser outros (ex: outro filtro), descartando as alturas medidas */
+  chave?: unknown;
+}
+
+interface Janela {
+  inicio: number;
+  fim: number;
+}
+
+/** Primeiro índice i com offsets[i + 1] > y. */
+function buscarIndice(offsets: Float64Array, y: number): number {
+  let lo = 0;
+  let hi = offsets.length - 2;
+  while (lo < hi) {
+    const meio = (lo + hi) >> 1;
+    if (offsets[meio + 1] > y) hi = meio;
+    else lo = meio + 1;
+  }
+  return Math.max(0, lo);
+}
+
+export function useVirtualizacao<E extends HTMLElement = HTMLDivElement>({
+  quantidade,
+  alturaEstimada,
+  overscan = 6,
+  chave,
+}: OpcoesVirtualizacao) {
+  const containerRef = useRef<E | null>(null);
+  const alturas = useRef<Float64Array>(new Float64Array(0));
+  const [versao, setVersao] = useState(0);
+  const [janela, setJanela] = useState<Janela>({ inicio: 0, fim: Math.min(quantidade, 20) });
+
+  // Alturas conhecidas (medidas ou estimadas) para a lista atual
+  const alturasAtuais = useMemo(
+    () => new Float64Array(quantidade).fill(alturaEstimada),
+    // chave: itens diferentes com a mesma quantidade também descartam as medições
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+    [quantidade, alturaEstimada, chave]
+  );
+
+  useLayoutEffect(() => {
+    alturas.current = alturasAtuais;
+  }, [alturasAtuais]);
+
+  const offsets = useMemo(() => {
+    const o = new Float64Array(quantidade + 1);
+    for (let i = 0; i < quantidade; i++) o[i + 1] = o[i] + alturasAtuais[i];
+    return o;
+    // versao: recalcula após novas medições
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [alturasAtuais, quantidade, versao]);
+
+  const atualizarJanela = useCallback(() => {
+    const el = containerRef.current;
+    if (!el || quantidade === 0) {
+      setJanela((j) => (j.inicio === 0 && j.fim === 0 ? j : { inicio: 0, fim: 0 }));
+      return;
+    }
+    const topo = el.getBoundingClientRect().top;
+    const visivelDe = Math.max(0, -topo);
+    const visivelAte = Math.max(0, window.innerHeight - topo);
+    const inicio = Math.max(0, buscarIndice(offsets, visivelDe) - overscan);
+    const fim = Math.min(quantidade, buscarIndice(offsets, visivelAte) + 1 + overscan);
+    setJanela((j) => (j.inicio === inicio && j.fim === fim ? j : { inicio, fim }));
+  }, [offsets, quantidade, overscan]);
+
+  useLayoutEffect(() => {
+    atualizarJanela();
+  }, [atualizarJanela]);
+
+  useEffect(() => {
+    let quadro = 0;
+    const agendar = () => {
+      if (quadro) return;
+      quadro = requestAnimationFrame(() => {
+        quadro = 0;
+        atualizarJanela();
+      });
+    };
+    window.addEventListener("scroll", agendar, { passive: true });
+    window.addEventListener("resize", agendar);
+    return () => {
+      window.removeEventListener("scroll", agendar);
+      window.removeEventListener("resize", agendar);
+      if (quadro) cancelAnimationFrame(quadro);
+    };
+  }, [atualizarJanela]);
+
+  const observador = useMemo(() => {
+    if (typeof ResizeObserver === "undefined") return null;
+    return new ResizeObserver((entradas) => {
+      let mudou = false;
+      for (const entrada of entradas) {
+        const indice = Number((entrada.target as HTMLElement).dataset.indice);
+        const altura = entrada.borderBoxSize?.[0]?.blockSize ?? entrada.target.getBoundingClientRect().height;
+        if (indice < alturas.current.length && Math.abs(alturas.current[indice] - altura) > 0.5) {
+          alturas.current[indice] = altura;
+          mudou = true;
+        }
+      }
+      if (mudou) setVersao((v) => v + 1);
+    });
+  }, []);
+
+  useEffect(() => () => observador?.disconnect(), [observador]);
+
+  const medir = useCallback(
+    (el: HTMLElement | null) => {
+      if (!el || !observador) return;
+      observador.observe(el);
+      return () => observador.unobserve(el);
+    },
+    [observador]
+  );
+
+  const inicio = Math.min(janela.inicio, quantidade);
+  const fim = Math.min(janela.fim, quantidade);
+  return {
+    containerRef,
+    medir,
+    inicio,
+    fim,
+    espacoAntes: offsets[inicio] ?? 0,
+    espacoDepois: (offsets[quantidade] ?? 0) - (offsets[fim] ?? 0),
+  };
+}